@@ -13,4 +13,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_roles.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# El canal SSE de planos se atiende antes de Django: sin hilo por conexión.
+from planos.asgi import con_canal_sse  # noqa: E402
+from planos.services import duplicados  # noqa: E402
+
+application = con_canal_sse(django_application)
+
+# Filtro de duplicados listo antes de la primera alta (si está activo).
+duplicados.precalentar()
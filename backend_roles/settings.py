@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,6 +32,7 @@ INSTALLED_APPS = [
     'usuarios',
     'planos',
     'rest_framework',
+    'rest_framework.authtoken',
     'django_extensions',
 
 ]
@@ -39,11 +41,47 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny"
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        # Token primero: no ejecuta PBKDF2 en cada petición (ver usuarios/authentication.py)
+        "usuarios.authentication.TokenCacheadoAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
 }
 
+# Caché en memoria de tokens: segundos de vida y entradas máximas por proceso
+TOKEN_CACHE_TTL = 300
+TOKEN_CACHE_MAXIMO = 10_000
+
+# Caché de ids de usuario válidos para `subido_por` (ver usuarios/cache.py)
+USUARIOS_CACHE_TTL = 300
+USUARIOS_CACHE_MAXIMO = 1_000
+
+# Total de las listas paginadas (`?limit=`) si no llega `?count=`:
+# "exact", "estimate" o "none" (ver planos/services/conteo.py)
+PLANOS_CONTEO_POR_DEFECTO = "estimate"
+
+# Rechazar altas/cambios que dupliquen (titulo, descripcion, area, subarea)
+# de otro plano. El chequeo pasa primero por un filtro de Bloom en memoria
+# (ver planos/services/duplicados.py).
+PLANOS_RECHAZAR_DUPLICADOS = os.environ.get("PLANOS_RECHAZAR_DUPLICADOS") == "1"
+PLANOS_DUPLICADOS_TASA_FP = 0.01
+PLANOS_DUPLICADOS_REFRESCO_MS = 1000
+
+# Feed /api/planos/cambios/: solo entrega cambios con esta antigüedad mínima
+# (ver planos/services/cambios.py). En SQLite `modificado` se fija con el
+# bloqueo de escritura ya tomado (`transaction_mode`, abajo), así que la
+# espera del bloqueo no cuenta: el margen cubre la diferencia de reloj entre
+# procesos. En PostgreSQL no hay un bloqueo único: debe cubrir la
+# transacción de escritura de planos más larga.
+PLANOS_CAMBIOS_MARGEN_MS = 1000
+
+# Canal SSE /api/planos/eventos/ (ver planos/services/eventos.py): cada cuánto
+# sondea el publicador, cuántos eventos guarda para Last-Event-ID y cada
+# cuántos segundos se manda un latido a las conexiones sin eventos.
+PLANOS_EVENTOS_INTERVALO_MS = 500
+PLANOS_EVENTOS_HISTORIAL = 10_000
+PLANOS_EVENTOS_LATIDO_S = 15
+
 # REST_FRAMEWORK = {
 #     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticatedOrReadOnly"],
 #     "DEFAULT_AUTHENTICATION_CLASSES": [
@@ -55,6 +93,9 @@ REST_FRAMEWORK = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'planos.middleware.ConsultasLentasMiddleware',
+    'planos.middleware.CompresionMiddleware',
+    'planos.middleware.ControlAdmisionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,6 +104,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Control de admisión de /api/ (ver planos/middleware.py): peticiones
+# simultáneas por clase, tamaño de la cola de espera y plazo antes del 503.
+# SQLite admite un solo escritor a la vez: con PostgreSQL se puede subir
+# la concurrencia de escritura. Con PLANOS_ESCRITURA_AGRUPADA=1 se sube más
+# abajo: con un solo POST admitido a la vez el escritor agrupado nunca
+# tendría más de una fila por lote.
+PLANOS_ADMISION = {
+    "lectura": {"concurrencia": 32, "cola": 64, "espera_ms": 500},
+    "escritura": {"concurrencia": 1, "cola": 32, "espera_ms": 500},
+    "masivo": {"concurrencia": 1, "cola": 4, "espera_ms": 2000},
+    "transferencia": {"concurrencia": 8, "cola": 16, "espera_ms": 500},
+}
+
+# Compresión gzip/brotli de las respuestas de /api/ (ver planos/middleware.py)
+PLANOS_COMPRESION = {
+    "minimo_bytes": 1024,
+    "nivel_gzip": 6,
+    "nivel_brotli": 4,
+}
+
 ROOT_URLCONF = 'backend_roles.urls'
 
 TEMPLATES = [
@@ -80,6 +141,22 @@ TEMPLATES = [
     },
 ]
 
+# Workers de producción: PLANOS_APPS_MINIMAS=1 quita el admin y las
+# herramientas de desarrollo (menos módulos que importar al arrancar).
+# Ver benchmarks/bench_arranque.py.
+APPS_OPCIONALES = (
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'django_extensions',
+)
+PLANOS_APPS_MINIMAS = os.environ.get("PLANOS_APPS_MINIMAS") == "1"
+if PLANOS_APPS_MINIMAS:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in APPS_OPCIONALES]
+    MIDDLEWARE.remove('django.contrib.messages.middleware.MessageMiddleware')
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove(
+        'django.contrib.messages.context_processors.messages')
+
 WSGI_APPLICATION = 'backend_roles.wsgi.application'
 
 
@@ -92,11 +169,30 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
         'OPTIONS': {
             'timeout': 60,  # Espera 60 segundos antes de lanzar "database is locked"
+            # BEGIN IMMEDIATE: cada transacción toma el bloqueo de escritura al
+            # empezar, antes de fijar `modificado`. Así los instantes quedan
+            # en el orden de los COMMIT (ver planos/services/cambios.py).
+            'transaction_mode': 'IMMEDIATE',
         },
         'CONN_MAX_AGE': 0,  # Cierra conexiones inmediatamente después de cada request
     }
 }
 
+# Réplicas de lectura (ver planos/services/replicas.py). PLANOS_REPLICAS=2
+# agrega `replica1` y `replica2`: copias SQLite del primario que mantiene al
+# día `python manage.py refrescar_replicas --cada 5`. Las lecturas de la API
+# de planos van a una réplica salvo justo después de que el cliente escribió.
+PLANOS_REPLICAS = [f"replica{i}" for i in range(1, int(os.environ.get("PLANOS_REPLICAS", "0")) + 1)]
+for _alias in PLANOS_REPLICAS:
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / f'db_{_alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['planos.services.replicas.RouterReplicas']
+PLANOS_REPLICAS_VENTANA_S = 60
+PLANOS_REPLICAS_MAX_RETRASO_S = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,6 +230,51 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Archivos generados por los trabajos "exportar" (ver planos/services/trabajos.py)
+PLANOS_EXPORTACIONES_DIR = BASE_DIR / 'exportaciones'
+
+# Adjuntos de los planos (ver planos/services/adjuntos.py): carpeta de los
+# archivos, tamaño máximo y horas sin actividad tras las que
+# `purgar_adjuntos` descarta una subida. Con nginx delante,
+# PLANOS_ADJUNTOS_X_ACCEL=/interno/adjuntos/ (una `location internal` con
+# `alias` a PLANOS_ADJUNTOS_DIR) deja las descargas y los Range a nginx.
+PLANOS_ADJUNTOS_DIR = BASE_DIR / 'adjuntos'
+PLANOS_ADJUNTOS_MAX_BYTES = 4 << 30
+PLANOS_ADJUNTOS_SUBIDA_TTL_H = 24
+PLANOS_ADJUNTOS_X_ACCEL = os.environ.get("PLANOS_ADJUNTOS_X_ACCEL") or None
+
+# Consultas lentas (ver planos/services/consultas_lentas.py): las que tardan
+# al menos estos ms van al logger `planos.consultas_lentas` y a
+# GET /api/metricas/consultas-lentas/. Con None no se registra ninguna: la
+# variable de entorno vacía u "off" da None.
+_consultas_lentas = os.environ.get("PLANOS_CONSULTAS_LENTAS_MS", "200").strip().lower()
+PLANOS_CONSULTAS_LENTAS_MS = (None if _consultas_lentas in ("", "off", "none")
+                              else float(_consultas_lentas))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"consola": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "planos.consultas_lentas": {"handlers": ["consola"], "level": "WARNING", "propagate": False},
+    },
+}
+
+# Escritura agrupada de POST /api/planos/ (ver planos/services/escritor.py)
+PLANOS_ESCRITURA_AGRUPADA = os.environ.get("PLANOS_ESCRITURA_AGRUPADA") == "1"
+PLANOS_ESCRITURA_MAX_LOTE = 64
+PLANOS_ESCRITURA_MAX_ESPERA_MS = 1
+if PLANOS_ESCRITURA_AGRUPADA:
+    # Los POST esperan al hilo escritor, que es quien serializa en SQLite:
+    # la admisión debe dejar pasar al menos un lote completo. PUT, PATCH y
+    # DELETE siguen yendo directo a la base y esperan su turno en el
+    # `timeout` de SQLite.
+    PLANOS_ADMISION["escritura"] = {
+        **PLANOS_ADMISION["escritura"],
+        "concurrencia": PLANOS_ESCRITURA_MAX_LOTE,
+        "cola": 2 * PLANOS_ESCRITURA_MAX_LOTE,
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
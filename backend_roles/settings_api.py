@@ -0,0 +1,42 @@
+"""
+Perfil solo-API para los workers que atienden `/api/`.
+
+    DJANGO_SETTINGS_MODULE=backend_roles.settings_api gunicorn backend_roles.wsgi
+
+Los clientes máquina se autentican con token (o Basic), así que aquí no
+hay sesiones, mensajes, CSRF ni clickjacking, ni API navegable. El admin
+y las migraciones siguen corriendo con `backend_roles.settings`; el proxy
+enruta `/api/` a estos workers y el resto a los workers completos.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import APPS_OPCIONALES, INSTALLED_APPS, REST_FRAMEWORK, TEMPLATES
+
+APPS_SOLO_WEB = (*APPS_OPCIONALES, 'django.contrib.sessions')
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in APPS_SOLO_WEB]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'planos.middleware.ConsultasLentasMiddleware',
+    'planos.middleware.CompresionMiddleware',
+    'planos.middleware.ControlAdmisionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'backend_roles.urls_api'
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'OPTIONS': {'context_processors': ['django.template.context_processors.request']},
+    },
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "usuarios.authentication.TokenCacheadoAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
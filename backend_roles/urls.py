@@ -1,8 +1,13 @@
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('planos.urls')),
+    path('api/', include('usuarios.urls')),
 
 ]
+
+# Sin el admin instalado (PLANOS_APPS_MINIMAS=1) no se importa su código.
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
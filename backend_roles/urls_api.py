@@ -0,0 +1,7 @@
+# URLconf del perfil solo-API (backend_roles.settings_api): sin admin.
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/', include('planos.urls')),
+    path('api/', include('usuarios.urls')),
+]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_roles.settings')
 
 application = get_wsgi_application()
+
+# Filtro de duplicados listo antes de la primera alta (si está activo).
+from planos.services import duplicados  # noqa: E402
+
+duplicados.precalentar()
@@ -0,0 +1,123 @@
+# Utilidades compartidas por los benchmarks (no forman parte de la app).
+# Cada script prepara su propia base SQLite temporal para no tocar db.sqlite3.
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+TITULOS = [
+    "Plano de Tuberías - Área 1",
+    "Plano Eléctrico - Tablero A",
+    "Plano Estructural - Vigas",
+    "Plano Arquitectónico - Oficinas",
+]
+DESCS = [
+    "Distribución de tuberías para la nave principal.",
+    "Circuitos y protecciones del Tablero A.",
+    "Detalle de armado de vigas principales.",
+    "Ambientes y accesos en zona de oficinas.",
+]
+AREAS = ["ELECTRICIDAD", "AUTOMOTRIZ", "HIDRAULICA", "MECANICA", "MECANICA-ELECTRICA"]
+SUB_AREAS = ["Zona-1", "Zona-2", "Zona-3", "Zona-4"]
+PALABRAS = ["bomba", "tablero", "válvula", "compresor", "línea", "motor",
+            "eléctrico", "soldadura", "anclaje", "ducto", "caldera", "faja"]
+
+
+def preparar_django(ruta_db=None, settings="backend_roles.settings", migrar=True):
+    """Configura Django sobre una base SQLite temporal (o la indicada)."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings)
+    from django.conf import settings as conf
+
+    if ruta_db is None:
+        ruta_db = os.path.join(tempfile.mkdtemp(prefix="bench_planos_"), "bench.sqlite3")
+    conf.DATABASES["default"]["NAME"] = ruta_db
+    conf.ALLOWED_HOSTS = ["testserver", "localhost", "127.0.0.1"]
+
+    import django
+    django.setup()
+    if migrar:
+        from django.core.management import call_command
+        call_command("migrate", verbosity=0)
+    return ruta_db
+
+
+def usuario_bench(username="bench"):
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    user, _ = User.objects.get_or_create(username=username)
+    return user
+
+
+def fila_aleatoria(rnd: random.Random, uid: int) -> dict:
+    extra = " ".join(rnd.choice(PALABRAS) for _ in range(3))
+    return {
+        "titulo": rnd.choice(TITULOS),
+        "descripcion": f"{rnd.choice(DESCS)} {extra}",
+        "subido_por_id": uid,
+        "area": rnd.choice(AREAS),
+        "subarea": rnd.choice(SUB_AREAS),
+    }
+
+
+def sembrar_planos(n: int, uids=None, lote: int = 10_000, semilla: int = 42) -> None:
+    """Inserta `n` planos aleatorios con bulk_create."""
+    from planos.models import Plano
+    rnd = random.Random(semilla)
+    uids = uids or [usuario_bench().pk]
+    hechos = 0
+    while hechos < n:
+        k = min(lote, n - hechos)
+        planos = [Plano(**fila_aleatoria(rnd, rnd.choice(uids))) for _ in range(k)]
+        for plano in planos:
+            plano.huella = plano.calcular_huella()  # bulk_create no pasa por save()
+        Plano.objects.bulk_create(planos)
+        hechos += k
+
+
+def cronometrar(funcion, repeticiones: int = 20) -> dict:
+    """Ejecuta `funcion` varias veces y devuelve mediana/p95/máx en ms."""
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    tiempos.sort()
+    return {
+        "mediana_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[max(0, int(len(tiempos) * 0.95) - 1)], 3),
+        "max_ms": round(tiempos[-1], 3),
+    }
+
+
+def imprimir_tabla(filas, columnas):
+    anchos = [max(len(str(c)), *(len(str(f.get(c, ""))) for f in filas)) for c in columnas]
+    print("  ".join(str(c).ljust(a) for c, a in zip(columnas, anchos)))
+    for f in filas:
+        print("  ".join(str(f.get(c, "")).ljust(a) for c, a in zip(columnas, anchos)))
+
+
+def ciclo_crud(client, uid: int, rnd: random.Random, **headers) -> int:
+    """
+    Un ciclo del escenario de locustfile.py (POST, GET, PUT, PATCH, DELETE)
+    con el cliente de pruebas de Django. Devuelve cuántas peticiones hizo.
+    """
+    fila = fila_aleatoria(rnd, uid)
+    fila["subido_por"] = fila.pop("subido_por_id")
+    r = client.post("/api/planos/", fila, content_type="application/json", **headers)
+    assert r.status_code == 201, r.content
+    url = f"/api/planos/{r.json()['id']}/"
+    client.get(url, **headers)
+    fila["titulo"] = "ACTUALIZADO - PUT"
+    client.put(url, fila, content_type="application/json", **headers)
+    client.patch(url, {"descripcion": "Actualizado parcialmente vía PATCH"},
+                 content_type="application/json", **headers)
+    client.delete(url, **headers)
+    return 5
@@ -0,0 +1,190 @@
+"""
+Benchmark: subir y descargar un adjunto grande (por defecto 1 GiB).
+
+Uso:
+    python benchmarks/bench_adjuntos.py --mib 1024 --parte 64
+
+Levanta la app en un proceso aparte con el servidor WSGI de la biblioteca
+estándar (wsgiref) y, desde este proceso, con http.client:
+  - sube el archivo en PATCH de `--parte` MiB (Upload-Offset);
+  - lo descarga completo verificando el SHA-256, y pide un Range final;
+  - vuelve a subirlo (el contenido ya existe: se guarda una sola vez).
+Informa MiB/s y la memoria del servidor (VmRSS antes y VmHWM, el pico).
+Como referencia mide, en este proceso, SHA-256 solo y escritura a disco sola.
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from _comun import imprimir_tabla, preparar_django
+
+MIB = 1 << 20
+
+
+def memoria_kib(pid: int, campo: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for linea in f:
+            if linea.startswith(campo + ":"):
+                return int(linea.split()[1])
+    return 0
+
+
+def servidor(puerto) -> None:
+    from wsgiref.simple_server import WSGIRequestHandler, make_server
+    from django.core.wsgi import get_wsgi_application
+
+    class Silencioso(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    httpd = make_server("127.0.0.1", 0, get_wsgi_application(), handler_class=Silencioso)
+    puerto.put(httpd.server_port)
+    httpd.serve_forever()
+
+
+def generar(ruta: str, mib: int) -> str:
+    """Archivo de `mib` MiB (un bloque aleatorio de 16 MiB repetido); devuelve su SHA-256."""
+    base = os.urandom(16 * MIB)
+    sha = hashlib.sha256()
+    with open(ruta, "wb") as f:
+        for i in range(0, mib, 16):
+            bloque = base[:min(16, mib - i) * MIB]
+            f.write(bloque)
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def referencia(ruta: str, mib: int) -> dict:
+    t0 = time.perf_counter()
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(MIB), b""):
+            sha.update(bloque)
+    solo_hash = mib / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    destino = ruta + ".copia"
+    with open(ruta, "rb") as f, open(destino, "wb") as g:
+        for bloque in iter(lambda: f.read(MIB), b""):
+            g.write(bloque)
+        g.flush()
+        os.fsync(g.fileno())
+    solo_disco = mib / (time.perf_counter() - t0)
+    os.unlink(destino)
+    return {"sha256_MiB_s": round(solo_hash), "copia_disco_MiB_s": round(solo_disco)}
+
+
+def leer(archivo, largo: int):
+    """`largo` bytes de `archivo`, de a 1 MiB (http.client los envía tal cual)."""
+    while largo:
+        bloque = archivo.read(min(MIB, largo))
+        largo -= len(bloque)
+        yield bloque
+
+
+def subir(conexion, plano_id: int, ruta: str, parte: int) -> dict:
+    tamano = os.path.getsize(ruta)
+    conexion.request("POST", f"/api/planos/{plano_id}/adjuntos/",
+                     json.dumps({"nombre": "plano.dwg", "tamano": tamano}),
+                     {"Content-Type": "application/json"})
+    r = conexion.getresponse()
+    url = urlsplit(json.loads(r.read())["url"]).path
+    with open(ruta, "rb") as f:
+        desde = 0
+        while desde < tamano:
+            largo = min(parte, tamano - desde)
+            conexion.request("PATCH", url, body=leer(f, largo), headers={
+                "Content-Type": "application/octet-stream", "Content-Length": str(largo),
+                "Upload-Offset": str(desde)})
+            r = conexion.getresponse()
+            datos = json.loads(r.read())
+            assert r.status in (200, 201), datos
+            desde += largo
+    return datos
+
+
+def descargar(conexion, adjunto_id: int, rango: str = None):
+    conexion.request("GET", f"/api/adjuntos/{adjunto_id}/descarga/",
+                     headers={"Range": rango} if rango else {})
+    r = conexion.getresponse()
+    sha, total = hashlib.sha256(), 0
+    for bloque in iter(lambda: r.read(MIB), b""):
+        sha.update(bloque)
+        total += len(bloque)
+    return r.status, total, sha.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mib", type=int, default=1024)
+    parser.add_argument("--parte", type=int, default=64, help="MiB por PATCH.")
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp(prefix="bench_adjuntos_")
+    preparar_django(os.path.join(carpeta, "bench.sqlite3"))
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from planos.models import Plano
+
+    settings.PLANOS_ADJUNTOS_DIR = os.path.join(carpeta, "adjuntos")
+    settings.PLANOS_ADJUNTOS_MAX_BYTES = args.mib * MIB
+    user = get_user_model().objects.create_user(username="bench")
+    plano = Plano.objects.create(titulo="Plano grande", descripcion="plano de planta general",
+                                 subido_por=user, area="MECANICA", subarea="General")
+    origen = os.path.join(carpeta, "origen.bin")
+    esperado = generar(origen, args.mib)
+    print(f"Carpeta: {carpeta} · archivo de {args.mib} MiB · PATCH de {args.parte} MiB · "
+          f"{os.cpu_count()} CPU")
+    print("Referencia en este proceso:", referencia(origen, args.mib), "\n")
+    connections.close_all()
+
+    puerto = mp.Queue()
+    proceso = mp.Process(target=servidor, args=(puerto,), daemon=True)
+    proceso.start()
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto.get(), timeout=600)
+    conexion.request("GET", "/api/planos/?limit=1")  # calienta imports y conexión a la base
+    conexion.getresponse().read()
+    rss_inicial = memoria_kib(proceso.pid, "VmRSS")
+
+    filas = []
+
+    def medir(nombre, funcion, mib):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        segundos = time.perf_counter() - t0
+        filas.append({"operacion": nombre, "segundos": round(segundos, 2),
+                      "MiB_s": round(mib / segundos), "pico_servidor_MiB":
+                      round(memoria_kib(proceso.pid, "VmHWM") / 1024)})
+        return resultado
+
+    adjunto = medir("subida", lambda: subir(conexion, plano.pk, origen, args.parte * MIB), args.mib)
+    assert adjunto["sha256"] == esperado
+    estado, total, sha = medir("descarga completa", lambda: descargar(conexion, adjunto["id"]),
+                               args.mib)
+    assert (estado, total, sha) == (200, args.mib * MIB, esperado)
+    ultimos = min(100, args.mib)
+    estado, total, _ = medir(f"Range últimos {ultimos} MiB", lambda: descargar(
+        conexion, adjunto["id"], f"bytes=-{ultimos * MIB}"), ultimos)
+    assert (estado, total) == (206, ultimos * MIB)
+    copia = medir("subida repetida (dedup)",
+                  lambda: subir(conexion, plano.pk, origen, args.parte * MIB), args.mib)
+    assert copia["sha256"] == esperado
+
+    contenidos = [n for d in os.listdir(settings.PLANOS_ADJUNTOS_DIR) if len(d) == 2
+                  for n in os.listdir(os.path.join(settings.PLANOS_ADJUNTOS_DIR, d))]
+    imprimir_tabla(filas, ["operacion", "segundos", "MiB_s", "pico_servidor_MiB"])
+    print(f"\nRSS del servidor antes de subir: {rss_inicial / 1024:.0f} MiB · "
+          f"archivos de contenido en disco: {len(contenidos)}")
+    proceso.terminate()
+
+
+if __name__ == "__main__":
+    mp.set_start_method("fork")
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: latencia de las peticiones admitidas con carga escalonada,
+con y sin ControlAdmisionMiddleware.
+
+Uso:
+    python benchmarks/bench_admision.py --escalones 4 16 64 --segundos 5
+
+Cada escalón lanza N clientes que repiten POST + GET de detalle (la mezcla
+de locustfile.py sin pausas) durante `--segundos`. Se reportan p50/p99 de
+las respuestas 2xx, cuántas fueron 503 (rechazo rápido) y cuántas fallaron
+por otro motivo (p. ej. "database is locked"). Tras un 503 el cliente
+espera 50 ms antes de volver a intentar.
+"""
+
+import argparse
+import logging
+import random
+import threading
+import time
+
+from _comun import fila_aleatoria, imprimir_tabla, preparar_django, usuario_bench
+
+MIDDLEWARE_ADMISION = "planos.middleware.ControlAdmisionMiddleware"
+
+
+def percentil(valores, p):
+    return round(valores[min(len(valores) - 1, int(len(valores) * p))], 1) if valores else "-"
+
+
+def escalon(clientes, segundos, uid):
+    from django.test import Client
+
+    ok, rechazos, fallos = [], [0], [0]
+    # Un solo handler (como un worker real): los clientes comparten compuertas.
+    handler = Client(raise_request_exception=False).handler
+    cerrojo = threading.Lock()
+    fin = time.monotonic() + segundos
+
+    def registrar(t0, r):
+        ms = (time.perf_counter() - t0) * 1000
+        with cerrojo:
+            if r is not None and r.status_code < 300:
+                ok.append(ms)
+            elif r is not None and r.status_code == 503:
+                rechazos[0] += 1
+            else:
+                fallos[0] += 1
+
+    def cliente(semilla):
+        client, rnd = Client(raise_request_exception=False), random.Random(semilla)
+        client.handler = handler
+        while time.monotonic() < fin:
+            fila = fila_aleatoria(rnd, uid)
+            fila["subido_por"] = fila.pop("subido_por_id")
+            t0 = time.perf_counter()
+            r = client.post("/api/planos/", fila, content_type="application/json")
+            registrar(t0, r)
+            if r.status_code == 503:
+                time.sleep(0.05)  # el cliente no reintenta en bucle cerrado
+            if r.status_code == 201:
+                t0 = time.perf_counter()
+                registrar(t0, client.get(f"/api/planos/{r.json()['id']}/"))
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    ok.sort()
+    return {"ok/s": round(len(ok) / segundos, 1), "p50 ms": percentil(ok, 0.5),
+            "p99 ms": percentil(ok, 0.99), "503": rechazos[0], "otros errores": fallos[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--escalones", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--segundos", type=float, default=5)
+    parser.add_argument("--escritura", type=int, default=None,
+                        help="Concurrencia de escritura (por defecto, la de settings).")
+    args = parser.parse_args()
+
+    preparar_django()
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+    from django.conf import settings
+
+    if args.escritura:
+        settings.PLANOS_ADMISION = {**settings.PLANOS_ADMISION, "escritura": {
+            **settings.PLANOS_ADMISION["escritura"], "concurrencia": args.escritura}}
+    uid = usuario_bench().pk
+    base = [m for m in settings.MIDDLEWARE if m != MIDDLEWARE_ADMISION]
+    filas = []
+    for nombre, middleware in (("sin admisión", base),
+                               ("con admisión", [base[0], MIDDLEWARE_ADMISION, *base[1:]])):
+        settings.MIDDLEWARE = middleware
+        for clientes in args.escalones:
+            filas.append({"modo": nombre, "clientes": clientes} | escalon(clientes, args.segundos, uid))
+    imprimir_tabla(filas, ["modo", "clientes", "ok/s", "p50 ms", "p99 ms", "503", "otros errores"])
+
+
+if __name__ == "__main__":
+    main()
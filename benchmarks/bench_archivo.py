@@ -0,0 +1,81 @@
+"""
+Benchmark: consultas sobre la tabla caliente antes y después de archivar.
+
+Uso:
+    python benchmarks/bench_archivo.py --filas 1000000 --archivar 0.9
+
+Siembra N planos, mide unas consultas típicas de la API, mueve a
+`PlanoArchivado` la fracción más antigua (`archivar_planos`) y las vuelve
+a medir. La lista con `?incluir_archivados=true` se mide al final.
+"""
+
+import argparse
+import time
+from datetime import timedelta
+
+from _comun import cronometrar, imprimir_tabla, preparar_django, sembrar_planos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--archivar", type=float, default=0.9,
+                        help="Fracción de planos (los más antiguos) que se archiva.")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    ruta = preparar_django()
+    from django.db import connection
+    from django.test import Client
+    from django.utils import timezone
+    from planos.models import Plano
+    from planos.services import archivo, conteo
+
+    t0 = time.perf_counter()
+    sembrar_planos(args.filas)
+    corte = Plano.objects.order_by("pk").values_list("pk", flat=True)[int(args.filas * args.archivar)]
+    hace_un_anio = timezone.now() - timedelta(days=365)
+    Plano.objects.filter(pk__lt=corte).update(fecha_subida=hace_un_anio)
+    conteo.analizar(connection)
+    print(f"Base: {ruta} · {args.filas} filas sembradas en {time.perf_counter() - t0:.1f}s\n")
+    client = Client()
+
+    def ultima_pagina():
+        n = Plano.objects.count()
+        client.get("/api/planos/", {"limit": 50, "offset": max(0, n - 50), "count": "none"})
+
+    consultas = {
+        "GET lista, count=exact": lambda: client.get(
+            "/api/planos/", {"limit": 50, "count": "exact"}),
+        "GET lista, última página": ultima_pagina,
+        "GET ?q=bomba (FTS)": lambda: client.get(
+            "/api/planos/", {"q": "bomba", "limit": 50, "count": "exact"}),
+        "COUNT area=MECANICA": lambda: Plano.objects.filter(area="MECANICA").count(),
+        "descripcion icontains (sin coincidencias)": lambda: Plano.objects.filter(
+            descripcion__icontains="no existe").exists(),
+    }
+    antes = {nombre: cronometrar(f, args.repeticiones)["mediana_ms"]
+             for nombre, f in consultas.items()}
+
+    t0 = time.perf_counter()
+    movidos = archivo.archivar(timezone.now() - timedelta(days=30))
+    segundos = time.perf_counter() - t0
+    conteo.analizar(connection)
+    print(f"Archivados {movidos} planos en {segundos:.1f}s "
+          f"({movidos / segundos:,.0f} filas/s); quedan {Plano.objects.count()} en la tabla caliente\n")
+
+    filas = []
+    for nombre, f in consultas.items():
+        despues = cronometrar(f, args.repeticiones)["mediana_ms"]
+        filas.append({"consulta": nombre, "antes_ms": antes[nombre], "despues_ms": despues,
+                      "x": round(antes[nombre] / despues, 1) if despues else ""})
+    imprimir_tabla(filas, ["consulta", "antes_ms", "despues_ms", "x"])
+
+    union = cronometrar(lambda: client.get(
+        "/api/planos/", {"limit": 50, "incluir_archivados": "true", "count": "exact"}),
+        args.repeticiones)
+    print(f"\nGET lista con incluir_archivados=true, count=exact: {union['mediana_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
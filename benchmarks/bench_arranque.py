@@ -0,0 +1,120 @@
+"""
+Benchmark: tiempo de arranque de un worker hasta servir el primer
+GET /api/planos/.
+
+Uso:
+    python benchmarks/bench_arranque.py --rondas 15
+    python benchmarks/bench_arranque.py --importtime 25 --perfil api
+
+Cada ronda es un proceso nuevo de Python (como un worker recién escalado)
+sobre una base SQLite ya migrada. Se reporta, por perfil de settings:
+  - setup ms: `import django` + `django.setup()` (apps, modelos, señales).
+  - 1ª petición ms: URLconf, vistas, serializers, middlewares y la consulta.
+  - total ms: el proceso completo, intérprete incluido.
+  - módulos: cantidad de módulos importados al terminar.
+`--importtime N` ejecuta el mismo proceso con `python -X importtime` y
+muestra los N paquetes de primer nivel con mayor tiempo acumulado.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _comun import RAIZ, imprimir_tabla
+
+PERFILES = {
+    "completo": {"DJANGO_SETTINGS_MODULE": "backend_roles.settings"},
+    "completo + PLANOS_APPS_MINIMAS": {"DJANGO_SETTINGS_MODULE": "backend_roles.settings",
+                                      "PLANOS_APPS_MINIMAS": "1"},
+    "api": {"DJANGO_SETTINGS_MODULE": "backend_roles.settings_api"},
+}
+
+HIJO = r"""
+import sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import django
+from django.conf import settings
+settings.DATABASES["default"]["NAME"] = sys.argv[2]
+settings.ALLOWED_HOSTS = ["testserver"]
+django.setup()
+t1 = time.perf_counter()
+from django.test import Client
+r = Client().get("/api/planos/")
+assert r.status_code == 200, r.status_code
+t2 = time.perf_counter()
+print((t1 - t0) * 1000, (t2 - t1) * 1000, len(sys.modules))
+"""
+
+
+def ejecutar(entorno, ruta_db, *opciones):
+    return subprocess.run(
+        [sys.executable, *opciones, "-c", HIJO, str(RAIZ), ruta_db],
+        env={**os.environ, **entorno}, capture_output=True, text=True, check=True)
+
+
+def migrar(ruta_db):
+    script = ("import sys, django; sys.path.insert(0, sys.argv[1]);"
+              "from django.conf import settings;"
+              "settings.DATABASES['default']['NAME'] = sys.argv[2];"
+              "django.setup();"
+              "from django.core.management import call_command;"
+              "call_command('migrate', verbosity=0)")
+    subprocess.run([sys.executable, "-c", script, str(RAIZ), ruta_db], check=True,
+                   env={**os.environ, **PERFILES["completo"]})
+
+
+def importtime(entorno, ruta_db, cuantos):
+    filas = []
+    for linea in ejecutar(entorno, ruta_db, "-X", "importtime").stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        propio, acumulado, modulo = linea[len("import time:"):].split("|")
+        if modulo.startswith("  "):
+            continue  # importado desde otro módulo: ya cuenta en su acumulado
+        filas.append({"módulo": modulo.strip(), "propio ms": round(int(propio) / 1000, 1),
+                      "acumulado ms": round(int(acumulado) / 1000, 1)})
+    filas.sort(key=lambda f: -f["acumulado ms"])
+    imprimir_tabla(filas[:cuantos], ["módulo", "propio ms", "acumulado ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rondas", type=int, default=15)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N")
+    parser.add_argument("--perfil", choices=PERFILES, default="completo",
+                        help="Perfil para --importtime.")
+    args = parser.parse_args()
+
+    ruta_db = os.path.join(tempfile.mkdtemp(prefix="bench_planos_"), "bench.sqlite3")
+    migrar(ruta_db)
+
+    if args.importtime:
+        importtime(PERFILES[args.perfil], ruta_db, args.importtime)
+        return
+
+    # Los perfiles se alternan en cada ronda para repartir el ruido de la máquina.
+    medidas = {nombre: [] for nombre in PERFILES}
+    for _ in range(args.rondas):
+        for nombre, entorno in PERFILES.items():
+            inicio = time.perf_counter()
+            setup, peticion, modulos = map(float, ejecutar(entorno, ruta_db).stdout.split())
+            medidas[nombre].append(
+                (setup, peticion, (time.perf_counter() - inicio) * 1000, modulos))
+
+    filas = []
+    for nombre, valores in medidas.items():
+        setup, peticion, total, modulos = (statistics.median(v[i] for v in valores)
+                                           for i in range(4))
+        filas.append({"perfil": nombre, "setup ms": round(setup, 1),
+                      "1ª petición ms": round(peticion, 1), "total ms": round(total, 1),
+                      "módulos": int(modulos)})
+    imprimir_tabla(filas, ["perfil", "setup ms", "1ª petición ms", "total ms", "módulos"])
+
+
+if __name__ == "__main__":
+    main()
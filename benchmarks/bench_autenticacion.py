@@ -0,0 +1,57 @@
+"""
+Benchmark: CPU por petición con BasicAuthentication vs token en caché.
+
+Uso:
+    python benchmarks/bench_autenticacion.py --ciclos 40
+
+Ejecuta el ciclo CRUD de locustfile.py (POST, GET, PUT, PATCH, DELETE) con
+el cliente de pruebas de Django, autenticando cada petición con
+`Authorization: Basic` o `Authorization: Token`, y mide tiempo de CPU del
+proceso (incluye el hash PBKDF2 de Basic) y de reloj por petición.
+"""
+
+import argparse
+import base64
+import random
+import time
+
+from _comun import ciclo_crud, imprimir_tabla, preparar_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ciclos", type=int, default=40)
+    args = parser.parse_args()
+
+    preparar_django()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    user = get_user_model().objects.create_user(username="bench", password="bench-secreto-123")
+    token = Token.objects.create(user=user)
+    basic = base64.b64encode(b"bench:bench-secreto-123").decode()
+
+    modos = {
+        "basic": {"HTTP_AUTHORIZATION": f"Basic {basic}"},
+        "token": {"HTTP_AUTHORIZATION": f"Token {token.key}"},
+        "anónimo": {},
+    }
+    filas = []
+    for nombre, headers in modos.items():
+        client = Client()
+        rnd = random.Random(1)
+        ciclo_crud(client, user.pk, rnd, **headers)  # calentamiento
+        cpu0, reloj0, peticiones = time.process_time(), time.perf_counter(), 0
+        for _ in range(args.ciclos):
+            peticiones += ciclo_crud(client, user.pk, rnd, **headers)
+        cpu = (time.process_time() - cpu0) * 1000 / peticiones
+        reloj = (time.perf_counter() - reloj0) * 1000 / peticiones
+        filas.append({"auth": nombre, "peticiones": peticiones,
+                      "cpu_ms/pet": round(cpu, 2), "reloj_ms/pet": round(reloj, 2),
+                      "pet/s (1 hilo)": round(1000 / reloj, 1)})
+    imprimir_tabla(filas, ["auth", "peticiones", "cpu_ms/pet", "reloj_ms/pet", "pet/s (1 hilo)"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark: búsqueda de texto completo (FTS5) vs icontains.
+
+Uso:
+    python benchmarks/bench_busqueda.py --filas 1000000
+
+Siembra N planos en una base SQLite temporal y mide la latencia de
+`GET /api/planos/?q=` resuelto con el índice frente a un filtro
+`icontains` sobre titulo/descripcion (primeros 50 resultados).
+"""
+
+import argparse
+import time
+
+from _comun import cronometrar, imprimir_tabla, preparar_django, sembrar_planos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    ruta = preparar_django()
+    from django.db.models import Q
+    from planos.models import Plano
+    from planos.services import busqueda
+
+    t0 = time.perf_counter()
+    sembrar_planos(args.filas)
+    print(f"Base: {ruta} · {args.filas} filas sembradas en {time.perf_counter() - t0:.1f}s\n")
+
+    def fts(q):
+        return lambda: list(busqueda.buscar(Plano.objects.all(), q)[:50])
+
+    def icontains(q):
+        return lambda: list(Plano.objects.filter(
+            Q(titulo__icontains=q) | Q(descripcion__icontains=q))[:50])
+
+    filas = []
+    for etiqueta, q_fts, q_like in [
+        ("término frecuente", "vigas", "vigas"),
+        ("sin tildes", "electrico", "eléctrico"),
+        ("dos términos", "caldera anclaje", "caldera anclaje"),
+        ("sin resultados", "inexistente", "inexistente"),
+    ]:
+        for metodo, funcion in (("fts", fts(q_fts)), ("icontains", icontains(q_like))):
+            filas.append({"consulta": etiqueta, "método": metodo,
+                          **cronometrar(funcion, args.repeticiones)})
+    imprimir_tabla(filas, ["consulta", "método", "mediana_ms", "p95_ms", "max_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: sincronizar un espejo local con la lista completa vs con el feed.
+
+Uso:
+    python benchmarks/bench_cambios.py --filas 100000 --cambios 100
+
+Siembra N planos, hace K cambios (mitad ediciones, mitad bajas) y compara
+lo que cuesta ponerse al día:
+  - lista: GET /api/planos/ completo (lo que hacen hoy los clientes).
+  - feed:  GET /api/planos/cambios/?desde=<cursor> hasta `hay_mas=false`.
+"""
+
+import argparse
+import time
+
+from _comun import imprimir_tabla, preparar_django, sembrar_planos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--cambios", type=int, default=100)
+    args = parser.parse_args()
+
+    ruta = preparar_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client
+    from planos.models import Plano
+
+    settings.PLANOS_CAMBIOS_MARGEN_MS = 0
+    t0 = time.perf_counter()
+    sembrar_planos(args.filas)
+    print(f"Base: {ruta} · {args.filas} filas sembradas en {time.perf_counter() - t0:.1f}s\n")
+    client = Client()
+
+    def feed(cursor=None):
+        enviados, peticiones = 0, 0
+        while True:
+            r = client.get("/api/planos/cambios/", {"desde": cursor} if cursor else {})
+            enviados += len(r.content)
+            peticiones += 1
+            datos = r.json()
+            cursor = datos["cursor"]
+            if not datos["hay_mas"]:
+                return cursor, enviados, peticiones
+
+    filas = []
+    t0 = time.perf_counter()
+    cursor, enviados, peticiones = feed()
+    filas.append({"escenario": "feed, sincronización inicial", "peticiones": peticiones,
+                  "KiB": round(enviados / 1024), "ms": round((time.perf_counter() - t0) * 1000)})
+
+    ids = list(Plano.objects.order_by("?").values_list("pk", flat=True)[:args.cambios])
+    mitad = len(ids) // 2
+    for pk in ids[:mitad]:
+        client.patch(f"/api/planos/{pk}/", {"titulo": "Editado en el benchmark"},
+                     content_type="application/json")
+    for pk in ids[mitad:]:
+        client.delete(f"/api/planos/{pk}/")
+
+    t0 = time.perf_counter()
+    r = client.get("/api/planos/")
+    filas.append({"escenario": f"lista completa tras {len(ids)} cambios", "peticiones": 1,
+                  "KiB": round(len(r.content) / 1024),
+                  "ms": round((time.perf_counter() - t0) * 1000)})
+
+    t0 = time.perf_counter()
+    _, enviados, peticiones = feed(cursor)
+    filas.append({"escenario": f"feed tras {len(ids)} cambios", "peticiones": peticiones,
+                  "KiB": round(enviados / 1024), "ms": round((time.perf_counter() - t0) * 1000)})
+    imprimir_tabla(filas, ["escenario", "peticiones", "KiB", "ms"])
+
+    with connection.cursor() as c:
+        c.execute("EXPLAIN QUERY PLAN SELECT id FROM planos_plano WHERE modificado >= %s "
+                  "AND (modificado > %s OR id > %s) ORDER BY modificado, id LIMIT 501",
+                  ["2020-01-01", "2020-01-01", 0])
+        print("\nPlan de la consulta del feed:", " | ".join(f[-1] for f in c.fetchall()))
+
+
+if __name__ == "__main__":
+    main()
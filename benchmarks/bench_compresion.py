@@ -0,0 +1,78 @@
+"""
+Benchmark: bytes ahorrados y CPU de compresión por respuesta.
+
+Uso:
+    python benchmarks/bench_compresion.py --filas 1000 10000
+
+Para GET /api/planos/ (JSON) y la descarga de una exportación CSV (en
+streaming) mide, por codificación y nivel:
+  - bytes enviados y % ahorrado frente a la respuesta sin comprimir.
+  - cpu ms: tiempo de CPU del compresor por respuesta (métricas del middleware).
+  - pico KiB: memoria máxima asignada (tracemalloc) al consumir la respuesta;
+    en streaming no debería crecer con el tamaño de la exportación.
+"""
+
+import argparse
+import tracemalloc
+
+from _comun import imprimir_tabla, preparar_django, sembrar_planos, usuario_bench
+
+VARIANTES = [("identity", None), ("gzip", 1), ("gzip", 6), ("gzip", 9),
+             ("br", 1), ("br", 4), ("br", 9)]
+
+
+def medir(client, url, codificacion):
+    from planos.services import metricas
+    metricas.reiniciar()
+    tracemalloc.start()
+    r = client.get(url, HTTP_ACCEPT_ENCODING=codificacion)
+    enviados = sum(len(b) for b in r.streaming_content) if r.streaming else len(r.content)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    cpu = metricas.instantanea().get(f"compresion.{codificacion}.cpu_ms", 0)
+    return enviados, cpu, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    ruta_db = preparar_django()
+    from pathlib import Path
+    from django.conf import settings
+    settings.PLANOS_EXPORTACIONES_DIR = Path(ruta_db).parent
+    from django.core.management import call_command
+    from django.test import Client
+    from planos.models import Plano
+    from planos.services import trabajos
+
+    uid = usuario_bench().pk
+    filas = []
+    for n in args.filas:
+        Plano.objects.all().delete()
+        sembrar_planos(n, uids=[uid])
+        trabajo = trabajos.encolar("exportar")
+        call_command("procesar_trabajos", "--una-vez", "--hilos", "1", stdout=open("/dev/null", "w"))
+        urls = {"lista JSON": "/api/planos/",
+                "exportación CSV": f"/api/trabajos/{trabajo.pk}/resultado/"}
+        for nombre, url in urls.items():
+            base = None
+            for codificacion, nivel in VARIANTES:
+                if nivel is not None:
+                    clave = "nivel_gzip" if codificacion == "gzip" else "nivel_brotli"
+                    settings.PLANOS_COMPRESION = {**settings.PLANOS_COMPRESION, clave: nivel}
+                enviados, cpu, pico = medir(Client(), url, codificacion)
+                base = base or enviados
+                filas.append({
+                    "filas": n, "respuesta": nombre,
+                    "codificación": codificacion + (f" {nivel}" if nivel else ""),
+                    "bytes": enviados, "ahorro %": round(100 * (1 - enviados / base), 1),
+                    "cpu ms": round(cpu, 2), "pico KiB": round(pico / 1024),
+                })
+    imprimir_tabla(filas, ["filas", "respuesta", "codificación", "bytes", "ahorro %",
+                           "cpu ms", "pico KiB"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: costo del registro de consultas lentas.
+
+Uso:
+    python benchmarks/bench_consultas_lentas.py --consultas 50000
+
+Mide µs por consulta rápida (búsqueda de un plano por pk con el cursor y
+con el ORM, y GET /api/planos/<id>/) sin el wrapper de
+`planos/services/consultas_lentas.py`, con el wrapper y umbral de 200 ms
+(lo normal: ninguna se registra) y con umbral 0 (todas se registran: huella,
+pila y estadísticas). El logger se silencia para no medir la consola.
+Aparte mide el wrapper solo, alrededor de un `execute` que no hace nada.
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+from _comun import imprimir_tabla, preparar_django, sembrar_planos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--consultas", type=int, default=50_000)
+    parser.add_argument("--peticiones", type=int, default=2_000)
+    parser.add_argument("--rondas", type=int, default=10)
+    args = parser.parse_args()
+
+    preparar_django()
+    from django.db import connection
+    from django.test import Client, override_settings
+    from planos.models import Plano
+    from planos.services import consultas_lentas
+
+    sembrar_planos(1000)
+    ids = list(Plano.objects.values_list("pk", flat=True))
+    logging.getLogger("planos.consultas_lentas").disabled = True
+    client = Client()
+
+    def cursor(n):
+        with connection.cursor() as c:
+            for i in range(n):
+                c.execute('SELECT "titulo" FROM "planos_plano" WHERE "id" = %s', [ids[i % len(ids)]])
+                c.fetchone()
+
+    def orm(n):
+        for i in range(n):
+            Plano.objects.get(pk=ids[i % len(ids)])
+
+    def api(n):
+        for i in range(n):
+            client.get(f"/api/planos/{ids[i % len(ids)]}/")
+
+    casos = [("cursor", cursor, args.consultas), ("ORM", orm, args.consultas // 5),
+             ("GET detalle", api, args.peticiones)]
+    modos = [("sin wrapper", None), ("umbral 200 ms", 200), ("umbral 0 (todas)", 0)]
+
+    def ronda(funcion, n, umbral) -> float:
+        """µs por operación de `n` llamadas con el umbral dado (None: sin wrapper)."""
+        if umbral is None:
+            connection.execute_wrappers.remove(consultas_lentas.registrar)
+        try:
+            with override_settings(PLANOS_CONSULTAS_LENTAS_MS=umbral):
+                t0 = time.perf_counter()
+                funcion(n)
+                return (time.perf_counter() - t0) / n * 1e6
+        finally:
+            if umbral is None:
+                consultas_lentas.instalar(connection)
+            consultas_lentas.reiniciar()
+
+    filas = []
+    for nombre, funcion, n in casos:
+        funcion(min(n, 500))  # calentar
+        # Los modos se alternan en cada ronda para que la deriva de la
+        # máquina no favorezca a ninguno.
+        rondas = {modo: [] for modo, _ in modos}
+        for _ in range(args.rondas):
+            for modo, umbral in modos:
+                rondas[modo].append(ronda(funcion, n // args.rondas, umbral))
+        base = statistics.median(rondas[modos[0][0]])
+        for modo, _ in modos:
+            us = statistics.median(rondas[modo])
+            filas.append({"caso": nombre, "modo": modo, "us_por_op": round(us, 2),
+                          "sobrecarga": f"{(us / base - 1) * 100:+.1f} %"})
+    imprimir_tabla(filas, ["caso", "modo", "us_por_op", "sobrecarga"])
+
+    nada = lambda sql, params, many, context: None  # noqa: E731
+    contexto = {"connection": connection, "cursor": None}
+    sql = 'SELECT "titulo" FROM "planos_plano" WHERE "id" = %s'
+    print()
+    for umbral in (200, 0):
+        n = args.consultas * 4
+        with override_settings(PLANOS_CONSULTAS_LENTAS_MS=umbral):
+            t0 = time.perf_counter()
+            for _ in range(n):
+                nada(sql, (1,), False, contexto)
+            directo = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for _ in range(n):
+                consultas_lentas.registrar(nada, sql, (1,), False, contexto)
+            envuelto = time.perf_counter() - t0
+        print(f"Wrapper solo, umbral {umbral} ms: {(envuelto - directo) / n * 1e9:.0f} ns por consulta")
+
+
+if __name__ == "__main__":
+    main()
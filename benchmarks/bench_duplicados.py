@@ -0,0 +1,83 @@
+"""
+Benchmark: chequeo de duplicados por alta con y sin filtro de Bloom.
+
+Uso:
+    python benchmarks/bench_duplicados.py --filas 1000000 --consultas 10000
+
+Siembra N planos y compara, para planos nuevos que no existen (el caso
+común) y para duplicados reales:
+  - campos: filtro iexact sobre titulo/descripcion/area/subarea (sin huella).
+  - índice: una consulta por alta sobre el índice de `huella`.
+  - bloom: `duplicados.buscar` (solo consulta si el filtro dice "quizá").
+Muestra también lo que cuesta armar el filtro y su tamaño.
+"""
+
+import argparse
+import random
+import time
+
+from _comun import cronometrar, fila_aleatoria, imprimir_tabla, preparar_django, sembrar_planos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--consultas", type=int, default=10_000)
+    parser.add_argument("--consultas-campos", type=int, default=20,
+                        help="el filtro por campos recorre la tabla: pocas repeticiones")
+    args = parser.parse_args()
+
+    ruta = preparar_django()
+    from planos.models import Plano
+    from planos.services import duplicados
+    from planos.services.planos_logic import huella_duplicado
+
+    t0 = time.perf_counter()
+    sembrar_planos(args.filas)
+    print(f"Base: {ruta} · {args.filas} filas sembradas en {time.perf_counter() - t0:.1f}s")
+
+    indice = duplicados.IndiceDuplicados(refresco_ms=60_000)
+    t0 = time.perf_counter()
+    indice.reconstruir()
+    estado = indice.estado()
+    print(f"Filtro: {estado['elementos']} huellas · {estado['bytes'] / 1e6:.2f} MB · "
+          f"{estado['hashes']} hashes · armado en {time.perf_counter() - t0:.2f}s\n")
+
+    rnd = random.Random(7)
+    nuevos = []
+    for i in range(args.consultas):
+        fila = fila_aleatoria(rnd, 1)
+        fila["titulo"] = f"{fila['titulo']} #{i}"  # no existe en la tabla
+        nuevos.append(fila)
+    existentes = list(Plano.objects.order_by("?").values(
+        "titulo", "descripcion", "area", "subarea")[:min(args.consultas, 1000)])
+
+    def por_campos(lote):
+        for d in lote:
+            Plano.objects.filter(**{f"{c}__iexact": d[c] for c in d if c != "subido_por_id"}).exists()
+
+    def por_indice(lote):
+        for d in lote:
+            Plano.objects.filter(huella=huella_duplicado(
+                d["titulo"], d["descripcion"], d["area"], d["subarea"])).exists()
+
+    def por_bloom(lote):
+        for d in lote:
+            indice.buscar(d)
+
+    filas = []
+    for caso, lote in (("nuevo", nuevos), ("duplicado", existentes)):
+        for metodo, funcion, muestra in (("campos", por_campos, lote[:args.consultas_campos]),
+                                         ("índice", por_indice, lote),
+                                         ("bloom", por_bloom, lote)):
+            medida = cronometrar(lambda: funcion(muestra), 3)
+            filas.append({"caso": caso, "método": metodo,
+                          "µs_por_alta": round(medida["mediana_ms"] * 1000 / len(muestra), 1)})
+    imprimir_tabla(filas, ["caso", "método", "µs_por_alta"])
+    estado = indice.estado()
+    print(f"\nFalsos positivos observados: {estado['tasa_fp_observada']:.4f} "
+          f"(estimado {estado['tasa_fp_estimada']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: POST /api/planos/ concurrentes con y sin escritura agrupada.
+
+Uso:
+    python benchmarks/bench_escritura_agrupada.py --hilos 1 4 16 --peticiones 400
+
+Cada hilo simula un cliente de locustfile.py que solo crea planos (la parte
+que escribe). Para cada combinación de hilos y modo se mide:
+  - pet/s: planos creados por segundo (throughput).
+  - p50/p95 ms: latencia de cada POST (incluye la espera del micro-lote).
+  - errores: respuestas distintas de 201 (p. ej. "database is locked").
+  - filas/lote: tamaño medio de los lotes del escritor agrupado.
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from _comun import fila_aleatoria, imprimir_tabla, preparar_django
+
+
+def medir(hilos, peticiones, uid):
+    from django.test import Client
+
+    latencias, errores = [], []
+    cerrojo = threading.Lock()
+    barrera = threading.Barrier(hilos)
+    # Un solo handler (y una sola cadena de middlewares) para todos los
+    # hilos, como en un worker: el control de admisión es del proceso.
+    handler = Client().handler
+
+    def cliente(n, semilla):
+        client, rnd = Client(), random.Random(semilla)
+        client.handler = handler
+        propias, fallos = [], []
+        barrera.wait()
+        for _ in range(n):
+            fila = fila_aleatoria(rnd, uid)
+            fila["subido_por"] = fila.pop("subido_por_id")
+            t0 = time.perf_counter()
+            try:
+                r = client.post("/api/planos/", fila, content_type="application/json")
+                if r.status_code != 201:
+                    fallos.append(r.status_code)
+            except Exception as exc:  # el cliente de pruebas propaga los 500
+                fallos.append(type(exc).__name__)
+            propias.append((time.perf_counter() - t0) * 1000)
+        with cerrojo:
+            latencias.extend(propias)
+            errores.extend(fallos)
+
+    por_hilo = peticiones // hilos
+    t0 = time.perf_counter()
+    trabajadores = [threading.Thread(target=cliente, args=(por_hilo, i)) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    total = time.perf_counter() - t0
+
+    latencias.sort()
+    return {
+        "pet/s": round((len(latencias) - len(errores)) / total, 1),
+        "p50 ms": round(statistics.median(latencias), 2),
+        "p95 ms": round(latencias[int(len(latencias) * 0.95) - 1], 2),
+        "errores": len(errores),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hilos", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--peticiones", type=int, default=400)
+    parser.add_argument("--esperas", type=float, nargs="+", default=[1, 5, 20],
+                        help="Valores de PLANOS_ESCRITURA_MAX_ESPERA_MS a probar.")
+    args = parser.parse_args()
+
+    preparar_django()
+    import logging
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+    from django.conf import settings
+    from planos.services import escritor
+    from _comun import usuario_bench
+
+    uid = usuario_bench().pk
+    admision = settings.PLANOS_ADMISION
+    modos = [("directo", None)] + [(f"agrupado {e:g} ms", e) for e in args.esperas]
+    filas = []
+    for hilos in args.hilos:
+        for nombre, espera in modos:
+            escritor.detener()
+            settings.PLANOS_ESCRITURA_AGRUPADA = espera is not None
+            settings.PLANOS_ESCRITURA_MAX_ESPERA_MS = espera or 0
+            # Lo mismo que hace backend_roles/settings.py al activarla.
+            settings.PLANOS_ADMISION = {**admision, "escritura": {
+                **admision["escritura"], "concurrencia": settings.PLANOS_ESCRITURA_MAX_LOTE,
+                "cola": 2 * settings.PLANOS_ESCRITURA_MAX_LOTE}} if espera is not None else admision
+            fila = {"hilos": hilos, "modo": nombre} | medir(hilos, args.peticiones, uid)
+            e = escritor._escritor
+            fila["filas/lote"] = round(e.filas / e.lotes, 1) if e and e.lotes else "-"
+            filas.append(fila)
+    escritor.detener()
+    imprimir_tabla(filas, ["hilos", "modo", "pet/s", "p50 ms", "p95 ms", "errores", "filas/lote"])
+
+
+if __name__ == "__main__":
+    main()
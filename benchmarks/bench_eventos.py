@@ -0,0 +1,154 @@
+"""
+Benchmark: miles de tableros conectados al canal SSE vs sondeando la lista.
+
+Uso:
+    python benchmarks/bench_eventos.py --suscriptores 1000 5000 --filas 10000
+
+Abre N conexiones a GET /api/planos/eventos/ contra la aplicación ASGI de
+Django en este mismo proceso (sin servidor ni sockets: mide la app, no la
+red) y mide:
+  - memoria (RSS) e hilos del proceso con N suscriptores inactivos;
+  - consultas por segundo mientras nadie escribe (sondeos del publicador);
+  - cuánto tarda un plano nuevo en llegar a todos los suscriptores.
+Como referencia, lo que cuesta hoy un tablero que sondea la lista cada
+`--cada-s` segundos.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from _comun import imprimir_tabla, preparar_django, sembrar_planos
+
+
+def rss_kib() -> int:
+    with open("/proc/self/status") as f:
+        for linea in f:
+            if linea.startswith("VmRSS:"):
+                return int(linea.split()[1])
+    return 0
+
+
+def scope(query: bytes) -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/api/planos/eventos/",
+            "raw_path": b"/api/planos/eventos/", "query_string": query, "root_path": "",
+            "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 40000),
+            "server": ("localhost", 80)}
+
+
+class Tablero:
+    """Cliente SSE mínimo: guarda cuándo vio el marcador esperado."""
+
+    def __init__(self, aplicacion, query: bytes):
+        self.aplicacion = aplicacion
+        self.query = query
+        self.fin = asyncio.Event()
+        self.conectado = asyncio.Event()
+        self.marcador = None
+        self.visto = None
+        self._pedido_enviado = False
+
+    async def receive(self):
+        if not self._pedido_enviado:
+            self._pedido_enviado = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.fin.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, mensaje):
+        if mensaje["type"] == "http.response.start":
+            assert mensaje["status"] == 200, mensaje
+            self.conectado.set()
+        elif self.marcador and self.marcador in mensaje.get("body", b"") and self.visto is None:
+            self.visto = time.perf_counter()
+
+    async def correr(self):
+        await self.aplicacion(scope(self.query), self.receive, self.send)
+
+
+async def escenario(aplicacion, n: int, crear_plano, publicador):
+    base_rss, base_hilos = rss_kib(), threading.active_count()
+    tableros = [Tablero(aplicacion, b"area=MECANICA") for _ in range(n)]
+    t0 = time.perf_counter()
+    tareas = [asyncio.ensure_future(t.correr()) for t in tableros]
+    await asyncio.gather(*(t.conectado.wait() for t in tableros))
+    while publicador.suscriptores < n:
+        await asyncio.sleep(0.01)
+    conexion_ms = (time.perf_counter() - t0) * 1000
+
+    sondeos = publicador.sondeos
+    await asyncio.sleep(2)
+    sondeos_s = (publicador.sondeos - sondeos) / 2
+    rss, hilos = rss_kib(), threading.active_count()
+
+    marcador = f"Plano SSE {n}".encode()
+    for t in tableros:
+        t.marcador = marcador
+    inicio = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(None, crear_plano, marcador.decode())
+    while any(t.visto is None for t in tableros) and time.perf_counter() - inicio < 30:
+        await asyncio.sleep(0.005)
+    latencias = sorted((t.visto - inicio) * 1000 for t in tableros if t.visto)
+
+    for t in tableros:
+        t.fin.set()
+    await asyncio.gather(*tareas, return_exceptions=True)
+    return {"suscriptores": n, "conexion_ms": round(conexion_ms),
+            "KiB_por_suscriptor": round((rss - base_rss) / n, 1),
+            "hilos_extra": hilos - base_hilos, "consultas_s": round(sondeos_s * 2, 1),
+            "entregados": len(latencias),
+            "p50_ms": round(latencias[len(latencias) // 2]) if latencias else "-",
+            "max_ms": round(latencias[-1]) if latencias else "-"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--suscriptores", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--filas", type=int, default=10_000)
+    parser.add_argument("--cada-s", type=float, default=5.0)
+    args = parser.parse_args()
+
+    ruta = preparar_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client
+    from planos.models import Plano
+    from planos.services import eventos
+    from _comun import usuario_bench
+
+    settings.PLANOS_CAMBIOS_MARGEN_MS = 0
+    settings.PLANOS_EVENTOS_INTERVALO_MS = 100
+    sembrar_planos(args.filas)
+    uid = usuario_bench().pk
+    print(f"Base: {ruta} · {args.filas} filas · publicador cada "
+          f"{settings.PLANOS_EVENTOS_INTERVALO_MS} ms\n")
+
+    def crear_plano(titulo):
+        Plano.objects.create(titulo=titulo, descripcion="Creado durante el benchmark SSE",
+                             subido_por_id=uid, area="MECANICA", subarea="Zona-1")
+        connection.close()
+
+    from backend_roles.asgi import application as aplicacion
+    publicador = eventos.publicador()
+    asyncio.run(escenario(aplicacion, 10, crear_plano, publicador))  # calentamiento
+    filas = [asyncio.run(escenario(aplicacion, n, crear_plano, publicador))
+             for n in args.suscriptores]
+    imprimir_tabla(filas, ["suscriptores", "conexion_ms", "KiB_por_suscriptor", "hilos_extra",
+                           "consultas_s", "entregados", "p50_ms", "max_ms"])
+
+    client = Client()
+    t0 = time.perf_counter()
+    for _ in range(20):
+        client.get("/api/planos/", {"limit": 50, "area": "MECANICA"})
+    lista_ms = (time.perf_counter() - t0) * 1000 / 20
+    print(f"\nReferencia, sondeo de la lista (GET /api/planos/?limit=50): {lista_ms:.1f} ms "
+          f"por petición.")
+    for n in args.suscriptores:
+        print(f"  {n} tableros cada {args.cada_s:g}s → {n / args.cada_s:.0f} peticiones/s, "
+              f"~{n / args.cada_s * lista_ms / 1000:.1f} s de CPU por segundo")
+
+
+if __name__ == "__main__":
+    main()
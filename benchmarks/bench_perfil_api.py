@@ -0,0 +1,82 @@
+"""
+Benchmark: sobrecarga por petición del perfil completo vs el perfil solo-API.
+
+Uso:
+    python benchmarks/bench_perfil_api.py --peticiones 2000
+
+Lanza un subproceso por perfil (`backend_roles.settings` y
+`backend_roles.settings_api`) y mide, con token, `GET /api/planos/<id>/`
+y `GET /api/planos/` (20 filas): µs por petición, consultas SQL por
+petición y cabeceras Set-Cookie emitidas.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from _comun import imprimir_tabla
+
+PERFILES = ["backend_roles.settings", "backend_roles.settings_api"]
+
+
+def medir(peticiones: int) -> dict:
+    from _comun import preparar_django, sembrar_planos, usuario_bench
+    import time
+    preparar_django()
+    from django.db import connection
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+    from planos.models import Plano
+
+    user = usuario_bench()
+    sembrar_planos(20, uids=[user.pk])
+    token = Token.objects.create(user=user)
+    headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+    client = Client()
+    resultado = {}
+    for nombre, url in (("detalle", f"/api/planos/{Plano.objects.first().pk}/"),
+                        ("lista", "/api/planos/")):
+        client.get(url, **headers)
+        consultas = []
+        # request_started vacía connection.queries: se cuentan con un wrapper.
+        with connection.execute_wrapper(lambda ejecutar, sql, *a: consultas.append(sql) or ejecutar(sql, *a)):
+            r = client.get(url, **headers)
+        rondas = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            for _ in range(peticiones // 5):
+                client.get(url, **headers)
+            rondas.append((time.perf_counter() - t0) * 1e6 / (peticiones // 5))
+        resultado[nombre] = {
+            "us/pet (mejor de 5)": round(min(rondas), 1),
+            "consultas": len(consultas),
+            "cookies": len(r.cookies),
+        }
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--medir", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.peticiones)))
+        return
+
+    filas = []
+    for perfil in PERFILES:
+        salida = subprocess.run(
+            [sys.executable, __file__, "--medir", "--peticiones", str(args.peticiones)],
+            env=os.environ | {"DJANGO_SETTINGS_MODULE": perfil},
+            capture_output=True, text=True, check=True).stdout
+        for endpoint, datos in json.loads(salida.splitlines()[-1]).items():
+            filas.append({"perfil": perfil, "endpoint": endpoint, **datos})
+    imprimir_tabla(filas, ["perfil", "endpoint", "us/pet (mejor de 5)", "consultas", "cookies"])
+
+
+if __name__ == "__main__":
+    main()
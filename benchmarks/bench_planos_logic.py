@@ -0,0 +1,96 @@
+"""
+Benchmark: planos_logic con dicts vs PlanoRecord (__slots__).
+
+Uso:
+    python benchmarks/bench_planos_logic.py --filas 1000000
+
+Siembra N filas en una base SQLite en memoria (sin Django) y las lee de dos
+formas: como dicts (lo que daría `values()`) y como `PlanoRecord` desde las
+tuplas de `values_list(*COLUMNAS_REGISTRO)`. Mide bytes por fila
+(tracemalloc, incluidos los textos) y el tiempo de cada función de análisis.
+"""
+
+import argparse
+import gc
+import random
+import sqlite3
+import time
+import tracemalloc
+
+from _comun import cronometrar, fila_aleatoria, imprimir_tabla
+
+from planos.services.planos_logic import (
+    COLUMNAS_REGISTRO,
+    PlanoRecord,
+    clasificar_planos,
+    contar_planos_por_usuario,
+    detectar_duplicados,
+    resumen_por_usuario,
+    resumen_por_usuario_por_area,
+)
+
+CLAVES_DICT = ("titulo", "descripcion", "subido_por", "area", "subarea")
+
+
+def sembrar(n: int) -> sqlite3.Connection:
+    con = sqlite3.connect(":memory:")
+    con.execute(f"CREATE TABLE plano ({', '.join(COLUMNAS_REGISTRO)})")
+    rnd = random.Random(42)
+    con.executemany(
+        "INSERT INTO plano VALUES (?, ?, ?, ?, ?)",
+        (tuple(fila_aleatoria(rnd, rnd.randint(1, 50))[c] for c in COLUMNAS_REGISTRO)
+         for _ in range(n)))
+    return con
+
+
+def leer(con, construir, limite=-1):
+    cursor = con.execute(
+        f"SELECT {', '.join(COLUMNAS_REGISTRO)} FROM plano LIMIT ?", (limite,))
+    return [construir(f) for f in cursor]
+
+
+def bytes_por_fila(con, construir, muestra: int) -> int:
+    """tracemalloc sobre una muestra (trazar 1M objetos distorsiona los tiempos)."""
+    gc.collect()
+    tracemalloc.start()
+    lista = leer(con, construir, muestra)
+    usados, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(usados / len(lista))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--muestra", type=int, default=100_000,
+                        help="filas usadas para medir la memoria")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    con = sembrar(args.filas)
+    print(f"{args.filas} filas sembradas en {time.perf_counter() - t0:.1f}s\n")
+
+    filas = []
+    for nombre, construir in (("dict", lambda f: dict(zip(CLAVES_DICT, f))),
+                              ("PlanoRecord", PlanoRecord.desde_fila)):
+        t0 = time.perf_counter()
+        planos = leer(con, construir)
+        filas.append({"forma": nombre, "función": "lectura + construcción",
+                      "mediana_ms": round((time.perf_counter() - t0) * 1000, 1),
+                      "bytes_fila": bytes_por_fila(con, construir, args.muestra)})
+        for etiqueta, funcion in (
+                ("contar_planos_por_usuario", lambda: contar_planos_por_usuario(planos, 7)),
+                ("clasificar_planos", lambda: clasificar_planos(planos)),
+                ("resumen_por_usuario", lambda: resumen_por_usuario(planos)),
+                ("resumen_por_usuario_por_area", lambda: resumen_por_usuario_por_area(planos)),
+                ("detectar_duplicados", lambda: detectar_duplicados(planos))):
+            medida = cronometrar(funcion, args.repeticiones)
+            filas.append({"forma": nombre, "función": etiqueta,
+                          "mediana_ms": medida["mediana_ms"]})
+        del planos
+    imprimir_tabla(filas, ["función", "forma", "mediana_ms", "bytes_fila"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: lecturas de la API de planos con 0, 1, 2... réplicas SQLite.
+
+Uso:
+    python benchmarks/bench_replicas.py --filas 100000 --replicas 0 1 2 4 --lectores 4 --lote 20000
+
+Para cada cantidad de réplicas arranca `--lectores` procesos que piden
+GET /api/planos/?limit=50&offset=<azar> durante `--segundos`, un proceso
+escritor que actualiza lotes de `--lote` planos sin pausa y un proceso que
+refresca las réplicas cada `--refresco` segundos (refrescar_replicas).
+Informa lecturas por segundo, latencias y escrituras por segundo.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import statistics
+import time
+
+from _comun import imprimir_tabla, preparar_django, sembrar_planos
+
+
+def lector(fin: float, salida) -> None:
+    from django.db import connections
+    from django.test import Client
+    client, rnd, tiempos = Client(), random.Random(os.getpid()), []
+    while time.time() < fin:
+        t0 = time.perf_counter()
+        r = client.get("/api/planos/", {"limit": 50, "offset": rnd.randrange(0, 90_000),
+                                        "count": "none"})
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200, r.status_code
+    connections.close_all()
+    salida.put(tiempos)
+
+
+def escritor(fin: float, lote: int, salida) -> None:
+    from django.db import connections, transaction
+    from planos.models import Plano
+    rnd, ultimo, hechas = random.Random(7), Plano.objects.order_by("-pk").first().pk, 0
+    while time.time() < fin:
+        inicio = rnd.randrange(1, max(2, ultimo - lote))
+        with transaction.atomic():
+            Plano.objects.filter(pk__gte=inicio, pk__lt=inicio + lote).update(
+                titulo=f"Editado {hechas}")
+        hechas += 1
+    connections.close_all()
+    salida.put(hechas)
+
+
+def refrescador(fin: float, cada: float, aliases) -> None:
+    from django.db import connections
+    from planos.services import replicas
+    while time.time() < fin:
+        for alias in aliases:
+            replicas.refrescar(alias)
+        time.sleep(cada)
+    connections.close_all()
+
+
+def escenario(aliases, args) -> dict:
+    from django.conf import settings
+    from django.db import connections
+    from planos.services import replicas
+
+    settings.PLANOS_REPLICAS = aliases
+    for alias in aliases:
+        replicas.refrescar(alias)
+    connections.close_all()  # nada abierto al hacer fork
+
+    salida = mp.Queue()
+    fin = time.time() + args.segundos
+    procesos = [mp.Process(target=lector, args=(fin, salida)) for _ in range(args.lectores)]
+    procesos.append(mp.Process(target=escritor, args=(fin, args.lote, salida)))
+    if aliases:
+        procesos.append(mp.Process(target=refrescador, args=(fin, args.refresco, aliases)))
+    for p in procesos:
+        p.start()
+    resultados = [salida.get() for _ in range(args.lectores + 1)]
+    for p in procesos:
+        p.join()
+
+    tiempos = sorted(t for r in resultados if isinstance(r, list) for t in r)
+    escrituras = next(r for r in resultados if isinstance(r, int))
+    return {"replicas": len(aliases), "lecturas_s": round(len(tiempos) / args.segundos, 1),
+            "p50_ms": round(statistics.median(tiempos), 1),
+            "p95_ms": round(tiempos[int(len(tiempos) * 0.95) - 1], 1),
+            "max_ms": round(tiempos[-1], 1),
+            "lotes_escritos_s": round(escrituras / args.segundos, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--replicas", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--lectores", type=int, default=4)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--lote", type=int, default=20_000)
+    parser.add_argument("--refresco", type=float, default=2.0)
+    args = parser.parse_args()
+
+    # Los alias tienen que existir antes de django.setup().
+    os.environ["PLANOS_REPLICAS"] = str(max(args.replicas))
+    ruta = preparar_django()
+    from django.conf import settings
+    for alias in settings.PLANOS_REPLICAS:
+        settings.DATABASES[alias]["NAME"] = ruta.replace("bench.sqlite3", f"{alias}.sqlite3")
+
+    sembrar_planos(args.filas)
+    print(f"Base: {ruta} · {args.filas} filas · {args.lectores} lectores · "
+          f"escritor con lotes de {args.lote} · {os.cpu_count()} CPU\n")
+    todas = list(settings.PLANOS_REPLICAS)
+    filas = [escenario(todas[:n], args) for n in args.replicas]
+    imprimir_tabla(filas, ["replicas", "lecturas_s", "p50_ms", "p95_ms", "max_ms",
+                           "lotes_escritos_s"])
+
+
+if __name__ == "__main__":
+    mp.set_start_method("fork")
+    main()
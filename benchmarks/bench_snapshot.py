@@ -0,0 +1,120 @@
+"""
+Benchmark: reportes sobre la base vs sobre el snapshot columnar (mmap).
+
+Uso:
+    python benchmarks/bench_snapshot.py --filas 1000000 --procesos 4
+
+Siembra N planos, escribe el snapshot y mide:
+  - el resumen por usuario y por Área · Subárea leyendo la base
+    (`resumenes.calcular_con_planos_logic`), leyendo el snapshot como
+    `PlanoRecord` y contando códigos de diccionario sobre el snapshot.
+  - memoria de K procesos que recorren el mismo snapshot a la vez
+    (/proc/self/smaps_rollup): Rss cuenta las páginas compartidas en cada
+    proceso; Pss las reparte entre ellos; Private es lo propio.
+"""
+
+import argparse
+import multiprocessing
+import time
+import zlib
+
+from _comun import imprimir_tabla, preparar_django, sembrar_planos
+
+
+def memoria_proceso() -> dict:
+    campos = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) == 3 and partes[2] == "kB":
+                campos[partes[0].rstrip(":")] = int(partes[1])
+    return campos
+
+
+def lector(ruta, barrera, cola):
+    # Proceso de reporte sin Django: solo el lector del snapshot.
+    from planos.services.snapshot import Snapshot
+    with Snapshot(ruta) as snap:
+        t0 = time.perf_counter()
+        for nombre in snap.nombres:
+            col = snap.columna(nombre)
+            vistas = ((col.offsets, col.datos) if hasattr(col, "datos")
+                      else (col.codigos,) if hasattr(col, "codigos") else (col,))
+            for vista in vistas:
+                zlib.crc32(vista)  # recorre todas las páginas sin copiarlas
+        del col, vistas
+        segundos = time.perf_counter() - t0
+        barrera.wait()  # todos los procesos tienen el archivo mapeado a la vez
+        cola.put({"segundos": segundos, **memoria_proceso()})
+        barrera.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    ruta_db = preparar_django()
+    from pathlib import Path
+    from planos.models import Plano
+    from planos.services import resumenes, snapshot
+    from planos.services.planos_logic import resumen_por_usuario, resumen_por_usuario_por_area
+
+    t0 = time.perf_counter()
+    sembrar_planos(args.filas)
+    print(f"Base: {ruta_db} · {args.filas} filas sembradas en {time.perf_counter() - t0:.1f}s")
+
+    ruta = Path(ruta_db).parent / "planos.snapshot"
+    t0 = time.perf_counter()
+    snapshot.escribir(ruta)
+    print(f"Snapshot: {ruta.stat().st_size / 1e6:.1f} MB en {time.perf_counter() - t0:.1f}s "
+          f"(base: {Path(ruta_db).stat().st_size / 1e6:.1f} MB)\n")
+
+    def desde_base():
+        resumenes.calcular_con_planos_logic(Plano.objects.all())
+
+    def desde_registros():
+        with snapshot.Snapshot(ruta) as snap:
+            regs = snap.registros()
+            resumen_por_usuario(regs)
+            resumen_por_usuario_por_area(regs)
+
+    def por_codigos():
+        with snapshot.Snapshot(ruta) as snap:
+            snap.resumen_por_usuario_por_area()
+
+    filas = []
+    for nombre, funcion in (("base (values_list + planos_logic)", desde_base),
+                            ("snapshot → PlanoRecord + planos_logic", desde_registros),
+                            ("snapshot, códigos de diccionario (solo por área)", por_codigos)):
+        tiempos = []
+        for _ in range(args.repeticiones):
+            t0 = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - t0) * 1000)
+        filas.append({"reporte": nombre, "mediana_ms": round(sorted(tiempos)[len(tiempos) // 2])})
+    imprimir_tabla(filas, ["reporte", "mediana_ms"])
+
+    ctx = multiprocessing.get_context("spawn")
+    barrera, cola = ctx.Barrier(args.procesos), ctx.Queue()
+    procesos = [ctx.Process(target=lector, args=(str(ruta), barrera, cola))
+                for _ in range(args.procesos)]
+    for p in procesos:
+        p.start()
+    medidas = [cola.get() for _ in procesos]
+    for p in procesos:
+        p.join()
+
+    print(f"\n{args.procesos} procesos recorriendo el mismo snapshot:")
+    imprimir_tabla([{"proceso": i, "recorrido_ms": round(m["segundos"] * 1000),
+                     "Rss_MB": round(m["Rss"] / 1024, 1),
+                     "Pss_MB": round(m["Pss"] / 1024, 1),
+                     "Private_MB": round((m["Private_Clean"] + m["Private_Dirty"]) / 1024, 1)}
+                    for i, m in enumerate(medidas)],
+                   ["proceso", "recorrido_ms", "Rss_MB", "Pss_MB", "Private_MB"])
+
+
+if __name__ == "__main__":
+    main()
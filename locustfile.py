@@ -146,6 +146,7 @@
 
 
 from locust import HttpUser, task, between, SequentialTaskSet, events
+import os
 import random
 import time
 import requests
@@ -311,11 +312,20 @@ class CrudPlanos(SequentialTaskSet):
 
 
 class WebsiteUser(HttpUser):
-    """Usuario de carga que ejecuta el flujo CRUD."""
+    """
+    Usuario de carga que ejecuta el flujo CRUD.
+    Con PLANOS_TOKEN=<token> (POST /api/token/) cada petición se autentica
+    con `Authorization: Token`.
+    """
     tasks = [CrudPlanos]
     wait_time = between(1, 3)
     host = "http://127.0.0.1:8000"
 
+    def on_start(self):
+        token = os.environ.get("PLANOS_TOKEN")
+        if token:
+            self.client.headers["Authorization"] = f"Token {token}"
+
 
 # ============================================================================
 # LIMPIEZA AUTOMÁTICA OPTIMIZADA AL FINALIZAR LOCUST
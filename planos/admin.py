@@ -0,0 +1,110 @@
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+
+from .models import Plano
+from .paginacion import PaginadorEstimado
+from .services import busqueda, cambios, operaciones_masivas, resumenes
+from .services.conteo import contar
+from usuarios.cache import CacheLRU
+
+# Opciones de los filtros laterales: SELECT DISTINCT sobre un índice, una
+# vez cada pocos minutos y no en cada carga de la lista.
+_opciones_filtro = CacheLRU(ttl=300, maximo=16)
+MAX_OPCIONES_FILTRO = 200
+
+
+class ValorIndexadoFilter(admin.SimpleListFilter):
+    """Filtro por igualdad sobre una columna indexada (area, subarea)."""
+    campo = None
+
+    def lookups(self, request, model_admin):
+        opciones = _opciones_filtro.obtener(self.campo)
+        if opciones is None:
+            opciones = list(Plano.objects.order_by(self.campo).values_list(
+                self.campo, flat=True).distinct()[:MAX_OPCIONES_FILTRO])
+            _opciones_filtro.guardar(self.campo, opciones)
+        return [(valor, valor) for valor in opciones]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.campo: self.value()})
+        return queryset
+
+
+class AreaFilter(ValorIndexadoFilter):
+    title = "área"
+    parameter_name = campo = "area"
+
+
+class SubareaFilter(ValorIndexadoFilter):
+    title = "subárea"
+    parameter_name = campo = "subarea"
+
+
+@admin.register(Plano)
+class PlanoAdmin(admin.ModelAdmin):
+    list_display = ("id", "titulo", "area", "subarea", "subido_por", "fecha_subida")
+    list_select_related = ("subido_por",)
+    list_filter = (AreaFilter, SubareaFilter)
+    search_fields = ("titulo", "descripcion")
+    search_help_text = "Búsqueda de texto completo (sin tildes) en título y descripción."
+    raw_id_fields = ("subido_por",)
+    ordering = ("-id",)
+    list_per_page = 50
+    # Sin el segundo COUNT(*) de "N resultados (M en total)".
+    show_full_result_count = False
+    paginator = PaginadorEstimado
+    actions = ["eliminar_por_lotes", "reasignar_a_mi"]
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return busqueda.buscar(queryset, search_term), False
+
+    # Las ediciones desde el admin también mantienen los resúmenes.
+    def save_model(self, request, obj, form, change):
+        if change:
+            antes = resumenes.fila_de(Plano.objects.get(pk=obj.pk))
+            super().save_model(request, obj, form, change)
+            resumenes.mover([antes], [resumenes.fila_de(obj)])
+        else:
+            super().save_model(request, obj, form, change)
+            resumenes.sumar([resumenes.fila_de(obj)])
+
+    def delete_model(self, request, obj):
+        fila = resumenes.fila_de(obj)
+        cambios.registrar_bajas([obj.pk])
+        super().delete_model(request, obj)
+        resumenes.restar([fila])
+
+    def get_actions(self, request):
+        # La acción estándar hace len(queryset) y un LogEntry por plano.
+        acciones = super().get_actions(request)
+        acciones.pop("delete_selected", None)
+        return acciones
+
+    @admin.action(permissions=["delete"], description="Eliminar los planos seleccionados (por lotes)")
+    def eliminar_por_lotes(self, request, queryset):
+        if request.POST.get("post"):
+            n = operaciones_masivas.eliminar_masivo(queryset)
+            self.message_user(request, f"{n} plano(s) eliminado(s).", messages.SUCCESS)
+            return None
+
+        n, exacto = contar(queryset)
+        contexto = {
+            **self.admin_site.each_context(request),
+            "title": "¿Eliminar los planos seleccionados?",
+            "opts": self.opts,
+            "cantidad": n if exacto else f"unos {n}",
+            "select_across": request.POST.get("select_across") == "1",
+            "seleccionados": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+        }
+        request.current_app = self.admin_site.name
+        return TemplateResponse(request, "admin/planos/plano/eliminar_por_lotes.html", contexto)
+
+    @admin.action(permissions=["change"], description="Reasignar los planos seleccionados a mi usuario")
+    def reasignar_a_mi(self, request, queryset):
+        n = operaciones_masivas.actualizar_masivo(queryset, {"subido_por": request.user})
+        self.message_user(request, f"{n} plano(s) reasignado(s).", messages.SUCCESS)
@@ -4,3 +4,35 @@ from django.apps import AppConfig
 class PlanosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'planos'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate, post_save, pre_delete
+        from django.test.signals import setting_changed
+        from .services import consultas_lentas
+        post_migrate.connect(_reparar_indice_texto, sender=self)
+        post_save.connect(_registrar_huella, sender="planos.Plano")
+        pre_delete.connect(_lapidas_del_usuario, sender=settings.AUTH_USER_MODEL)
+        consultas_lentas.configurar()
+        connection_created.connect(consultas_lentas.instalar)
+        setting_changed.connect(consultas_lentas.configurar)
+
+
+def _reparar_indice_texto(using, **kwargs):
+    from django.db import connections
+    from .services.busqueda import asegurar_triggers
+    asegurar_triggers(connections[using])
+
+
+def _registrar_huella(instance, **kwargs):
+    from .services import duplicados
+    duplicados.registrar([instance.huella])
+
+
+def _lapidas_del_usuario(instance, **kwargs):
+    # Sus planos se borran en cascada: el feed de cambios debe informarlo.
+    from .models import Plano
+    from .services import cambios
+    cambios.registrar_bajas(
+        Plano.objects.filter(subido_por=instance).values_list("pk", flat=True))
@@ -0,0 +1,73 @@
+# 📡 Canal SSE servido directamente por ASGI
+# Bajo el ASGIHandler de Django cada petición lleva un hilo propio para el
+# middleware síncrono, y ese hilo vive lo que dura la respuesta: una conexión
+# SSE inactiva seguiría ocupando un hilo. `con_canal_sse` atiende
+# /api/planos/eventos/ antes de Django (sin middleware, como la vista con
+# AllowAny) y pasa todo lo demás a la aplicación envuelta.
+#
+#     application = con_canal_sse(get_asgi_application())
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from .services import cambios, eventos
+
+RUTA = "/api/planos/eventos/"
+
+CABECERAS_SSE = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),  # que el proxy no acumule los eventos
+]
+
+
+def con_canal_sse(aplicacion, ruta: str = RUTA):
+    async def app(scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == ruta:
+            return await canal_sse(scope, receive, send)
+        return await aplicacion(scope, receive, send)
+    return app
+
+
+async def _responder(send, estado: int, datos: dict, cabeceras=()) -> None:
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode()
+    await send({"type": "http.response.start", "status": estado,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(cuerpo)).encode()), *cabeceras]})
+    await send({"type": "http.response.body", "body": cuerpo})
+
+
+async def canal_sse(scope, receive, send) -> None:
+    """Mismo contrato que `views.eventos_planos`, pero sin hilo por conexión."""
+    if scope["method"] != "GET":
+        return await _responder(send, 405, {"detail": f'Método "{scope["method"]}" no permitido.'},
+                                [(b"allow", b"GET")])
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    cabeceras = dict(scope.get("headers", []))
+    desde = cabeceras.get(b"last-event-id", b"").decode("latin-1") or query.get("desde", [""])[0]
+    try:
+        cursor = cambios.decodificar(desde) if desde else None
+    except cambios.CursorInvalido as e:
+        return await _responder(send, 400, {"desde": str(e)})
+    filtro = eventos.Filtro.de(query.get("area", [""])[0], query.get("subarea", [""])[0])
+
+    await send({"type": "http.response.start", "status": 200, "headers": CABECERAS_SSE})
+    flujo = eventos.transmitir(cursor, filtro)
+
+    async def enviar():
+        async for bloque in flujo:
+            await send({"type": "http.response.body", "body": bloque, "more_body": True})
+
+    async def esperar_desconexion():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    tareas = [asyncio.ensure_future(enviar()), asyncio.ensure_future(esperar_desconexion())]
+    try:
+        await asyncio.wait(tareas, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        await flujo.aclose()
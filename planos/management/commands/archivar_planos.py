@@ -0,0 +1,44 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from planos.services import archivo
+
+
+class Command(BaseCommand):
+    help = "Mueve los planos antiguos a la tabla de archivo (por lotes; se puede cortar y reanudar)"
+
+    def add_arguments(self, parser):
+        corte = parser.add_mutually_exclusive_group(required=True)
+        corte.add_argument("--antes-de", help="Fecha de corte (AAAA-MM-DD o ISO 8601).")
+        corte.add_argument("--dias", type=int, help="Archiva lo subido hace más de N días.")
+        parser.add_argument("--lote", type=int, default=archivo.TAMANO_LOTE,
+                            help="Planos por transacción.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Solo cuenta cuántos planos se archivarían.")
+
+    def handle(self, *args, **options):
+        if options["dias"] is not None:
+            corte = timezone.now() - timedelta(days=options["dias"])
+        else:
+            texto = options["antes_de"]
+            corte = parse_datetime(texto)
+            if corte is None and parse_date(texto) is not None:
+                corte = datetime.combine(parse_date(texto), time.min)
+            if corte is None:
+                raise CommandError("Fecha inválida (use AAAA-MM-DD o ISO 8601).")
+            if timezone.is_naive(corte):
+                corte = timezone.make_aware(corte)
+
+        if options["dry_run"]:
+            n = archivo.pendientes(corte).count()
+            self.stdout.write(f"🔎 {n} plano(s) anteriores a {corte:%Y-%m-%d %H:%M} por archivar.")
+            return
+
+        total = archivo.archivar(
+            corte, max(1, options["lote"]),
+            al_avanzar=lambda n: self.stdout.write(f"  … {n} archivado(s)"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} plano(s) anteriores a {corte:%Y-%m-%d %H:%M} archivado(s)."))
@@ -0,0 +1,96 @@
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from planos.services import trabajos
+
+
+class Command(BaseCommand):
+    help = "Ejecuta los trabajos en cola (limpieza, exportar, reporte, relleno)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hilos", type=int, default=2,
+                            help="Trabajos simultáneos en este proceso.")
+        parser.add_argument("--intervalo", type=float, default=1.0,
+                            help="Segundos entre consultas cuando la cola está vacía.")
+        parser.add_argument("--una-vez", action="store_true",
+                            help="Procesa lo pendiente y termina.")
+        parser.add_argument("--liberar-cada", type=float, default=60.0,
+                            help="Segundos entre búsquedas de trabajos abandonados.")
+
+    def handle(self, *args, **options):
+        hilos = max(1, options["hilos"])
+        intervalo = options["intervalo"]
+        trabajador = trabajos.nombre_trabajador()
+        detener = threading.Event()
+
+        signal.signal(signal.SIGTERM, lambda *_: detener.set())
+        # No solo al arrancar: el trabajo de otro trabajador que murió no debe
+        # esperar a que alguien reinicie.
+        proxima_liberacion = 0.0
+
+        def liberar():
+            nonlocal proxima_liberacion
+            if time.monotonic() < proxima_liberacion:
+                return
+            proxima_liberacion = time.monotonic() + options["liberar_cada"]
+            liberados = trabajos.liberar_abandonados()
+            if liberados:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ {liberados} trabajo(s) abandonado(s) devuelto(s) a la cola."))
+
+        liberar()
+        self.stdout.write(f"👷 Trabajador {trabajador} con {hilos} hilo(s).")
+
+        if hilos == 1:
+            # Sin pool: útil con --una-vez y en pruebas.
+            while not detener.is_set():
+                liberar()
+                trabajo = trabajos.procesar_uno(trabajador)
+                if trabajo:
+                    self._informar(trabajo)
+                elif options["una_vez"]:
+                    break
+                else:
+                    detener.wait(intervalo)
+            return
+
+        en_curso = set()
+        cerrojo = threading.Lock()
+
+        def ejecutar(trabajo):
+            try:
+                self._informar(trabajos.ejecutar(trabajo))
+            finally:
+                connections.close_all()
+                with cerrojo:
+                    en_curso.discard(trabajo.pk)
+
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="trabajo") as pool:
+            try:
+                while not detener.is_set():
+                    liberar()
+                    with cerrojo:
+                        libres = hilos - len(en_curso)
+                    trabajo = trabajos.reclamar(trabajador) if libres else None
+                    if trabajo:
+                        with cerrojo:
+                            en_curso.add(trabajo.pk)
+                        pool.submit(ejecutar, trabajo)
+                        continue
+                    with cerrojo:
+                        vacio = not en_curso
+                    if options["una_vez"] and vacio:
+                        break
+                    detener.wait(intervalo if libres else 0.1)
+            except KeyboardInterrupt:
+                self.stdout.write("⏹️ Deteniendo: se esperan los trabajos en curso…")
+
+    def _informar(self, trabajo):
+        estilo = self.style.SUCCESS if trabajo.estado == trabajo.COMPLETADO else self.style.WARNING
+        self.stdout.write(estilo(
+            f"{time.strftime('%H:%M:%S')} {trabajo} intentos={trabajo.intentos}"))
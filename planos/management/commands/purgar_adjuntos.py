@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from planos.services import adjuntos
+
+
+class Command(BaseCommand):
+    help = "Borra subidas abandonadas, adjuntos de planos eliminados y contenidos sin uso"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horas", type=float, default=None,
+                            help="Antigüedad mínima de lo que se borra (por defecto PLANOS_ADJUNTOS_SUBIDA_TTL_H).")
+
+    def handle(self, *args, **options):
+        borrados = adjuntos.purgar(options["horas"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {borrados['subidas']} subida(s), {borrados['adjuntos']} adjunto(s) huérfano(s) "
+            f"y {borrados['contenidos']} contenido(s) borrados."))
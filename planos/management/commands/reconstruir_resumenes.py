@@ -0,0 +1,25 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planos.services import resumenes
+
+
+class Command(BaseCommand):
+    help = "Reconstruye las tablas de resumen por usuario y/o las verifica contra planos_logic"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verificar", action="store_true",
+                            help="Solo compara las tablas con planos_logic (no escribe).")
+
+    def handle(self, *args, **options):
+        if not options["verificar"]:
+            leidas = resumenes.reconstruir()
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Resúmenes reconstruidos a partir de {leidas} planos."))
+
+        difs = resumenes.diferencias()
+        if difs:
+            self.stderr.write(json.dumps(difs, ensure_ascii=False, indent=2, default=str))
+            raise CommandError("❌ Los resúmenes no coinciden con planos_logic.")
+        self.stdout.write(self.style.SUCCESS("✅ Resúmenes verificados contra planos_logic."))
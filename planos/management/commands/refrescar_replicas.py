@@ -0,0 +1,42 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from planos.services import replicas
+
+
+class Command(BaseCommand):
+    help = "Copia la base primaria sobre las réplicas SQLite de lectura (PLANOS_REPLICAS)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("alias", nargs="*",
+                            help="Réplicas a refrescar (por defecto, todas las de PLANOS_REPLICAS).")
+        parser.add_argument("--cada", type=float, default=None,
+                            help="Repite cada N segundos hasta SIGTERM/Ctrl+C.")
+
+    def handle(self, *args, **options):
+        aliases = options["alias"] or replicas.replicas()
+        if not aliases:
+            raise CommandError("No hay réplicas configuradas (variable de entorno PLANOS_REPLICAS).")
+        desconocidas = [a for a in aliases if a not in settings.DATABASES]
+        if desconocidas:
+            raise CommandError(f"Alias sin configurar en DATABASES: {', '.join(desconocidas)}")
+
+        detener = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: detener.set())
+        while True:
+            for alias in aliases:
+                try:
+                    segundos = replicas.refrescar(alias)
+                except ValueError as e:
+                    raise CommandError(str(e))
+                self.stdout.write(self.style.SUCCESS(f"✅ {alias} copiada en {segundos:.2f}s."))
+            if options["cada"] is None:
+                return
+            try:
+                if detener.wait(options["cada"]):
+                    return
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,23 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from planos.services import snapshot
+
+
+class Command(BaseCommand):
+    help = "Vuelca los planos a un snapshot columnar (mmap) para reportes fuera de línea"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salida", type=Path, default=None,
+                            help="Archivo destino (por defecto <PLANOS_EXPORTACIONES_DIR>/planos.snapshot).")
+
+    def handle(self, *args, **options):
+        ruta = options["salida"] or Path(settings.PLANOS_EXPORTACIONES_DIR) / "planos.snapshot"
+        t0 = time.perf_counter()
+        filas = snapshot.escribir(ruta)
+        mb = ruta.stat().st_size / 1e6
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Snapshot de {filas} planos en {ruta} ({mb:.1f} MB, {time.perf_counter() - t0:.1f}s)."))
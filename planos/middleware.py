@@ -0,0 +1,314 @@
+# 🚦 Middlewares de la API de planos
+#
+# Control de admisión: cada petición pertenece a una clase (lectura, escritura, masivo o
+# transferencia) con un
+# máximo de peticiones simultáneas. Si no hay cupo, espera en una cola
+# acotada; si la cola está llena o vence el plazo, se responde 503 con
+# Retry-After en vez de dejar que la latencia crezca sin límite.
+#
+# Compresión: gzip o brotli según Accept-Encoding, también para respuestas
+# en streaming (exportaciones), que se comprimen bloque a bloque.
+#
+# Consultas lentas: deja el nombre de la vista en curso para que el registro
+# de services/consultas_lentas.py diga qué acción pidió cada consulta.
+
+import math
+import re
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from .services import consultas_lentas, metricas
+
+ADMISION_POR_DEFECTO = {
+    "lectura": {"concurrencia": 32, "cola": 64, "espera_ms": 500},
+    "escritura": {"concurrencia": 1, "cola": 32, "espera_ms": 500},
+    "masivo": {"concurrencia": 1, "cola": 4, "espera_ms": 2000},
+    "transferencia": {"concurrencia": 8, "cola": 16, "espera_ms": 500},
+}
+PREFIJOS_POR_DEFECTO = ("/api/",)
+# El canal SSE no consulta la base por conexión (lo hace su publicador) y
+# una reconexión masiva no debe acabar en 503.
+EXENTAS_POR_DEFECTO = ("/api/metricas/", "/api/planos/eventos/")
+
+# Acciones que recorren muchas filas (ver PlanoViewSet y TrabajoViewSet).
+RUTAS_MASIVAS = ("/bulk/", "/upsert/", "/limpiar-pruebas/", "/eliminar_todos/")
+# Bytes de adjuntos (ver services/adjuntos.py): pueden durar minutos y casi
+# no tocan la base; no deben ocupar el cupo de escritura.
+RUTAS_TRANSFERENCIA = ("/api/subidas/", "/descarga/")
+METODOS_LECTURA = ("GET", "HEAD", "OPTIONS")
+
+
+def clase_de(request) -> str:
+    if any(r in request.path for r in RUTAS_TRANSFERENCIA):
+        return "transferencia"
+    if any(r in request.path for r in RUTAS_MASIVAS):
+        return "masivo"
+    if request.method in METODOS_LECTURA:
+        return "lectura"
+    return "escritura"
+
+
+class Compuerta:
+    """Semáforo con cola de espera acotada y plazo máximo."""
+
+    def __init__(self, concurrencia: int, cola: int, espera_ms: float):
+        self.concurrencia = max(1, concurrencia)
+        self.cola = max(0, cola)
+        self.espera = max(0.0, espera_ms) / 1000
+        self.en_curso = 0
+        self.en_cola = 0
+        self._cond = threading.Condition()
+
+    def entrar(self) -> str:
+        """Devuelve "" si se admite, o el motivo del rechazo."""
+        with self._cond:
+            if self.en_curso < self.concurrencia and not self.en_cola:
+                self.en_curso += 1
+                return ""
+            if self.en_cola >= self.cola:
+                return "cola_llena"
+            self.en_cola += 1
+            try:
+                admitida = self._cond.wait_for(
+                    lambda: self.en_curso < self.concurrencia, self.espera)
+            finally:
+                self.en_cola -= 1
+            if not admitida:
+                return "plazo"
+            self.en_curso += 1
+            return ""
+
+    def salir(self) -> None:
+        with self._cond:
+            self.en_curso -= 1
+            self._cond.notify()
+
+
+class ControlAdmisionMiddleware:
+    """
+    Configuración en settings.PLANOS_ADMISION (por clase: concurrencia,
+    cola, espera_ms). Métricas: `admision.<clase>.{admitidas, rechazadas_*,
+    espera_ms, en_curso, en_cola}`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, "PLANOS_ADMISION", ADMISION_POR_DEFECTO)
+        self.prefijos = tuple(getattr(settings, "PLANOS_ADMISION_PREFIJOS", PREFIJOS_POR_DEFECTO))
+        self.exentas = tuple(getattr(settings, "PLANOS_ADMISION_EXENTAS", EXENTAS_POR_DEFECTO))
+        self.compuertas = {clase: Compuerta(**valores) for clase, valores in config.items()}
+        metricas.registrar_fuente("admision", self._estado)
+
+    def __call__(self, request):
+        if not request.path.startswith(self.prefijos) or request.path.startswith(self.exentas):
+            return self.get_response(request)
+        clase = clase_de(request)
+        compuerta = self.compuertas.get(clase)
+        if compuerta is None:
+            return self.get_response(request)
+
+        inicio = time.monotonic()
+        motivo = compuerta.entrar()
+        metricas.incrementar(f"admision.{clase}.espera_ms", (time.monotonic() - inicio) * 1000)
+        if motivo:
+            metricas.incrementar(f"admision.{clase}.rechazadas_{motivo}")
+            return self._rechazo(compuerta)
+
+        metricas.incrementar(f"admision.{clase}.admitidas")
+        try:
+            return self.get_response(request)
+        finally:
+            compuerta.salir()
+
+    def _rechazo(self, compuerta):
+        respuesta = JsonResponse(
+            {"detail": "Servidor saturado. Intenta de nuevo en unos segundos."},
+            status=503)
+        respuesta["Retry-After"] = str(max(1, math.ceil(compuerta.espera)))
+        return respuesta
+
+    def _estado(self):
+        estado = {}
+        for clase, c in self.compuertas.items():
+            estado[f"{clase}.en_curso"] = c.en_curso
+            estado[f"{clase}.en_cola"] = c.en_cola
+        return estado
+
+
+# ------------------------------------------------------------
+# Compresión
+# ------------------------------------------------------------
+
+COMPRESION_POR_DEFECTO = {
+    "minimo_bytes": 1024,
+    "nivel_gzip": 6,
+    "nivel_brotli": 4,
+    "prefijos": ("/api/",),
+    "tipos": ("application/json", "text/csv", "text/plain"),
+}
+
+_brotli = None
+
+
+def modulo_brotli():
+    """Importa brotli la primera vez que hace falta (None si no está instalado)."""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli or None
+
+
+def elegir_codificacion(accept_encoding: str, brotli_disponible: bool) -> str:
+    """"br", "gzip" o "" según Accept-Encoding (respeta q=0)."""
+    aceptadas = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, params = parte.strip().partition(";")
+        q = re.search(r"q=([0-9.]+)", params)
+        aceptadas[nombre.strip().lower()] = float(q.group(1)) if q else 1.0
+    comodin = aceptadas.get("*", 0)
+    for codificacion in (("br", "gzip") if brotli_disponible else ("gzip",)):
+        if aceptadas.get(codificacion, comodin) > 0:
+            return codificacion
+    return ""
+
+
+class Compresor:
+    def __init__(self, codificacion: str, config: dict):
+        if codificacion == "br":
+            self._c = modulo_brotli().Compressor(quality=config["nivel_brotli"])
+            self._comprimir, self._terminar = self._c.process, self._c.finish
+        else:
+            self._c = zlib.compressobj(config["nivel_gzip"], zlib.DEFLATED, 31)
+            self._comprimir, self._terminar = self._c.compress, self._c.flush
+        self.entrada = 0
+        self.salida = 0
+        self.cpu = 0.0
+
+    def comprimir(self, datos: bytes) -> bytes:
+        inicio = time.thread_time()
+        bloque = self._comprimir(datos)
+        self.cpu += time.thread_time() - inicio
+        self.entrada += len(datos)
+        self.salida += len(bloque)
+        return bloque
+
+    def terminar(self) -> bytes:
+        inicio = time.thread_time()
+        bloque = self._terminar()
+        self.cpu += time.thread_time() - inicio
+        self.salida += len(bloque)
+        return bloque
+
+
+def registrar_compresion(codificacion: str, compresor: Compresor) -> None:
+    metricas.incrementar(f"compresion.{codificacion}.respuestas")
+    metricas.incrementar(f"compresion.{codificacion}.bytes_originales", compresor.entrada)
+    metricas.incrementar(f"compresion.{codificacion}.bytes_comprimidos", compresor.salida)
+    metricas.incrementar(f"compresion.{codificacion}.cpu_ms", compresor.cpu * 1000)
+
+
+class CompresionMiddleware:
+    """
+    Configuración en settings.PLANOS_COMPRESION. Solo se comprimen las rutas
+    de `prefijos` (la API no incluye tokens CSRF en el cuerpo, así que no
+    aplica BREACH), con tipo de contenido en `tipos` y al menos
+    `minimo_bytes`. No toca respuestas ya codificadas ni las 206 (Range).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {**COMPRESION_POR_DEFECTO, **getattr(settings, "PLANOS_COMPRESION", {})}
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not request.path.startswith(tuple(self.config["prefijos"])):
+            return response
+        if response.status_code == 206 or response.has_header("Content-Encoding"):
+            return response
+        tipo = response.get("Content-Type", "").split(";")[0].strip()
+        if tipo not in self.config["tipos"]:
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        longitud = (int(response["Content-Length"]) if response.has_header("Content-Length")
+                    else None if response.streaming else len(response.content))
+        if longitud is not None and longitud < self.config["minimo_bytes"]:
+            return response
+        codificacion = elegir_codificacion(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), modulo_brotli() is not None)
+        if not codificacion:
+            return response
+
+        compresor = Compresor(codificacion, self.config)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._comprimir_async(
+                    response.streaming_content, compresor, codificacion)
+            else:
+                response.streaming_content = self._comprimir_stream(
+                    response.streaming_content, compresor, codificacion)
+            del response["Content-Length"]
+        else:
+            contenido = compresor.comprimir(response.content) + compresor.terminar()
+            registrar_compresion(codificacion, compresor)
+            if len(contenido) >= longitud:
+                return response
+            response.content = contenido
+            response["Content-Length"] = str(len(contenido))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = codificacion
+        return response
+
+    @staticmethod
+    def _comprimir_stream(contenido, compresor, codificacion):
+        for bloque in contenido:
+            salida = compresor.comprimir(bloque)
+            if salida:
+                yield salida
+        yield compresor.terminar()
+        registrar_compresion(codificacion, compresor)
+
+    @staticmethod
+    async def _comprimir_async(contenido, compresor, codificacion):
+        async for bloque in contenido:
+            salida = compresor.comprimir(bloque)
+            if salida:
+                yield salida
+        yield compresor.terminar()
+        registrar_compresion(codificacion, compresor)
+
+
+class ConsultasLentasMiddleware:
+    """
+    Marca cada petición con `<método> <nombre de la URL>` (p. ej.
+    `PATCH plano-bulk`): las rutas de DRF ya llevan la acción en el nombre.
+    Antes de resolver la URL vale la ruta.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = consultas_lentas.en_vista(f"{request.method} {request.path}")
+        try:
+            return self.get_response(request)
+        finally:
+            consultas_lentas.salir_de_vista(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        coincidencia = request.resolver_match
+        if coincidencia is not None and coincidencia.url_name:
+            consultas_lentas.en_vista(f"{request.method} {coincidencia.url_name}")
+        return None
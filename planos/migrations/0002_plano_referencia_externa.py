@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plano',
+            name='referencia_externa',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Índice de texto completo para `?q=` (ver planos/services/busqueda.py).
+
+from django.db import migrations
+
+
+def crear_indice(apps, schema_editor):
+    from planos.services.busqueda import crear_indice_texto
+    crear_indice_texto(schema_editor.connection)
+
+
+def eliminar_indice(apps, schema_editor):
+    from planos.services.busqueda import eliminar_indice_texto
+    eliminar_indice_texto(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0002_plano_referencia_externa'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
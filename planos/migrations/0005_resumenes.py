@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:01
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def poblar_resumenes(apps, schema_editor):
+    from planos.services.planos_logic import normalizar_area_subarea, tipo_por_descripcion
+    Plano = apps.get_model('planos', 'Plano')
+    ResumenUsuarioArea = apps.get_model('planos', 'ResumenUsuarioArea')
+    ResumenUsuarioTipo = apps.get_model('planos', 'ResumenUsuarioTipo')
+
+    por_area, por_tipo = Counter(), Counter()
+    filas = Plano.objects.values_list('subido_por_id', 'descripcion', 'area', 'subarea')
+    for uid, descripcion, area, subarea in filas.iterator(chunk_size=2000):
+        por_area[(uid, *normalizar_area_subarea(area, subarea))] += 1
+        por_tipo[(uid, tipo_por_descripcion(descripcion))] += 1
+
+    ResumenUsuarioArea.objects.bulk_create(
+        [ResumenUsuarioArea(usuario_id=uid, area=a, subarea=s, total=n)
+         for (uid, a, s), n in por_area.items()], batch_size=2000)
+    ResumenUsuarioTipo.objects.bulk_create(
+        [ResumenUsuarioTipo(usuario_id=uid, tipo=t, total=n)
+         for (uid, t), n in por_tipo.items()], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0004_trabajo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenUsuarioArea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', models.CharField(max_length=100)),
+                ('subarea', models.CharField(max_length=100)),
+                ('total', models.IntegerField(default=0)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'area', 'subarea'), name='resumen_usuario_area_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenUsuarioTipo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'tipo'), name='resumen_usuario_tipo_unico')],
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0005_resumenes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plano',
+            index=models.Index(fields=['area', 'id'], name='planos_plan_area_7a494b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plano',
+            index=models.Index(fields=['subarea', 'id'], name='planos_plan_subarea_abff69_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+def poblar_huellas(apps, schema_editor):
+    from planos.services.planos_logic import huella_duplicado
+    Plano = apps.get_model('planos', 'Plano')
+    ultimo = 0
+    while True:
+        filas = list(Plano.objects.filter(pk__gt=ultimo).order_by('pk').values_list(
+            'pk', 'titulo', 'descripcion', 'area', 'subarea')[:2000])
+        if not filas:
+            return
+        ultimo = filas[-1][0]
+        Plano.objects.bulk_update(
+            [Plano(pk=pk, huella=huella_duplicado(*resto)) for pk, *resto in filas], ['huella'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0006_indices_area'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plano',
+            name='huella',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.RunPython(poblar_huellas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:50
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def modificado_desde_fecha_subida(apps, schema_editor):
+    # Sin historial, la última modificación conocida es el alta.
+    apps.get_model('planos', 'Plano').objects.update(modificado=F('fecha_subida'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0007_huella'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanoEliminado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plano_id', models.BigIntegerField(null=True)),
+                ('eliminado', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='plano',
+            name='modificado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(modificado_desde_fecha_subida, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='plano',
+            index=models.Index(fields=['modificado', 'id'], name='planos_plan_modific_c420a3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planoeliminado',
+            index=models.Index(fields=['eliminado', 'id'], name='planos_plan_elimina_bdab8d_idx'),
+        ),
+    ]
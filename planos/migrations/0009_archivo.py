@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0008_feed_cambios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumenusuariotipo',
+            name='archivados',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PlanoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('titulo', models.CharField(max_length=100)),
+                ('descripcion', models.TextField()),
+                ('fecha_subida', models.DateTimeField()),
+                ('area', models.CharField(max_length=100)),
+                ('subarea', models.CharField(max_length=100)),
+                ('referencia_externa', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('huella', models.CharField(blank=True, editable=False, max_length=16, null=True)),
+                ('modificado', models.DateTimeField()),
+                ('subido_por', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
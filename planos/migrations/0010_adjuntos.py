@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:35
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0009_archivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Adjunto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plano_id', models.BigIntegerField(db_index=True)),
+                ('nombre', models.CharField(max_length=255)),
+                ('tipo_contenido', models.CharField(max_length=100)),
+                ('tamano', models.BigIntegerField()),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubidaAdjunto',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('plano_id', models.BigIntegerField()),
+                ('nombre', models.CharField(max_length=255)),
+                ('tipo_contenido', models.CharField(max_length=100)),
+                ('tamano', models.BigIntegerField()),
+                ('recibido', models.BigIntegerField(default=0)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('modificado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
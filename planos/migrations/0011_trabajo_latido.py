@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planos', '0010_adjuntos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajo',
+            name='latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
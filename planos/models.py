@@ -1,11 +1,21 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .services.planos_logic import huella_duplicado
 
 # Este representará los planos que suben los usuarios a tu sistema.
 # titulo: nombre del plano.
 # descripcion: texto explicando qué es.
 # fecha_subida: se guarda automáticamente la fecha al crearlo.
 # subido_por: quién subió el plano (usuario que lo creó).
+# referencia_externa: id del cliente que lo envía (clave de la ingesta idempotente).
+# modificado: última alta o cambio; con `id` es el cursor del feed de cambios
+#   (ver planos/services/cambios.py).
+# huella: resumen de (titulo, descripcion, area, subarea) normalizados; busca
+#   duplicados por índice (ver planos/services/duplicados.py).
 # str: define cómo se mostrará en el panel (por su título).
 
 
@@ -16,6 +26,187 @@ class Plano(models.Model):
     subido_por = models.ForeignKey(User, on_delete=models.CASCADE)
     area = models.CharField(max_length=100)
     subarea = models.CharField(max_length=100)
+    referencia_externa = models.CharField(
+        max_length=100, unique=True, null=True, blank=True)
+    huella = models.CharField(max_length=16, null=True, blank=True,
+                              editable=False, db_index=True)
+    modificado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Filtros por área/subárea (admin, operaciones masivas). El `id` al
+        # final entrega las filas ya ordenadas: la página "ORDER BY id DESC
+        # LIMIT 50" no necesita ordenar todas las coincidencias.
+        indexes = [
+            models.Index(fields=["area", "id"]),
+            models.Index(fields=["subarea", "id"]),
+            models.Index(fields=["modificado", "id"]),
+        ]
 
     def __str__(self):
         return self.titulo
+
+    def calcular_huella(self) -> str:
+        return huella_duplicado(self.titulo, self.descripcion, self.area, self.subarea)
+
+    def save(self, *args, **kwargs):
+        self.huella = self.calcular_huella()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # auto_now no se agrega solo a `update_fields`.
+            kwargs["update_fields"] = {*update_fields, "huella", "modificado"}
+        # auto_now fija `modificado` dentro de la transacción, con el bloqueo
+        # de escritura tomado: el feed de cambios depende de ese orden.
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            super().save(*args, **kwargs)
+
+
+# Plano archivado: filas antiguas que `archivar_planos` mueve fuera de la
+# tabla caliente (ver planos/services/archivo.py). Mismas columnas y en el
+# mismo orden que `Plano` (conserva el id), para poder unirlas con UNION ALL
+# en `?incluir_archivados=true`. Siguen contando en los resúmenes; solo se
+# leen, no se editan.
+
+
+class PlanoArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    titulo = models.CharField(max_length=100)
+    descripcion = models.TextField()
+    fecha_subida = models.DateTimeField()
+    subido_por = models.ForeignKey(User, on_delete=models.CASCADE)
+    area = models.CharField(max_length=100)
+    subarea = models.CharField(max_length=100)
+    referencia_externa = models.CharField(
+        max_length=100, unique=True, null=True, blank=True)
+    huella = models.CharField(max_length=16, null=True, blank=True, editable=False)
+    modificado = models.DateTimeField()
+
+    def __str__(self):
+        return self.titulo
+
+
+# Lápida de un plano eliminado, para que el feed de cambios informe las
+# bajas. `plano_id` es el id que tenía (sin FK: la fila ya no existe);
+# NULL marca un vaciado completo de la tabla (el cliente debe descartar
+# su copia local).
+
+
+class PlanoEliminado(models.Model):
+    plano_id = models.BigIntegerField(null=True)
+    eliminado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["eliminado", "id"])]
+
+    def __str__(self):
+        return f"Plano #{self.plano_id} eliminado" if self.plano_id else "Vaciado"
+
+
+# Adjunto: archivo del plano (PDF, DWG...) guardado por contenido en
+# `PLANOS_ADJUNTOS_DIR/<sha256>` (ver planos/services/adjuntos.py): dos
+# adjuntos con el mismo contenido comparten el archivo. `plano_id` sin FK,
+# como en `PlanoEliminado`: el adjunto sigue al plano cuando se archiva.
+
+
+class Adjunto(models.Model):
+    plano_id = models.BigIntegerField(db_index=True)
+    nombre = models.CharField(max_length=255)
+    tipo_contenido = models.CharField(max_length=100)
+    tamano = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, db_index=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.nombre} (plano #{self.plano_id})"
+
+
+# Subida por partes en curso: el cliente manda los bytes en uno o varios
+# PATCH con `Upload-Offset`; `recibido` es cuánto ya está en disco. Al
+# completar `tamano` se crea el `Adjunto` y la subida se borra.
+
+
+class SubidaAdjunto(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    plano_id = models.BigIntegerField()
+    nombre = models.CharField(max_length=255)
+    tipo_contenido = models.CharField(max_length=100)
+    tamano = models.BigIntegerField()
+    recibido = models.BigIntegerField(default=0)
+    creado = models.DateTimeField(auto_now_add=True)
+    modificado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Subida de {self.nombre} ({self.recibido}/{self.tamano})"
+
+
+# Trabajo: operación larga (limpieza, exportación, reporte, relleno) que se
+# ejecuta fuera de la petición HTTP con `python manage.py procesar_trabajos`.
+# Los trabajadores se reparten los trabajos con un UPDATE condicional sobre
+# `estado`, así dos procesos nunca toman el mismo trabajo.
+
+
+class Trabajo(models.Model):
+    PENDIENTE = "pendiente"
+    EN_CURSO = "en_curso"
+    COMPLETADO = "completado"
+    FALLIDO = "fallido"
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (EN_CURSO, "En curso"),
+        (COMPLETADO, "Completado"),
+        (FALLIDO, "Fallido"),
+    ]
+
+    tipo = models.CharField(max_length=30)
+    estado = models.CharField(max_length=12, choices=ESTADOS, default=PENDIENTE)
+    parametros = models.JSONField(default=dict, blank=True)
+    progreso = models.PositiveSmallIntegerField(default=0)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    trabajador = models.CharField(max_length=100, blank=True)
+    disponible_desde = models.DateTimeField(default=timezone.now)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    # Lo renueva el trabajador mientras ejecuta (ver `reportar` en services/trabajos.py).
+    latido = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["estado", "disponible_desde"])]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.estado})"
+
+
+# Resúmenes desnormalizados: conteos por usuario que se mantienen en cada
+# alta/cambio/baja de planos (ver planos/services/resumenes.py), para que
+# los tableros lean O(grupos) filas en vez de recorrer toda la tabla.
+# area/subarea se guardan ya normalizadas como en `resumen_por_usuario_por_area`.
+# `total` incluye los planos archivados; `archivados` cuenta solo esos, para
+# conocer el total de la tabla caliente sin COUNT(*).
+
+
+class ResumenUsuarioArea(models.Model):
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    area = models.CharField(max_length=100)
+    subarea = models.CharField(max_length=100)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "area", "subarea"],
+                                    name="resumen_usuario_area_unico"),
+        ]
+
+
+class ResumenUsuarioTipo(models.Model):
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    tipo = models.CharField(max_length=20)
+    total = models.IntegerField(default=0)
+    archivados = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "tipo"],
+                                    name="resumen_usuario_tipo_unico"),
+        ]
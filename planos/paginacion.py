@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .services import conteo
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginator del admin que no ejecuta COUNT(*) sobre toda la tabla
+    (ver services/conteo.py). Con filtros muy amplios el total se corta en
+    `conteo.LIMITE_CONTEO`: las páginas posteriores se alcanzan filtrando más.
+    """
+
+    @cached_property
+    def count(self):
+        n, self.exacto = conteo.contar(self.object_list)
+        # Un total estimado puede pasarse de las filas reales: no se enlazan
+        # páginas que quizá no existen.
+        return n if self.exacto else conteo.LIMITE_CONTEO
+
+
+class ConteoLimitOffsetPagination(LimitOffsetPagination):
+    """
+    `?limit=&offset=` con el total según `?count=exact|estimate|none`
+    (por defecto PLANOS_CONTEO_POR_DEFECTO). La respuesta indica con
+    `count_estimado` si el total es aproximado. Sin `?limit=` la lista se
+    devuelve completa, como antes.
+    """
+    default_limit = None
+    max_limit = 1000
+    template = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.estrategia = request.query_params.get(
+            "count", getattr(settings, "PLANOS_CONTEO_POR_DEFECTO", "estimate"))
+        if self.estrategia not in conteo.ESTRATEGIAS:
+            raise ValidationError(
+                {"count": f"Opciones: {', '.join(conteo.ESTRATEGIAS)}."})
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.count, self.exacto = conteo.contar(queryset, self.estrategia)
+
+        # Una fila de más decide si hay página siguiente sin depender del total.
+        filas = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.hay_siguiente = len(filas) > self.limit
+        return filas[:self.limit]
+
+    def get_next_link(self):
+        if not self.hay_siguiente:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "count": self.count,
+            "count_estimado": not self.exacto and self.count is not None,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        esquema = super().get_paginated_response_schema(schema)
+        esquema["properties"]["count"]["nullable"] = True
+        esquema["properties"]["count_estimado"] = {"type": "boolean"}
+        return esquema
@@ -1,8 +1,128 @@
 from rest_framework import serializers
-from .models import Plano
+from rest_framework.settings import api_settings
+from usuarios.fields import UsuarioCacheadoField
+import mimetypes
+import os
+
+from .models import Adjunto, Plano, PlanoArchivado, SubidaAdjunto, Trabajo
+from .services import adjuntos, duplicados
+from .services.planos_logic import ErrorPlano, codigo_error_plano, mensajes_error
+from .services.trabajos import TAREAS
+
+# Campo al que se asocia cada error de `validar_plano_data`.
+CAMPO_POR_ERROR = {
+    ErrorPlano.TITULO_CORTO: "titulo",
+    ErrorPlano.TITULO_NUMERICO: "titulo",
+    ErrorPlano.DESCRIPCION_CORTA: "descripcion",
+    ErrorPlano.CONTENIDO_PROHIBIDO: api_settings.NON_FIELD_ERRORS_KEY,
+    ErrorPlano.AREA_VACIA: "area",
+    ErrorPlano.AREA_CORTA: "area",
+    ErrorPlano.SUBAREA_VACIA: "subarea",
+    ErrorPlano.SUBAREA_CORTA: "subarea",
+}
+
+CAMPOS_VALIDADOS = ("titulo", "descripcion", "area", "subarea")
+
+
+def mascara_de_campos(campos) -> int:
+    """Bits de `ErrorPlano` que dependen de alguno de los `campos` dados."""
+    mascara = 0
+    for bit, campo in CAMPO_POR_ERROR.items():
+        if campo in campos or (
+                bit is ErrorPlano.CONTENIDO_PROHIBIDO and
+                ("titulo" in campos or "descripcion" in campos)):
+            mascara |= bit
+    return mascara
+
+
+def errores_por_campo(codigo: int) -> dict:
+    """Convierte un código `ErrorPlano` en el dict de errores que espera DRF."""
+    errores = {}
+    for bit, campo in CAMPO_POR_ERROR.items():
+        if codigo & bit:
+            errores.setdefault(campo, []).extend(mensajes_error(bit))
+    return errores
 
 
 class PlanoSerializer(serializers.ModelSerializer):
+    # Sin SELECT a auth_user por escritura mientras el id esté en caché.
+    subido_por = UsuarioCacheadoField()
+
     class Meta:
         model = Plano
-        fields = '__all__'
+        exclude = ["huella"]
+
+    def validate_referencia_externa(self, value):
+        # "" no debe ocupar la clave única: se guarda como NULL.
+        if value and PlanoArchivado.objects.filter(referencia_externa=value).exists():
+            raise serializers.ValidationError(
+                "La usa un plano archivado; para cambiarlo use /api/planos/upsert/.")
+        return value or None
+
+    def validate(self, attrs):
+        # En PATCH solo llegan algunos campos: se completan con la instancia.
+        # Sin instancia (actualización masiva) solo se validan los enviados.
+        datos = attrs
+        if self.instance is not None:
+            datos = {c: attrs.get(c, getattr(self.instance, c))
+                     for c in CAMPOS_VALIDADOS}
+        codigo = codigo_error_plano(datos)
+        if self.partial and self.instance is None:
+            codigo &= mascara_de_campos(attrs)
+        if codigo:
+            raise serializers.ValidationError(errores_por_campo(codigo))
+        if duplicados.activo() and not (self.partial and self.instance is None):
+            datos = attrs if self.instance is None else datos
+            pk = duplicados.buscar(datos, excluir_pk=getattr(self.instance, "pk", None))
+            if pk is not None:
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                    f"Ya existe un plano con el mismo título, descripción, área y subárea (id {pk})."]})
+        return attrs
+
+
+class TrabajoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Trabajo
+        fields = ["id", "tipo", "estado", "parametros", "progreso", "error",
+                  "intentos", "creado", "iniciado", "latido", "terminado"]
+        read_only_fields = [f for f in fields if f not in ("tipo", "parametros")]
+
+    def validate_tipo(self, value):
+        if value not in TAREAS:
+            raise serializers.ValidationError(
+                f"Tipo desconocido. Opciones: {', '.join(sorted(TAREAS))}.")
+        return value
+
+
+class AdjuntoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Adjunto
+        fields = ["id", "plano_id", "nombre", "tipo_contenido", "tamano", "sha256", "creado"]
+
+
+class SubidaAdjuntoSerializer(serializers.ModelSerializer):
+    tipo_contenido = serializers.CharField(max_length=100, required=False)
+
+    class Meta:
+        model = SubidaAdjunto
+        fields = ["id", "plano_id", "nombre", "tipo_contenido", "tamano", "recibido", "creado"]
+        read_only_fields = ["plano_id", "recibido"]
+
+    def validate_nombre(self, value):
+        # Solo el nombre: se usa en Content-Disposition, nunca como ruta.
+        nombre = os.path.basename(value.replace("\\", "/")).strip()
+        if not nombre:
+            raise serializers.ValidationError("Indica el nombre del archivo.")
+        return nombre
+
+    def validate_tamano(self, value):
+        if not 0 <= value <= adjuntos.max_bytes():
+            raise serializers.ValidationError(
+                f"Debe estar entre 0 y {adjuntos.max_bytes()} bytes.")
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get("tipo_contenido"):
+            attrs["tipo_contenido"] = (mimetypes.guess_type(attrs["nombre"])[0]
+                                       or "application/octet-stream")
+        return attrs
@@ -0,0 +1,334 @@
+# 📎 Archivos adjuntos de los planos (PDF, DWG...)
+# - Subida por partes y reanudable: `iniciar` crea la subida y cada
+#   `recibir` agrega los bytes de un PATCH a `<dir>/subidas/<id>.part`,
+#   leyendo la petición de a BLOQUE bytes: nunca está el archivo entero en
+#   memoria. Si la conexión se corta, lo escrito queda y el cliente sigue
+#   desde `recibido`.
+# - Un escritor por subida: antes de tocar el `.part` el PATCH toma un
+#   cerrojo exclusivo del archivo (flock, vale entre procesos) y relee
+#   `recibido`; un segundo PATCH simultáneo recibe 409 sin truncar nada.
+# - SHA-256 mientras se escribe: cada bloque se pasa a un hilo que actualiza
+#   el hash (hashlib suelta el GIL) mientras el hilo de la petición lo
+#   escribe en disco y lee el siguiente. Al terminar no hay que releer el
+#   archivo. El estado del hash vive en memoria del proceso; si el siguiente
+#   PATCH llega a otro worker, se recalcula leyendo lo ya recibido.
+# - Direccionado por contenido: el archivo completo pasa a
+#   `<dir>/<2 primeros>/<sha256>`.
+#   Si ya existía (mismo contenido subido antes), se descarta la copia.
+# - Descargas con Range: `tramo` devuelve lo pedido sin leerlo a memoria;
+#   FileResponse usa sendfile del servidor cuando el tramo llega al final.
+# Los adjuntos de planos eliminados, los contenidos sin adjuntos y las
+# subidas abandonadas se borran con `python manage.py purgar_adjuntos`.
+
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Adjunto, Plano, PlanoArchivado, SubidaAdjunto
+
+try:
+    import fcntl
+except ImportError:  # Windows: el cerrojo sólo vale dentro del proceso
+    fcntl = None
+
+BLOQUE = 1 << 20  # 1 MiB
+MAX_BYTES = 4 << 30  # 4 GiB
+SUBIDA_TTL_H = 24
+
+# Un hilo por subida simultánea alcanza: cada una espera su bloque anterior.
+_hilos_hash = ThreadPoolExecutor(max_workers=8, thread_name_prefix="adjuntos-sha256")
+_cerrojo = threading.Lock()
+_hashes: Dict[str, Tuple[int, "hashlib._Hash"]] = {}  # subida → (bytes hasheados, hash)
+_escribiendo: Set[str] = set()  # subidas con un PATCH en curso (sin fcntl)
+
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class SubidaInvalida(ValueError):
+    pass
+
+
+class DesfaseSubida(SubidaInvalida):
+    """El PATCH no empieza donde termina lo recibido."""
+
+    def __init__(self, recibido: int):
+        super().__init__(f"La subida va en el byte {recibido}.")
+        self.recibido = recibido
+
+
+class SubidaOcupada(DesfaseSubida):
+    """Otro PATCH está escribiendo esta subida."""
+
+    def __init__(self, recibido: int):
+        SubidaInvalida.__init__(self, "Otra petición está enviando bytes de esta subida; "
+                                      "reintenta desde `recibido`.")
+        self.recibido = recibido
+
+
+class RangoInvalido(ValueError):
+    pass
+
+
+def carpeta() -> Path:
+    return Path(settings.PLANOS_ADJUNTOS_DIR)
+
+
+def ruta_contenido(sha256: str) -> Path:
+    return carpeta() / sha256[:2] / sha256
+
+
+def ruta_parcial(subida: SubidaAdjunto) -> Path:
+    return carpeta() / "subidas" / f"{subida.pk}.part"
+
+
+def max_bytes() -> int:
+    return getattr(settings, "PLANOS_ADJUNTOS_MAX_BYTES", MAX_BYTES)
+
+
+# ------------------------------------------------------------
+# Subidas
+# ------------------------------------------------------------
+
+def iniciar(plano_id: int, nombre: str, tamano: int, tipo_contenido: str) -> SubidaAdjunto:
+    subida = SubidaAdjunto.objects.create(plano_id=plano_id, nombre=nombre, tamano=tamano,
+                                          tipo_contenido=tipo_contenido)
+    ruta = ruta_parcial(subida)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.touch()
+    return subida
+
+
+def _hash_de(subida: SubidaAdjunto, ruta: Path):
+    """Hash de los primeros `subida.recibido` bytes, de memoria o releyendo el archivo."""
+    with _cerrojo:
+        guardado = _hashes.pop(str(subida.pk), None)
+    if guardado is not None and guardado[0] == subida.recibido:
+        return guardado[1]
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        faltan = subida.recibido
+        while faltan:
+            bloque = archivo.read(min(BLOQUE, faltan))
+            if not bloque:
+                raise SubidaInvalida("El archivo parcial está incompleto; inicia la subida de nuevo.")
+            sha.update(bloque)
+            faltan -= len(bloque)
+    return sha
+
+
+def _tomar(subida: SubidaAdjunto, archivo) -> bool:
+    """Cerrojo exclusivo sin espera del `.part`; se suelta al cerrar el archivo."""
+    if fcntl is not None:
+        try:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+    with _cerrojo:
+        if str(subida.pk) in _escribiendo:
+            return False
+        _escribiendo.add(str(subida.pk))
+    return True
+
+
+def _soltar(subida: SubidaAdjunto) -> None:
+    if fcntl is None:
+        with _cerrojo:
+            _escribiendo.discard(str(subida.pk))
+
+
+def recibir(subida: SubidaAdjunto, desde: int, flujo, largo: int) -> Optional[Adjunto]:
+    """
+    Agrega `largo` bytes leídos de `flujo` a partir del byte `desde`.
+    Devuelve el `Adjunto` si con esto la subida quedó completa.
+    """
+    if desde != subida.recibido:
+        raise DesfaseSubida(subida.recibido)
+    if largo > subida.tamano - desde:
+        raise SubidaInvalida(f"Sobran bytes: el archivo tiene {subida.tamano}.")
+    ruta = ruta_parcial(subida)
+    if not ruta.exists():
+        raise SubidaInvalida("El archivo parcial ya no existe; inicia la subida de nuevo.")
+
+    with open(ruta, "r+b") as archivo:
+        if not _tomar(subida, archivo):
+            raise SubidaOcupada(subida.recibido)
+        try:
+            sha = _escribir(subida, desde, flujo, largo, ruta, archivo)
+        finally:
+            _soltar(subida)
+
+    if subida.recibido < subida.tamano:
+        with _cerrojo:
+            _hashes[str(subida.pk)] = (subida.recibido, sha)
+        return None
+    return _finalizar(subida, ruta, sha.hexdigest())
+
+
+def _escribir(subida: SubidaAdjunto, desde: int, flujo, largo: int, ruta: Path, archivo):
+    """Escribe el bloque con el cerrojo del `.part` tomado; devuelve el hash al día."""
+    # Otro PATCH pudo avanzar la subida entre la lectura de la vista y el cerrojo.
+    recibido = SubidaAdjunto.objects.filter(pk=subida.pk).values_list(
+        "recibido", flat=True).first()
+    if recibido is None:
+        raise SubidaInvalida("La subida ya no existe; inicia la subida de nuevo.")
+    if recibido != desde:
+        raise DesfaseSubida(recibido)
+
+    sha = _hash_de(subida, ruta)
+    escritos = 0
+    # Lo que haya después de `recibido` es de un PATCH cortado: se pisa.
+    archivo.seek(desde)
+    archivo.truncate()
+    pendiente = None
+    try:
+        while escritos < largo and flujo is not None:
+            try:
+                bloque = flujo.read(min(BLOQUE, largo - escritos))
+            except OSError:
+                break  # el cliente cortó: se guarda lo recibido hasta aquí
+            if not bloque:
+                break
+            if pendiente is not None:
+                pendiente.result()
+            pendiente = _hilos_hash.submit(sha.update, bloque)
+            archivo.write(bloque)
+            escritos += len(bloque)
+    finally:
+        if pendiente is not None:
+            pendiente.result()
+    archivo.flush()
+    os.fsync(archivo.fileno())
+
+    recibido = desde + escritos
+    # Condicional además del cerrojo: `cancelar` o la purga pueden ganar la carrera.
+    if not SubidaAdjunto.objects.filter(pk=subida.pk, recibido=desde).update(
+            recibido=recibido, modificado=timezone.now()):
+        raise DesfaseSubida(SubidaAdjunto.objects.get(pk=subida.pk).recibido)
+    subida.recibido = recibido
+    return sha
+
+
+def _finalizar(subida: SubidaAdjunto, ruta: Path, sha256: str) -> Adjunto:
+    destino = ruta_contenido(sha256)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if destino.exists():
+        ruta.unlink()
+        os.utime(destino)  # que `purgar` no lo tome por abandonado
+    else:
+        os.replace(ruta, destino)
+    with transaction.atomic():
+        adjunto = Adjunto.objects.create(
+            plano_id=subida.plano_id, nombre=subida.nombre, tipo_contenido=subida.tipo_contenido,
+            tamano=subida.tamano, sha256=sha256)
+        subida.delete()
+    return adjunto
+
+
+def cancelar(subida: SubidaAdjunto) -> None:
+    with _cerrojo:
+        _hashes.pop(str(subida.pk), None)
+    ruta_parcial(subida).unlink(missing_ok=True)
+    subida.delete()
+
+
+# ------------------------------------------------------------
+# Descargas
+# ------------------------------------------------------------
+
+def rango(cabecera: Optional[str], tamano: int) -> Optional[Tuple[int, int]]:
+    """
+    `(inicio, largo)` pedido en `Range: bytes=a-b` (también `a-` y `-n`), o
+    None para el archivo completo. Varios rangos se ignoran (se envía todo).
+    """
+    if not cabecera:
+        return None
+    coincide = _RANGO.match(cabecera.strip())
+    if not coincide:
+        return None
+    a, b = coincide.groups()
+    if not a and not b:
+        return None
+    if not a:
+        largo = min(int(b), tamano)
+        if not largo:
+            raise RangoInvalido(cabecera)
+        return tamano - largo, largo
+    inicio = int(a)
+    fin = min(int(b), tamano - 1) if b else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        raise RangoInvalido(cabecera)
+    return inicio, fin - inicio + 1
+
+
+class _Tramo:
+    """Lectura de `largo` bytes de un archivo abierto, para FileResponse."""
+
+    def __init__(self, archivo, largo: int):
+        self._archivo = archivo
+        self._faltan = largo
+
+    def read(self, n: int = -1) -> bytes:
+        if n < 0 or n > self._faltan:
+            n = self._faltan
+        datos = self._archivo.read(n)
+        self._faltan -= len(datos)
+        return datos
+
+    def close(self) -> None:
+        self._archivo.close()
+
+
+def tramo(adjunto: Adjunto, inicio: int = 0, largo: Optional[int] = None):
+    """
+    Archivo abierto en `inicio` del que se leen `largo` bytes. Si el tramo
+    llega al final se devuelve el archivo tal cual (el servidor puede usar
+    sendfile); si no, un envoltorio que corta en `largo`.
+    """
+    archivo = open(ruta_contenido(adjunto.sha256), "rb")
+    archivo.seek(inicio)
+    if largo is None or inicio + largo >= adjunto.tamano:
+        return archivo
+    return _Tramo(archivo, largo)
+
+
+# ------------------------------------------------------------
+# Limpieza
+# ------------------------------------------------------------
+
+def purgar(ttl_horas: Optional[float] = None) -> Dict[str, int]:
+    """
+    Borra las subidas sin actividad en `ttl_horas`, los adjuntos cuyo plano
+    ya no existe (ni archivado) y los contenidos que ya no usa ningún
+    adjunto. Devuelve cuántos de cada uno.
+    """
+    ttl = timedelta(hours=ttl_horas if ttl_horas is not None
+                    else getattr(settings, "PLANOS_ADJUNTOS_SUBIDA_TTL_H", SUBIDA_TTL_H))
+    limite = timezone.now() - ttl
+    subidas = 0
+    for subida in SubidaAdjunto.objects.filter(modificado__lt=limite):
+        cancelar(subida)
+        subidas += 1
+
+    huerfanos, _ = (Adjunto.objects
+                    .exclude(plano_id__in=Plano.objects.values("pk"))
+                    .exclude(plano_id__in=PlanoArchivado.objects.values("pk"))
+                    .delete())
+
+    usados = set(Adjunto.objects.values_list("sha256", flat=True).distinct())
+    contenidos = 0
+    for ruta in carpeta().glob("??/*"):
+        # Un contenido recién escrito puede estar por recibir su `Adjunto`.
+        if ruta.name not in usados and ruta.stat().st_mtime < limite.timestamp():
+            ruta.unlink(missing_ok=True)
+            contenidos += 1
+    return {"subidas": subidas, "adjuntos": huerfanos, "contenidos": contenidos}
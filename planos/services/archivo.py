@@ -0,0 +1,109 @@
+# 🧊 Archivo de planos antiguos (tabla caliente / tabla fría)
+# Casi todo el tráfico toca planos recientes, pero cada índice, conteo y
+# recorrido de `planos_plano` crece con la tabla entera. `archivar` mueve
+# los planos con `fecha_subida` anterior a un corte a `PlanoArchivado`, por
+# lotes: cada lote copia, borra y actualiza los resúmenes en una sola
+# transacción, así que cortar el proceso no pierde ni duplica filas y
+# volver a ejecutarlo continúa donde quedó.
+#
+# - Los archivados siguen contando en los resúmenes (`resumenes.archivar`).
+# - El feed de cambios no los informa como bajas: el plano sigue existiendo.
+# - La búsqueda de texto y el pre-chequeo de duplicados solo ven la tabla
+#   caliente (los triggers FTS quitan la fila del índice al borrarla).
+# - `?incluir_archivados=true` en la lista y el detalle los vuelve a mostrar.
+# - `referencia_externa` es única entre las dos tablas: el upsert que cambia
+#   un plano archivado lo devuelve a la tabla caliente (`desarchivar`). Si
+#   aun así al archivar aparece una referencia que ya está en el archivo con
+#   otro id, la fila caliente es la versión vigente y reemplaza a la
+#   archivada (que se informa como baja), en lugar de fallar con
+#   IntegrityError en cada reintento.
+
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from ..models import Plano, PlanoArchivado
+from . import cambios, resumenes
+
+TAMANO_LOTE = 2000
+PARAMETRO = "incluir_archivados"
+
+# Columnas de `Plano`, en el orden del modelo (el mismo de `PlanoArchivado`).
+CAMPOS = tuple(f.attname for f in Plano._meta.concrete_fields)
+
+
+def solicitado(params) -> bool:
+    """¿La petición pide `?incluir_archivados=true`?"""
+    return params.get(PARAMETRO, "").lower() in ("1", "true", "si", "sí")
+
+
+def con_archivados(queryset: QuerySet) -> QuerySet:
+    """
+    `queryset` (de planos) UNION ALL los archivados. Devuelve instancias de
+    `Plano`. Después de la unión solo se puede paginar, contar y ordenar.
+    """
+    return queryset.union(PlanoArchivado.objects.all(), all=True)
+
+
+def pendientes(antes_de: datetime) -> QuerySet:
+    # Sin índice en `fecha_subida`: los planos antiguos tienen los ids más
+    # bajos, así que recorrer por pk los encuentra al principio de la tabla.
+    return Plano.objects.filter(fecha_subida__lt=antes_de).order_by("pk")
+
+
+def archivar(antes_de: datetime, tamano_lote: int = TAMANO_LOTE,
+             al_avanzar: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Mueve a `PlanoArchivado` los planos subidos antes de `antes_de`.
+    Devuelve cuántos movió. `al_avanzar(total)` se llama tras cada lote.
+    """
+    total = 0
+    while True:
+        filas = list(pendientes(antes_de).values_list(*CAMPOS)[:tamano_lote])
+        if not filas:
+            return total
+        archivados = [PlanoArchivado(**dict(zip(CAMPOS, fila))) for fila in filas]
+        with transaction.atomic():
+            _descartar_reemplazados([p.referencia_externa for p in archivados
+                                     if p.referencia_externa])
+            PlanoArchivado.objects.bulk_create(archivados)
+            Plano.objects.filter(pk__in=[p.pk for p in archivados]).delete()
+            resumenes.archivar(resumenes.fila_de(p) for p in archivados)
+        total += len(archivados)
+        if al_avanzar:
+            al_avanzar(total)
+
+
+def _descartar_reemplazados(referencias) -> None:
+    """Archivados con una referencia que vuelve a archivarse desde la tabla caliente."""
+    viejos = list(PlanoArchivado.objects.filter(referencia_externa__in=referencias)
+                  .values_list("pk", *resumenes.CAMPOS_RESUMEN))
+    if not viejos:
+        return
+    PlanoArchivado.objects.filter(pk__in=[v[0] for v in viejos]).delete()
+    resumenes.restar(v[1:] for v in viejos)
+    resumenes.desarchivar(v[1:] for v in viejos)
+    cambios.registrar_bajas(v[0] for v in viejos)
+
+
+def desarchivar(referencias: Iterable[str]) -> int:
+    """
+    Devuelve a `Plano` (con su id y fecha) los archivados con esas
+    referencias. Llamar dentro de la transacción de quien los va a cambiar.
+    """
+    filas = list(PlanoArchivado.objects.select_for_update()
+                 .filter(referencia_externa__in=list(referencias)).values_list(*CAMPOS))
+    if not filas:
+        return 0
+    planos = [Plano(**dict(zip(CAMPOS, fila))) for fila in filas]
+    fechas = [p.fecha_subida for p in planos]
+    Plano.objects.bulk_create(planos)
+    # auto_now_add pisó la fecha original al insertar.
+    for plano, fecha in zip(planos, fechas):
+        plano.fecha_subida = fecha
+    Plano.objects.bulk_update(planos, ["fecha_subida"])
+    PlanoArchivado.objects.filter(pk__in=[p.pk for p in planos]).delete()
+    resumenes.desarchivar(resumenes.fila_de(p) for p in planos)
+    return len(planos)
@@ -0,0 +1,165 @@
+# 🔎 Búsqueda de texto completo sobre titulo y descripcion
+# - SQLite: tabla virtual FTS5 (contenido externo) mantenida por triggers,
+#   con `remove_diacritics` para que "electrico" encuentre "eléctrico".
+# - PostgreSQL: índice GIN sobre to_tsvector('spanish', unaccent(...)).
+# - Otros motores (o SQLite sin FTS5): icontains, sin índice.
+
+import re
+from typing import List
+
+from django.db import connection as conexion_default, connections
+from django.db.models import Q, QuerySet
+from django.db.utils import OperationalError
+
+TABLA_FTS = "planos_plano_fts"
+
+SQLITE_TABLA = f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+    titulo, descripcion,
+    content='planos_plano', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2')"""
+
+# Los triggers se vuelven a crear tras cada `migrate`: en SQLite, Django
+# reconstruye la tabla en algunos ALTER y con ella se pierden los triggers.
+SQLITE_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON planos_plano BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, titulo, descripcion)
+        VALUES (new.id, new.titulo, new.descripcion);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON planos_plano BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, titulo, descripcion)
+        VALUES ('delete', old.id, old.titulo, old.descripcion);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au
+        AFTER UPDATE OF titulo, descripcion ON planos_plano BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, titulo, descripcion)
+        VALUES ('delete', old.id, old.titulo, old.descripcion);
+        INSERT INTO {TABLA_FTS}(rowid, titulo, descripcion)
+        VALUES (new.id, new.titulo, new.descripcion);
+    END""",
+]
+SQLITE_RECONSTRUIR = f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')"
+SQLITE_ELIMINAR = [
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_au",
+    f"DROP TABLE IF EXISTS {TABLA_FTS}",
+]
+
+VECTOR_PG = ("to_tsvector('spanish', planos_unaccent("
+             "coalesce(titulo, '') || ' ' || coalesce(descripcion, '')))")
+POSTGRES_CREAR = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE; el envoltorio permite usarlo en un índice.
+    """CREATE OR REPLACE FUNCTION planos_unaccent(text) RETURNS text AS
+        $$ SELECT public.unaccent('public.unaccent', $1) $$
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT""",
+    f"CREATE INDEX IF NOT EXISTS planos_plano_busqueda_gin ON planos_plano USING GIN ({VECTOR_PG})",
+]
+POSTGRES_ELIMINAR = [
+    "DROP INDEX IF EXISTS planos_plano_busqueda_gin",
+    "DROP FUNCTION IF EXISTS planos_unaccent(text)",
+]
+
+# Caché: nombre de la base → ¿existe la tabla FTS5?
+_fts_por_base = {}
+
+
+def crear_indice_texto(connection) -> None:
+    """Crea el índice (y lo llena con las filas existentes)."""
+    _fts_por_base.pop(str(connection.settings_dict["NAME"]), None)
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            try:
+                cursor.execute(SQLITE_TABLA)
+            except OperationalError:
+                return  # SQLite compilado sin FTS5
+            for sql in SQLITE_TRIGGERS:
+                cursor.execute(sql)
+            cursor.execute(SQLITE_RECONSTRUIR)
+        elif connection.vendor == "postgresql":
+            for sql in POSTGRES_CREAR:
+                cursor.execute(sql)
+
+
+def eliminar_indice_texto(connection) -> None:
+    _fts_por_base.pop(str(connection.settings_dict["NAME"]), None)
+    sentencias = {"sqlite": SQLITE_ELIMINAR,
+                  "postgresql": POSTGRES_ELIMINAR}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in sentencias:
+            cursor.execute(sql)
+
+
+def tiene_indice_fts(connection) -> bool:
+    """¿Existe la tabla FTS5? Se consulta una vez por archivo de base de datos."""
+    if connection.vendor != "sqlite":
+        return False
+    nombre = str(connection.settings_dict["NAME"])
+    if nombre not in _fts_por_base:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [TABLA_FTS])
+            _fts_por_base[nombre] = cursor.fetchone() is not None
+    return _fts_por_base[nombre]
+
+
+def asegurar_triggers(connection) -> None:
+    """Recrea los triggers de FTS5 si se perdieron (idempotente)."""
+    if not tiene_indice_fts(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+
+
+def reconstruir_indice(connection=conexion_default) -> None:
+    """Vuelve a indexar todas las filas (SQLite); en PostgreSQL no hace falta."""
+    if tiene_indice_fts(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(SQLITE_RECONSTRUIR)
+
+
+def terminos(q: str) -> List[str]:
+    """Palabras de la consulta (sin operadores ni comillas)."""
+    return re.findall(r"\w+", q or "")
+
+
+def buscar(queryset: QuerySet, q: str) -> QuerySet:
+    """
+    Filtra y ordena por relevancia los planos que contienen todas las
+    palabras de `q` (como prefijo), sin distinguir mayúsculas ni tildes.
+    La relevancia se expone en el atributo `rango` (mayor = mejor).
+    """
+    palabras = terminos(q)
+    if not palabras:
+        return queryset.none()
+
+    connection = connections[queryset.db]
+    tabla = queryset.model._meta.db_table
+
+    if tiene_indice_fts(connection):
+        expresion = " ".join(f'"{p}"*' for p in palabras)
+        return queryset.extra(
+            tables=[TABLA_FTS],
+            where=[f"{TABLA_FTS}.rowid = {tabla}.id", f"{TABLA_FTS} MATCH %s"],
+            params=[expresion],
+            select={"rango": f"-bm25({TABLA_FTS})"},
+            order_by=["-rango"],
+        )
+
+    if connection.vendor == "postgresql":
+        consulta = " & ".join(f"{p}:*" for p in palabras)
+        tsquery = "to_tsquery('spanish', planos_unaccent(%s))"
+        return queryset.extra(
+            where=[f"{VECTOR_PG} @@ {tsquery}"],
+            params=[consulta],
+            select={"rango": f"ts_rank({VECTOR_PG}, {tsquery})"},
+            select_params=[consulta],
+            order_by=["-rango"],
+        )
+
+    filtro = Q()
+    for p in palabras:
+        filtro &= Q(titulo__icontains=p) | Q(descripcion__icontains=p)
+    return queryset.filter(filtro)
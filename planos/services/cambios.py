@@ -0,0 +1,145 @@
+# 🔄 Feed de cambios para clientes que replican los planos
+# `GET /api/planos/cambios/?desde=<cursor>` devuelve, en páginas acotadas,
+# las altas/cambios (fila completa, por `Plano.modificado`) y las bajas
+# (lápidas `PlanoEliminado`) posteriores al cursor. El tráfico de
+# sincronización crece con el volumen de cambios y no con el de la tabla.
+#
+# El orden es (instante, tipo, id). Una transacción que confirma tarde no
+# debe quedar detrás de un cursor ya entregado. En SQLite las transacciones
+# empiezan con BEGIN IMMEDIATE (`transaction_mode` en settings): toman el
+# bloqueo de escritura antes de fijar `modificado` o `eliminado`, y la
+# siguiente no lo obtiene hasta el COMMIT de la anterior, así que el orden
+# de los instantes es el de los COMMIT por más que se espere el bloqueo.
+# Toda escritura que fija esos instantes corre dentro de una transacción
+# (`Plano.save` abre la suya). Además solo se entregan cambios con más de
+# `PLANOS_CAMBIOS_MARGEN_MS` de antigüedad: cubre la diferencia de reloj
+# entre procesos y, en PostgreSQL (sin bloqueo único), la duración de las
+# transacciones de escritura.
+
+import heapq
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from ..models import Plano, PlanoEliminado
+from .snapshot import fecha_de, micros_de
+
+MARGEN_MS = 1000
+LIMITE = 500
+LIMITE_MAXIMO = 1000
+
+# Tipo de entrada; a igual instante, las altas van antes que las bajas.
+UPSERT, BAJA = 0, 1
+
+Cursor = Tuple[int, int, int]  # (µs desde epoch, tipo, id de la fila de origen)
+INICIO: Cursor = (0, UPSERT, 0)
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar(cursor: Cursor) -> str:
+    return "{}.{}.{}".format(*cursor)
+
+
+def decodificar(texto: Optional[str]) -> Cursor:
+    if not texto:
+        return INICIO
+    partes = texto.split(".")
+    if len(partes) != 3 or not all(p.isdigit() for p in partes) or int(partes[1]) > BAJA:
+        raise CursorInvalido("Cursor inválido: use el valor `cursor` de la respuesta anterior.")
+    return tuple(int(p) for p in partes)
+
+
+# ------------------------------------------------------------
+# Escritura de lápidas (en la transacción de cada baja)
+# ------------------------------------------------------------
+
+def registrar_bajas(ids: Iterable[int]) -> None:
+    PlanoEliminado.objects.bulk_create([PlanoEliminado(plano_id=pk) for pk in ids])
+
+
+def registrar_vaciado() -> None:
+    """La tabla se vació de una vez: una lápida sin id en lugar de una por fila."""
+    PlanoEliminado.objects.create(plano_id=None)
+
+
+# ------------------------------------------------------------
+# Lectura
+# ------------------------------------------------------------
+
+def _posteriores(queryset: QuerySet, campo: str, tipo: int, cursor: Cursor) -> QuerySet:
+    """Filas cuya clave (campo, tipo, id) es mayor que `cursor`."""
+    micros, tipo_cursor, pk = cursor
+    instante = fecha_de(micros)
+    if tipo < tipo_cursor:
+        return queryset.filter(**{f"{campo}__gt": instante})
+    queryset = queryset.filter(**{f"{campo}__gte": instante})
+    if tipo == tipo_cursor:
+        # El rango sobre el índice (campo, id) va primero; luego el desempate.
+        queryset = queryset.filter(Q(**{f"{campo}__gt": instante}) | Q(pk__gt=pk))
+    return queryset
+
+
+def _horizonte():
+    margen = getattr(settings, "PLANOS_CAMBIOS_MARGEN_MS", MARGEN_MS)
+    return timezone.now() - timedelta(milliseconds=margen)
+
+
+def leer(cursor: Cursor, limite: int = LIMITE) -> Tuple[List[Tuple[Cursor, object]], Cursor, bool]:
+    """
+    Devuelve `(entradas, siguiente_cursor, hay_mas)`; cada entrada es
+    `(clave, Plano | PlanoEliminado)`. Sin cambios nuevos, el cursor no se mueve.
+    """
+    horizonte = _horizonte()
+
+    altas = _posteriores(Plano.objects.filter(modificado__lte=horizonte),
+                         "modificado", UPSERT, cursor).order_by("modificado", "id")
+    bajas = _posteriores(PlanoEliminado.objects.filter(eliminado__lte=horizonte),
+                         "eliminado", BAJA, cursor).order_by("eliminado", "id")
+
+    entradas = list(heapq.merge(
+        (((micros_de(p.modificado), UPSERT, p.pk), p)
+         for p in altas[:limite + 1]),
+        (((micros_de(b.eliminado), BAJA, b.pk), b) for b in bajas[:limite + 1]),
+        key=lambda entrada: entrada[0]))
+    hay_mas = len(entradas) > limite
+    entradas = entradas[:limite]
+    return entradas, (entradas[-1][0] if entradas else cursor), hay_mas
+
+
+def ultimo() -> Cursor:
+    """Cursor del cambio más reciente ya entregable (para empezar "desde ahora")."""
+    horizonte = _horizonte()
+    alta = (Plano.objects.filter(modificado__lte=horizonte).order_by("-modificado", "-id")
+            .values_list("modificado", "id").first())
+    baja = (PlanoEliminado.objects.filter(eliminado__lte=horizonte).order_by("-eliminado", "-id")
+            .values_list("eliminado", "id").first())
+    claves = [INICIO]
+    if alta:
+        claves.append((micros_de(alta[0]), UPSERT, alta[1]))
+    if baja:
+        claves.append((micros_de(baja[0]), BAJA, baja[1]))
+    return max(claves)
+
+
+def como_dicts(entradas, serializar: Callable[[List[Plano]], List[Dict]]) -> List[Dict]:
+    """
+    Entradas de `leer` en el formato de la API: {"tipo": "upsert", "plano": {...}},
+    {"tipo": "baja", "id": N} o {"tipo": "vaciado"}. `serializar` recibe todas las
+    altas juntas (un serializador por fila es ~10 veces más lento).
+    """
+    planos = iter(serializar([fila for (_, tipo, _), fila in entradas if tipo == UPSERT]))
+    datos = []
+    for (_, tipo, _), fila in entradas:
+        if tipo == UPSERT:
+            datos.append({"tipo": "upsert", "plano": next(planos)})
+        elif fila.plano_id is None:
+            datos.append({"tipo": "vaciado"})
+        else:
+            datos.append({"tipo": "baja", "id": fila.plano_id})
+    return datos
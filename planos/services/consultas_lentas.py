@@ -0,0 +1,152 @@
+# 🐢 Registro de consultas lentas
+# Cada conexión a la base recibe un `execute_wrapper` (ver apps.py) que mide
+# las consultas. Las que pasan de `PLANOS_CONSULTAS_LENTAS_MS` se escriben en
+# el logger `planos.consultas_lentas` con:
+#   - la duración;
+#   - la huella del SQL (literales y listas de parámetros colapsados: la
+#     misma consulta con otros valores da la misma huella);
+#   - la vista que la pidió (método + nombre de la URL, p. ej.
+#     `PATCH plano-bulk`), que deja `ConsultasLentasMiddleware`;
+#   - el sitio de llamada: el primer marco de la pila que es código del
+#     proyecto (no Django ni DRF), p. ej. `planos/views.py:212 (bulk)`.
+# Además se acumulan por huella (veces, total, máximo) en memoria del
+# proceso; se ven en GET /api/metricas/consultas-lentas/ (solo staff).
+#
+# Una consulta rápida solo paga dos perf_counter y una comparación: la
+# huella y la pila se calculan únicamente para las lentas. El umbral se lee
+# de settings una vez (leer settings cuesta más que la propia medición) y
+# se vuelve a leer con la señal `setting_changed`.
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from . import metricas
+
+UMBRAL_MS = 200
+MAX_HUELLAS = 500  # las huellas nuevas a partir de aquí se cuentan en OTRAS
+OTRAS = "(otras)"
+
+logger = logging.getLogger("planos.consultas_lentas")
+
+_vista: ContextVar[Optional[str]] = ContextVar("planos_vista", default=None)
+_cerrojo = threading.Lock()
+_estadisticas: Dict[str, dict] = {}
+_umbral: Optional[float] = None
+
+_RAIZ = str(settings.BASE_DIR) + os.sep
+_ESTE_ARCHIVO = os.path.abspath(__file__)
+_AJENOS = (os.sep + "site-packages" + os.sep, os.sep + "dist-packages" + os.sep)
+
+_ESPACIOS = re.compile(r"\s+")
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_CASES = re.compile(r"(WHEN \([^()]*\) THEN \? )+")
+
+
+@lru_cache(maxsize=1024)
+def huella(sql: str) -> str:
+    """SQL sin valores: `IN (%s, %s)` y `IN (1, 2, 3)` quedan como `IN (...)`."""
+    sql = _ESPACIOS.sub(" ", sql).strip()
+    sql = _CADENAS.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _NUMEROS.sub("?", sql)
+    sql = _LISTAS.sub("(...)", sql)
+    return _CASES.sub("WHEN (...) THEN ? ", sql)
+
+
+def sitio_de_llamada(marco=None) -> str:
+    """Primer marco de la pila dentro del proyecto, fuera de este módulo."""
+    marco = marco or sys._getframe(1)
+    while marco is not None:
+        archivo = marco.f_code.co_filename
+        if (archivo.startswith(_RAIZ) and archivo != _ESTE_ARCHIVO
+                and not any(a in archivo for a in _AJENOS)):
+            return f"{archivo[len(_RAIZ):]}:{marco.f_lineno} ({marco.f_code.co_name})"
+        marco = marco.f_back
+    return "-"
+
+
+def configurar(**kwargs) -> None:
+    """Lee el umbral de settings; también es receptor de `setting_changed`."""
+    global _umbral
+    if kwargs.get("setting", "PLANOS_CONSULTAS_LENTAS_MS") == "PLANOS_CONSULTAS_LENTAS_MS":
+        _umbral = getattr(settings, "PLANOS_CONSULTAS_LENTAS_MS", UMBRAL_MS)
+
+
+def umbral_ms() -> Optional[float]:
+    return _umbral
+
+
+def registrar(execute, sql, params, many, context):
+    """`execute_wrapper` de Django: mide y, si pasa del umbral, registra."""
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        if _umbral is not None and ms >= _umbral:
+            _anotar(ms, sql, context["connection"].alias, sys._getframe(1))
+
+
+def _anotar(ms: float, sql: str, alias: str, marco) -> None:
+    clave = huella(sql)
+    vista = _vista.get() or "-"
+    sitio = sitio_de_llamada(marco)
+    logger.warning("%.1f ms [%s] %s · %s · %s", ms, alias, vista, sitio, clave,
+                   extra={"duracion_ms": ms, "huella": clave, "vista": vista,
+                          "sitio": sitio, "alias": alias})
+    metricas.incrementar("consultas_lentas.total")
+    with _cerrojo:
+        if clave not in _estadisticas and len(_estadisticas) >= MAX_HUELLAS:
+            clave = OTRAS
+        fila = _estadisticas.get(clave)
+        if fila is None:
+            fila = _estadisticas[clave] = {"huella": clave, "veces": 0, "total_ms": 0.0,
+                                           "max_ms": 0.0, "vistas": {}, "sitios": {}}
+        fila["veces"] += 1
+        fila["total_ms"] += ms
+        fila["max_ms"] = max(fila["max_ms"], ms)
+        fila["vistas"][vista] = fila["vistas"].get(vista, 0) + 1
+        fila["sitios"][sitio] = fila["sitios"].get(sitio, 0) + 1
+
+
+def instalar(connection, **kwargs) -> None:
+    """Receptor de `connection_created`: agrega el wrapper una sola vez."""
+    if registrar not in connection.execute_wrappers:
+        connection.execute_wrappers.append(registrar)
+
+
+def en_vista(nombre: Optional[str]):
+    """Deja `nombre` como vista actual; devuelve el token para `salir_de_vista`."""
+    return _vista.set(nombre)
+
+
+def salir_de_vista(token) -> None:
+    _vista.reset(token)
+
+
+def resumen() -> List[dict]:
+    """Estadísticas por huella, de mayor a menor tiempo total."""
+    with _cerrojo:
+        filas = [dict(f, vistas=dict(f["vistas"]), sitios=dict(f["sitios"]))
+                 for f in _estadisticas.values()]
+    for fila in filas:
+        fila["total_ms"] = round(fila["total_ms"], 1)
+        fila["max_ms"] = round(fila["max_ms"], 1)
+        fila["promedio_ms"] = round(fila["total_ms"] / fila["veces"], 1)
+    return sorted(filas, key=lambda f: f["total_ms"], reverse=True)
+
+
+def reiniciar() -> None:
+    with _cerrojo:
+        _estadisticas.clear()
@@ -0,0 +1,102 @@
+# 🔢 Conteos baratos para listas paginadas
+# COUNT(*) sobre una tabla de millones de filas recorre la tabla completa.
+# Estrategias (`?count=` en la API, ver planos/paginacion.py):
+#   - exact:    COUNT(*) de siempre.
+#   - estimate: exacto hasta LIMITE_CONTEO (COUNT(*) sobre SELECT ... LIMIT);
+#               por encima, una estimación. Sin filtros, el total de planos
+#               (con o sin archivados) sale de las tablas de resumen (exacto
+#               y O(grupos)); para otras
+#               tablas, de las estadísticas del motor (sqlite_stat1 tras
+#               ANALYZE, reltuples en PostgreSQL).
+#   - none:     sin total.
+
+from typing import Optional, Tuple
+
+from django.db import connections
+from django.db.models import Max, QuerySet, Sum
+
+from ..models import Plano, ResumenUsuarioTipo
+
+LIMITE_CONTEO = 10_000
+MUESTRA = 10_000  # filas más recientes usadas para estimar la selectividad
+ESTRATEGIAS = ("exact", "estimate", "none")
+
+
+def total_planos(incluir_archivados: bool = False) -> int:
+    sumas = ResumenUsuarioTipo.objects.aggregate(n=Sum("total"), a=Sum("archivados"))
+    return (sumas["n"] or 0) - (0 if incluir_archivados else sumas["a"] or 0)
+
+
+def sin_filtros(queryset: QuerySet) -> bool:
+    return not queryset.query.where and not queryset.query.is_sliced
+
+
+def filas_segun_estadisticas(queryset: QuerySet) -> Optional[int]:
+    """Filas de la tabla según las estadísticas del motor (None si no hay)."""
+    connection = connections[queryset.db]
+    tabla = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [tabla])
+            fila = cursor.fetchone()
+            return int(fila[0].split()[0]) if fila else None
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [tabla])
+            fila = cursor.fetchone()
+            return int(fila[0]) if fila and fila[0] >= 0 else None
+    return None
+
+
+def total_tabla(queryset: QuerySet) -> Tuple[int, bool]:
+    """`(filas, exacto)` de la tabla completa del modelo, sin COUNT(*) si se puede."""
+    if queryset.model is Plano:
+        # La única unión de planos es la de `?incluir_archivados=true`.
+        return total_planos(incluir_archivados=bool(queryset.query.combinator)), True
+    estimado = filas_segun_estadisticas(queryset)
+    if estimado is not None:
+        return estimado, False
+    return queryset.model._default_manager.using(queryset.db).count(), True
+
+
+def estimar_filtrado(queryset: QuerySet, total: int) -> Optional[int]:
+    """
+    Selectividad del filtro medida sobre las MUESTRA filas de pk más alto
+    (un rango del índice primario), aplicada al total de la tabla.
+    """
+    todas = queryset.model._default_manager.using(queryset.db)
+    maximo = todas.aggregate(m=Max("pk"))["m"]
+    if maximo is None:
+        return None
+    desde = maximo - MUESTRA
+    en_muestra = todas.filter(pk__gt=desde).count()
+    coinciden = queryset.order_by().filter(pk__gt=desde).count()
+    if not en_muestra or not coinciden:
+        return None
+    return round(total * coinciden / en_muestra)
+
+
+def contar(queryset: QuerySet, estrategia: str = "estimate",
+           limite: int = LIMITE_CONTEO) -> Tuple[Optional[int], bool]:
+    """Devuelve `(n, exacto)`; `n` es None con la estrategia "none"."""
+    if estrategia == "none":
+        return None, False
+    if estrategia == "exact":
+        return queryset.count(), True
+
+    if sin_filtros(queryset):
+        return total_tabla(queryset)
+    n = queryset.order_by()[:limite + 1].count()
+    if n <= limite:
+        return n, True
+    total, _ = total_tabla(queryset)
+    estimado = estimar_filtrado(queryset, total)
+    return max(estimado or 0, limite + 1), False
+
+
+def analizar(connection) -> None:
+    """Actualiza las estadísticas del planificador (sqlite_stat1 / reltuples)."""
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
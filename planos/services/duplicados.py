@@ -0,0 +1,245 @@
+# 🔍 Pre-chequeo de duplicados con un filtro de Bloom
+# Un plano es duplicado de otro si coinciden (titulo, descripcion, area,
+# subarea) normalizados como en `detectar_duplicados`; esa clave se guarda
+# resumida en `Plano.huella` (indexada).
+# El filtro vive en memoria del proceso y responde "seguro que no existe"
+# sin consultar la base; solo los "quizá" van al índice de `huella`.
+# Se construye con un recorrido de la tabla al arrancar el servidor
+# (`precalentar`, en un hilo) o, si no, la primera vez que se usa; mientras
+# se construye las búsquedas consultan el índice directamente. Se mantiene
+# con las escrituras del proceso; las altas y cambios de otros procesos se
+# incorporan como mucho una vez por `PLANOS_DUPLICADOS_REFRESCO_MS`
+# leyendo las filas con `modificado` posterior a la última marca vista menos
+# `PLANOS_CAMBIOS_MARGEN_MS` (el mismo margen del feed de cambios, para no
+# perder transacciones que confirman tarde). Las huellas viejas de filas
+# cambiadas o borradas quedan en el filtro: solo cuestan falsos positivos,
+# y desaparecen cuando se reconstruye al superar la capacidad.
+# Queda una ventana: un duplicado escrito por otro proceso no se ve hasta el
+# próximo refresco, y una transacción que tarda en confirmar más que el
+# margen puede quedar fuera hasta la reconstrucción. Como cualquier chequeo
+# previo al INSERT (sin restricción UNIQUE), dos altas simultáneas en
+# procesos distintos también pueden colarse.
+
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Max
+
+from ..models import Plano
+from . import cambios, metricas
+from .planos_logic import huella_duplicado
+
+TASA_FP = 0.01
+CAPACIDAD_MINIMA = 10_000
+LOTE_LECTURA = 5000
+REFRESCO_MS = 1000
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom sobre huellas de 64 bits (hex). Las k posiciones salen
+    de la propia huella por doble hashing: no hace falta otro hash.
+    """
+
+    def __init__(self, capacidad: int, tasa_fp: float = TASA_FP):
+        self.capacidad = max(1, capacidad)
+        self.bits = max(64, math.ceil(-self.capacidad * math.log(tasa_fp) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacidad * math.log(2)))
+        self.elementos = 0
+        self._tabla = bytearray((self.bits + 7) // 8)
+
+    def _posiciones(self, huella: str):
+        valor = int(huella, 16)
+        h1, h2 = valor & 0xFFFFFFFF, (valor >> 32) | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def agregar(self, huella: str) -> None:
+        # Solo cuenta si cambió algún bit: volver a agregar una huella (p. ej.
+        # al releer el margen del refresco) no infla `elementos`.
+        tabla = self._tabla
+        nuevo = False
+        for pos in self._posiciones(huella):
+            bit = 1 << (pos & 7)
+            if not tabla[pos >> 3] & bit:
+                tabla[pos >> 3] |= bit
+                nuevo = True
+        self.elementos += nuevo
+
+    def __contains__(self, huella: str) -> bool:
+        tabla = self._tabla
+        return all(tabla[pos >> 3] & (1 << (pos & 7)) for pos in self._posiciones(huella))
+
+    @property
+    def bytes(self) -> int:
+        return len(self._tabla)
+
+    def tasa_fp_estimada(self) -> float:
+        """(1 - e^(-k·n/m))^k con los elementos agregados hasta ahora."""
+        return (1 - math.exp(-self.hashes * self.elementos / self.bits)) ** self.hashes
+
+
+class IndiceDuplicados:
+    """Filtro del proceso más la marca de `modificado` ya incorporada."""
+
+    def __init__(self, tasa_fp: float = TASA_FP, refresco_ms: float = REFRESCO_MS,
+                 margen_ms: float = cambios.MARGEN_MS):
+        self.tasa_fp = tasa_fp
+        self.refresco = refresco_ms / 1000
+        self.margen = timedelta(milliseconds=margen_ms)
+        self.filtro: Optional[FiltroBloom] = None
+        self.marca = None
+        self.descartados = 0
+        self.falsos_positivos = 0
+        self._proximo_refresco = 0.0
+        self._construyendo = False
+        self._cerrojo = threading.Lock()
+
+    def reconstruir(self) -> None:
+        """
+        Recorre la tabla (en streaming) y arma un filtro nuevo. El recorrido
+        no toma el cerrojo: mientras tanto las búsquedas usan el filtro
+        anterior (o, si no hay, el índice de `huella`).
+        """
+        with self._cerrojo:
+            if self._construyendo:
+                return
+            self._construyendo = True
+        try:
+            # La marca se toma antes del recorrido: lo que cambie mientras
+            # tanto entra con el próximo refresco.
+            marca = Plano.objects.aggregate(m=Max("modificado"))["m"]
+            total = Plano.objects.count()
+            filtro = FiltroBloom(max(CAPACIDAD_MINIMA, 2 * total), self.tasa_fp)
+            filas = Plano.objects.values_list("huella", flat=True)
+            for huella in filas.iterator(chunk_size=LOTE_LECTURA):
+                if huella:
+                    filtro.agregar(huella)
+            with self._cerrojo:
+                self.filtro, self.marca = filtro, marca
+                self._proximo_refresco = 0.0  # recoge lo escrito durante el recorrido
+        finally:
+            self._construyendo = False
+        metricas.incrementar("duplicados.reconstrucciones")
+
+    def _al_dia(self) -> Optional[FiltroBloom]:
+        """Filtro al día, o None si todavía se está construyendo."""
+        if self.filtro is None:
+            self.reconstruir()
+        elif time.monotonic() >= self._proximo_refresco:
+            with self._cerrojo:
+                self._proximo_refresco = time.monotonic() + self.refresco
+                filas = Plano.objects.order_by("modificado", "pk")
+                if self.marca is not None:
+                    filas = filas.filter(modificado__gte=self.marca - self.margen)
+                for modificado, huella in filas.values_list("modificado", "huella").iterator(
+                        chunk_size=LOTE_LECTURA):
+                    if huella:
+                        self.filtro.agregar(huella)
+                    self.marca = max(self.marca or modificado, modificado)
+        filtro = self.filtro
+        if filtro is not None and filtro.elementos > filtro.capacidad:
+            self.reconstruir()  # superada la capacidad la tasa de FP se dispara
+        return self.filtro
+
+    def registrar(self, huellas: Iterable[str]) -> None:
+        """Huellas escritas por este proceso (altas y cambios)."""
+        if self.filtro is None:
+            return
+        with self._cerrojo:
+            for huella in huellas:
+                if huella:
+                    self.filtro.agregar(huella)
+
+    def buscar(self, datos: Dict, excluir_pk: Optional[int] = None) -> Optional[int]:
+        """
+        Id de un plano existente con la misma clave que `datos`, o None.
+        Solo consulta la base si el filtro dice "quizá".
+        """
+        huella = huella_duplicado(datos.get("titulo"), datos.get("descripcion"),
+                                  datos.get("area"), datos.get("subarea"))
+        filtro = self._al_dia()
+        if filtro is not None and huella not in filtro:
+            self.descartados += 1
+            metricas.incrementar("duplicados.descartados_sin_consulta")
+            return None
+
+        metricas.incrementar("duplicados.consultas")
+        candidatos = Plano.objects.filter(huella=huella)
+        if excluir_pk is not None:
+            candidatos = candidatos.exclude(pk=excluir_pk)
+        pk = candidatos.values_list("pk", flat=True).first()
+        if pk is None:
+            self.falsos_positivos += 1
+        metricas.incrementar("duplicados.encontrados" if pk else "duplicados.falsos_positivos")
+        return pk
+
+    def estado(self) -> Dict[str, float]:
+        if self.filtro is None:
+            return {}
+        nuevos = self.descartados + self.falsos_positivos
+        return {"elementos": self.filtro.elementos, "bytes": self.filtro.bytes,
+                "hashes": self.filtro.hashes,
+                "tasa_fp_estimada": round(self.filtro.tasa_fp_estimada(), 6),
+                "tasa_fp_observada": round(self.falsos_positivos / nuevos, 6) if nuevos else 0.0}
+
+
+_indice: Optional[IndiceDuplicados] = None
+_indice_cerrojo = threading.Lock()
+
+
+def activo() -> bool:
+    return getattr(settings, "PLANOS_RECHAZAR_DUPLICADOS", False)
+
+
+def indice() -> IndiceDuplicados:
+    """Índice del proceso, creado con los valores de settings."""
+    global _indice
+    with _indice_cerrojo:
+        if _indice is None:
+            _indice = IndiceDuplicados(
+                getattr(settings, "PLANOS_DUPLICADOS_TASA_FP", TASA_FP),
+                getattr(settings, "PLANOS_DUPLICADOS_REFRESCO_MS", REFRESCO_MS),
+                getattr(settings, "PLANOS_CAMBIOS_MARGEN_MS", cambios.MARGEN_MS))
+            metricas.registrar_fuente("duplicados", _indice.estado)
+        return _indice
+
+
+def buscar(datos: Dict, excluir_pk: Optional[int] = None) -> Optional[int]:
+    return indice().buscar(datos, excluir_pk)
+
+
+def registrar(huellas: Iterable[str]) -> None:
+    if _indice is not None:
+        _indice.registrar(huellas)
+
+
+def precalentar() -> Optional[threading.Thread]:
+    """
+    Construye el filtro en un hilo al arrancar el servidor (ver wsgi.py y
+    asgi.py), para que no lo pague la primera alta. No hace nada si el
+    pre-chequeo está desactivado.
+    """
+    if not activo():
+        return None
+
+    def construir():
+        try:
+            indice().reconstruir()
+        finally:
+            connections.close_all()  # las de este hilo
+
+    hilo = threading.Thread(target=construir, name="duplicados-precalentar", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def reiniciar() -> None:
+    """Descarta el filtro (se reconstruye con la próxima búsqueda)."""
+    global _indice
+    with _indice_cerrojo:
+        _indice = None
@@ -0,0 +1,169 @@
+# ✍️ Escritura agrupada (group commit) de planos nuevos
+# En SQLite cada POST es su propia transacción y su propio fsync; con varios
+# escritores a la vez se serializan y aparece "database is locked".
+# Con PLANOS_ESCRITURA_AGRUPADA = True los INSERT se encolan a un único hilo
+# escritor que los confirma en micro-lotes (hasta `max_lote` filas o
+# `max_espera_ms` milisegundos). Cada petición espera el resultado de su fila.
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+from ..models import Plano
+from . import resumenes
+
+MAX_LOTE = 64
+MAX_ESPERA_MS = 1.0
+TIMEOUT_RESPUESTA = 30.0
+
+_FIN = object()
+
+
+class EscritorAgrupado:
+    """
+    Hilo escritor con su propia conexión. Dentro de un lote cada fila va en
+    un savepoint: un error de integridad solo afecta a su propia petición.
+    """
+
+    def __init__(self, max_lote: int = MAX_LOTE, max_espera_ms: float = MAX_ESPERA_MS):
+        self.max_lote = max(1, max_lote)
+        self.max_espera = max(0.0, max_espera_ms) / 1000
+        self.lotes = 0
+        self.filas = 0
+        self._cola: "queue.Queue" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._cerrojo = threading.Lock()
+
+    def guardar(self, datos: Dict, timeout: float = TIMEOUT_RESPUESTA) -> Plano:
+        """
+        Encola `Plano(**datos)` y espera a que su lote se confirme. Si pasa
+        `timeout` y la fila sigue en la cola, se retira y se lanza
+        TimeoutError: no se guardará, así que el cliente puede reintentar
+        sin duplicarla. Si el escritor ya la tomó, se espera a su resultado.
+        """
+        self._arrancar()
+        futuro: Future = Future()
+        self._cola.put((datos, futuro))
+        try:
+            return futuro.result(timeout)
+        except TimeoutError:
+            if futuro.cancel():
+                raise
+            return futuro.result()
+
+    def detener(self) -> None:
+        """Confirma lo pendiente y termina el hilo."""
+        with self._cerrojo:
+            hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            self._cola.put(_FIN)
+            hilo.join()
+
+    def _arrancar(self) -> None:
+        if self._hilo is not None:
+            return
+        with self._cerrojo:
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._bucle, name="planos-escritor", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        ultimo = 0
+        try:
+            while True:
+                pedido = self._cola.get()
+                if pedido is _FIN:
+                    return
+                lote = [pedido]
+                # Solo se espera a más filas si el lote anterior tuvo compañía:
+                # un único cliente no paga `max_espera` en cada POST.
+                espera = self.max_espera if ultimo > 1 else 0.0
+                limite = time.monotonic() + espera
+                fin = False
+                while len(lote) < self.max_lote:
+                    restante = limite - time.monotonic()
+                    try:
+                        pedido = (self._cola.get(timeout=restante) if restante > 0
+                                  else self._cola.get_nowait())
+                    except queue.Empty:
+                        break
+                    if pedido is _FIN:
+                        fin = True
+                        break
+                    lote.append(pedido)
+                self._confirmar(lote)
+                ultimo = len(lote)
+                if fin:
+                    return
+        finally:
+            connections.close_all()
+
+    def _confirmar(self, lote: List[Tuple[Dict, Future]]) -> None:
+        hechos: List[Tuple[Plano, Future]] = []
+        try:
+            with transaction.atomic():
+                for datos, futuro in lote:
+                    if not futuro.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            plano = Plano.objects.create(**datos)
+                    except Exception as exc:
+                        futuro.set_exception(exc)
+                    else:
+                        hechos.append((plano, futuro))
+                resumenes.sumar(resumenes.fila_de(p) for p, _ in hechos)
+        except Exception as exc:
+            # Falló el COMMIT (o los resúmenes): ninguna fila quedó guardada.
+            connection.close_if_unusable_or_obsolete()
+            for _, futuro in hechos:
+                futuro.set_exception(exc)
+            return
+        self.lotes += 1
+        self.filas += len(hechos)
+        for plano, futuro in hechos:
+            futuro.set_result(plano)
+
+
+_escritor: Optional[EscritorAgrupado] = None
+_escritor_cerrojo = threading.Lock()
+
+
+def activo() -> bool:
+    """
+    ¿Usar el escritor agrupado? Solo si está habilitado y la petición no
+    está ya dentro de una transacción: el hilo escritor no vería sus filas
+    sin confirmar.
+    """
+    return (getattr(settings, "PLANOS_ESCRITURA_AGRUPADA", False)
+            and not connection.in_atomic_block)
+
+
+def escritor() -> EscritorAgrupado:
+    """Escritor del proceso, creado con los valores de settings."""
+    global _escritor
+    with _escritor_cerrojo:
+        if _escritor is None:
+            _escritor = EscritorAgrupado(
+                getattr(settings, "PLANOS_ESCRITURA_MAX_LOTE", MAX_LOTE),
+                getattr(settings, "PLANOS_ESCRITURA_MAX_ESPERA_MS", MAX_ESPERA_MS))
+        return _escritor
+
+
+def detener() -> None:
+    global _escritor
+    with _escritor_cerrojo:
+        actual, _escritor = _escritor, None
+    if actual is not None:
+        actual.detener()
+
+
+atexit.register(detener)
+
@@ -0,0 +1,353 @@
+# 📡 Canal de eventos (SSE) con los cambios de planos
+# Los tableros que sondeaban la lista cada pocos segundos se suscriben a
+# `GET /api/planos/eventos/` y reciben las altas/cambios, bajas y vaciados
+# cuando ocurren.
+#
+# Un único hilo publicador por proceso sondea el feed de cambios
+# (services/cambios.py), serializa cada cambio una sola vez y lo guarda ya
+# formateado en un historial acotado en memoria. Los suscriptores son
+# corutinas ASGI (sin hilo propio): por cada tanda nueva el publicador hace
+# una sola llamada a cada event loop, que despierta a todos sus suscriptores
+# y cada uno lee del historial. N suscriptores no son N consultas.
+#
+# Reanudación: el `id` de cada evento es el cursor del feed. Con
+# `Last-Event-ID` (o `?desde=`) se reenvía desde el historial si todavía lo
+# cubre y, si no, desde la base (lápidas incluidas) hasta alcanzarlo.
+# El publicador solo corre mientras hay suscriptores.
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from rest_framework.utils.encoders import JSONEncoder
+
+from ..serializers import PlanoSerializer
+from . import cambios, metricas
+from .cambios import Cursor
+from .planos_logic import normalizar_area_subarea
+
+INTERVALO_MS = 500
+HISTORIAL = 10_000
+LATIDO_S = 15.0
+REINTENTO_MS = 3000
+
+LATIDO = b": latido\n\n"
+
+
+class Evento(NamedTuple):
+    clave: Cursor
+    area: Optional[str]  # None en bajas y vaciados: van a todos los suscriptores
+    subarea: Optional[str]
+    datos: bytes  # bloque SSE listo para enviar
+
+
+def _comparables(area: Optional[str], subarea: Optional[str]) -> Tuple[str, str]:
+    """Área y subárea como las agrupan los resúmenes, sin distinguir mayúsculas."""
+    area, subarea = normalizar_area_subarea(area, subarea)
+    return area.casefold(), subarea.casefold()
+
+
+class Filtro(NamedTuple):
+    area: str = ""
+    subarea: str = ""
+
+    @classmethod
+    def de(cls, area: Optional[str], subarea: Optional[str]) -> "Filtro":
+        # Vacío es "sin filtro", no el "Área" por defecto de la normalización.
+        por_area, por_subarea = _comparables(area, subarea)
+        return cls(por_area if (area or "").strip() else "",
+                   por_subarea if (subarea or "").strip() else "")
+
+    def admite(self, evento: Evento) -> bool:
+        # Una baja solo trae el id: el cliente ignora los que no tiene.
+        if evento.area is None:
+            return True
+        return ((not self.area or evento.area == self.area)
+                and (not self.subarea or evento.subarea == self.subarea))
+
+
+def a_eventos(entradas) -> List[Evento]:
+    """Entradas de `cambios.leer` → eventos SSE (un serializador para toda la tanda)."""
+    datos = cambios.como_dicts(entradas, lambda filas: PlanoSerializer(filas, many=True).data)
+    eventos = []
+    for (clave, fila), entrada in zip(entradas, datos):
+        texto = json.dumps(entrada, cls=JSONEncoder, ensure_ascii=False)
+        bloque = f"id: {cambios.codificar(clave)}\nevent: {entrada['tipo']}\ndata: {texto}\n\n"
+        area, subarea = None, None
+        if entrada["tipo"] == "upsert":
+            area, subarea = _comparables(fila.area, fila.subarea)
+        eventos.append(Evento(clave, area, subarea, bloque.encode()))
+    return eventos
+
+
+def reintento() -> bytes:
+    """Primer bloque de cada respuesta: cada cuánto reconecta el navegador."""
+    return f"retry: {getattr(settings, 'PLANOS_EVENTOS_REINTENTO_MS', REINTENTO_MS)}\n\n".encode()
+
+
+def marca(clave: Cursor) -> bytes:
+    """Bloque sin datos: el navegador no dispara evento pero adopta el id."""
+    return f": posicion\nid: {cambios.codificar(clave)}\n\n".encode()
+
+
+def pendientes(cursor: Optional[Cursor], filtro: Filtro, limite: int = cambios.LIMITE_MAXIMO) -> bytes:
+    """
+    Respuesta finita (servidor WSGI): lo posterior a `cursor` leído de la base,
+    hasta `limite` cambios. El navegador reconecta con el último id; sin
+    cursor se empieza "desde ahora" y la respuesta solo lleva ese id. Si el
+    último cambio leído no pasa el filtro también se manda su id, para no
+    releerlo en la próxima conexión.
+    """
+    if cursor is None:
+        return reintento() + marca(cambios.ultimo())
+    entradas, _, _ = cambios.leer(cursor, limite)
+    leidos = a_eventos(entradas)
+    cuerpo = reintento() + b"".join(e.datos for e in leidos if filtro.admite(e))
+    if leidos and not filtro.admite(leidos[-1]):
+        cuerpo += marca(leidos[-1].clave)
+    return cuerpo
+
+
+# ------------------------------------------------------------
+# Publicador
+# ------------------------------------------------------------
+
+class _Difusor:
+    """Suscriptores de un event loop; se despiertan todos con un solo futuro."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.futuro = loop.create_future()
+        self.suscriptores = 0
+
+    def despertar(self) -> None:  # corre dentro del loop
+        futuro, self.futuro = self.futuro, self.loop.create_future()
+        futuro.set_result(None)
+
+
+class Suscripcion:
+    """Posición de un suscriptor: última clave enviada y secuencia en el historial."""
+
+    def __init__(self, publicador: "Publicador", difusor: _Difusor, clave: Cursor,
+                 secuencia: Optional[int]):
+        self.publicador = publicador
+        self.difusor = difusor
+        self.clave = clave
+        self.secuencia = secuencia  # None: fuera del historial, se lee de la base
+
+    def _desde_base(self, filtro: Filtro) -> bytes:
+        entradas, self.clave, hay_mas = cambios.leer(self.clave, cambios.LIMITE)
+        if not hay_mas:
+            self.secuencia = self.publicador.posicion(self.clave, forzar=True)
+        metricas.incrementar("eventos.lecturas_base")
+        return b"".join(e.datos for e in a_eventos(entradas) if filtro.admite(e))
+
+    async def bloques(self, filtro: Filtro, latido: float) -> AsyncIterator[bytes]:
+        while True:
+            if self.secuencia is None:
+                datos = await sync_to_async(self._desde_base)(filtro)
+                if datos:
+                    yield datos
+                continue
+
+            nuevos, self.secuencia = self.publicador.leer(self.secuencia)
+            if nuevos is None:
+                continue  # el historial avanzó más que este suscriptor
+            clave = self.clave
+            datos = b"".join(e.datos for e in nuevos if e.clave > clave and filtro.admite(e))
+            if nuevos:
+                self.clave = max(clave, nuevos[-1].clave)
+            if datos:
+                yield datos
+            elif not nuevos:
+                hechos, _ = await asyncio.wait({self.difusor.futuro}, timeout=latido)
+                if not hechos:
+                    yield LATIDO
+
+
+class Publicador:
+    """
+    Hilo que sondea `cambios.leer` cada `intervalo_ms` mientras haya
+    suscriptores y guarda los eventos en un historial de `historial` entradas.
+    """
+
+    def __init__(self, intervalo_ms: float = INTERVALO_MS, historial: int = HISTORIAL,
+                 hilo: bool = True):
+        self.intervalo = max(0.0, intervalo_ms) / 1000
+        self.eventos: deque = deque(maxlen=max(1, historial))
+        self.base = 0  # secuencia del primer evento de `eventos`
+        self.inicio: Optional[Cursor] = None  # el historial cubre todo lo posterior
+        self.cursor: Optional[Cursor] = None  # último cambio publicado
+        self.sondeos = 0
+        self.publicados = 0
+        self.con_hilo = hilo
+        self._difusores: Dict[asyncio.AbstractEventLoop, _Difusor] = {}
+        self._cerrojo = threading.Lock()
+        self._hay_suscriptores = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def siguiente(self) -> int:
+        return self.base + len(self.eventos)
+
+    @property
+    def suscriptores(self) -> int:
+        return sum(d.suscriptores for d in self._difusores.values())
+
+    def suscribir(self, loop: asyncio.AbstractEventLoop, desde: Optional[Cursor]) -> Suscripcion:
+        """Sin `desde` empieza por el próximo cambio. Consulta la base: llamar fuera del loop."""
+        with self._cerrojo:
+            if self.cursor is None:
+                self.cursor = self.inicio = cambios.ultimo()
+            difusor = self._difusores.get(loop)
+            if difusor is None:
+                difusor = self._difusores[loop] = _Difusor(loop)
+            difusor.suscriptores += 1
+            self._hay_suscriptores.set()
+            if desde is None:
+                suscripcion = Suscripcion(self, difusor, self.cursor, self.siguiente)
+        self._arrancar()
+        if desde is None:
+            return suscripcion
+        return Suscripcion(self, difusor, desde, self.posicion(desde))
+
+    def desuscribir(self, suscripcion: Suscripcion) -> None:
+        with self._cerrojo:
+            difusor = suscripcion.difusor
+            difusor.suscriptores -= 1
+            if not difusor.suscriptores:
+                self._difusores.pop(difusor.loop, None)
+            if not self._difusores:
+                self._hay_suscriptores.clear()
+
+    def posicion(self, clave: Cursor, forzar: bool = False) -> Optional[int]:
+        """
+        Secuencia desde la que leer para no perder nada posterior a `clave`,
+        o None si el historial ya no la cubre (con `forzar`, su comienzo).
+        """
+        with self._cerrojo:
+            if self.inicio is None or clave < self.inicio:
+                return self.base if forzar else None
+            secuencia = self.siguiente
+            for evento in reversed(self.eventos):
+                if evento.clave <= clave:
+                    break
+                secuencia -= 1
+            return secuencia
+
+    def leer(self, secuencia: int) -> Tuple[Optional[List[Evento]], Optional[int]]:
+        """Eventos desde `secuencia`; (None, None) si ya salieron del historial."""
+        with self._cerrojo:
+            if secuencia < self.base:
+                return None, None
+            return list(islice(self.eventos, secuencia - self.base, None)), self.siguiente
+
+    def sondear(self) -> int:
+        """Publica los cambios nuevos y despierta a los suscriptores. Devuelve cuántos hubo."""
+        if self.cursor is None:
+            return 0
+        self.sondeos += 1
+        publicados = 0
+        while True:
+            entradas, cursor, hay_mas = cambios.leer(self.cursor, cambios.LIMITE_MAXIMO)
+            nuevos = a_eventos(entradas)
+            with self._cerrojo:
+                for evento in nuevos:
+                    if len(self.eventos) == self.eventos.maxlen:
+                        self.inicio = self.eventos[0].clave
+                        self.base += 1
+                    self.eventos.append(evento)
+                self.cursor = cursor
+            publicados += len(nuevos)
+            if not hay_mas:
+                break
+        if publicados:
+            self.publicados += publicados
+            metricas.incrementar("eventos.publicados", publicados)
+            self._despertar()
+        return publicados
+
+    def _despertar(self) -> None:
+        with self._cerrojo:
+            difusores = list(self._difusores.values())
+        for difusor in difusores:
+            try:
+                difusor.loop.call_soon_threadsafe(difusor.despertar)
+            except RuntimeError:  # loop cerrado
+                pass
+
+    def _reiniciar(self) -> None:
+        """Sin suscriptores: se olvida el historial y se vuelve a empezar desde ahora."""
+        with self._cerrojo:
+            if not self._difusores:
+                self.eventos.clear()
+                self.cursor = self.inicio = None
+
+    def _arrancar(self) -> None:
+        if not self.con_hilo or self._hilo is not None:
+            return
+        with self._cerrojo:
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._bucle, name="planos-eventos", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            if not self._hay_suscriptores.is_set():
+                self._reiniciar()
+                connection.close()
+                self._hay_suscriptores.wait()
+            try:
+                self.sondear()
+            except Exception:
+                metricas.incrementar("eventos.errores")
+                connection.close()
+            time.sleep(self.intervalo)
+
+    def estado(self) -> Dict[str, int]:
+        return {"suscriptores": self.suscriptores, "bucles": len(self._difusores),
+                "historial": len(self.eventos), "sondeos": self.sondeos,
+                "publicados": self.publicados}
+
+
+_publicador: Optional[Publicador] = None
+_publicador_cerrojo = threading.Lock()
+
+
+def publicador() -> Publicador:
+    """Publicador del proceso, creado con los valores de settings."""
+    global _publicador
+    with _publicador_cerrojo:
+        if _publicador is None:
+            _publicador = Publicador(
+                getattr(settings, "PLANOS_EVENTOS_INTERVALO_MS", INTERVALO_MS),
+                getattr(settings, "PLANOS_EVENTOS_HISTORIAL", HISTORIAL))
+            metricas.registrar_fuente("eventos", _publicador.estado)
+        return _publicador
+
+
+async def transmitir(desde: Optional[Cursor], filtro: Filtro,
+                     fuente: Optional[Publicador] = None) -> AsyncIterator[bytes]:
+    """Cuerpo de la respuesta SSE (ASGI): no termina hasta que el cliente se va."""
+    fuente = fuente or publicador()
+    yield reintento()
+    suscripcion = await sync_to_async(fuente.suscribir)(asyncio.get_running_loop(), desde)
+    metricas.incrementar("eventos.conexiones")
+    if desde is None:
+        # Si la conexión se corta antes del primer evento, el navegador
+        # reconecta desde aquí y no desde un "ahora" posterior.
+        yield marca(suscripcion.clave)
+    try:
+        latido = getattr(settings, "PLANOS_EVENTOS_LATIDO_S", LATIDO_S)
+        async for bloque in suscripcion.bloques(filtro, latido):
+            yield bloque
+    finally:
+        fuente.desuscribir(suscripcion)
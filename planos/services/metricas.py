@@ -0,0 +1,37 @@
+# 📈 Registro de métricas del proceso (contadores y valores instantáneos)
+# Lo alimentan los middlewares y servicios; se expone en GET /api/metricas/
+# (solo staff). Los valores son por proceso: con varios workers, cada uno
+# reporta los suyos.
+
+import threading
+from collections import defaultdict
+from typing import Callable, Dict
+
+_cerrojo = threading.Lock()
+_contadores: Dict[str, float] = defaultdict(float)
+_fuentes: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+
+def incrementar(nombre: str, valor: float = 1) -> None:
+    with _cerrojo:
+        _contadores[nombre] += valor
+
+
+def registrar_fuente(prefijo: str, funcion: Callable[[], Dict[str, float]]) -> None:
+    """`funcion()` se evalúa al leer las métricas (p. ej. profundidad de cola)."""
+    _fuentes[prefijo] = funcion
+
+
+def instantanea() -> Dict[str, float]:
+    with _cerrojo:
+        datos = dict(_contadores)
+    for prefijo, funcion in list(_fuentes.items()):
+        for nombre, valor in funcion().items():
+            datos[f"{prefijo}.{nombre}"] = valor
+    return dict(sorted(datos.items()))
+
+
+def reiniciar() -> None:
+    """Pone a cero los contadores (las fuentes se mantienen)."""
+    with _cerrojo:
+        _contadores.clear()
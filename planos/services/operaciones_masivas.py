@@ -0,0 +1,322 @@
+# 📦 Operaciones masivas sobre Planos (ingesta idempotente)
+# Trabajan directamente en la base de datos, por lotes, para no pagar
+# una petición HTTP ni una transacción por cada fila.
+
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from usuarios.cache import resolver_usuarios
+
+from ..models import Plano, PlanoArchivado
+from . import cambios as feed
+from . import archivo, duplicados, resumenes
+from .planos_logic import errores_lote, validar_planos_lote
+
+TAMANO_LOTE = 500
+MAX_ERRORES_REPORTADOS = 20
+CLAVE_BLOQUEO_UPSERT = 0x706C616E  # pg_advisory_xact_lock de `upsert_planos`
+
+CAMPOS_UPSERT = ("titulo", "descripcion", "area", "subarea")
+# Columnas que entran en `Plano.huella`.
+CAMPOS_HUELLA = ("titulo", "descripcion", "area", "subarea")
+# Largo máximo de cada columna de texto (SQLite no lo hace cumplir).
+LARGOS_MAXIMOS = {c: Plano._meta.get_field(c).max_length
+                  for c in (*CAMPOS_UPSERT, "referencia_externa")
+                  if Plano._meta.get_field(c).max_length}
+
+
+def _limpiar(valor):
+    return valor.strip() if isinstance(valor, str) else valor
+
+
+def _es_id(valor) -> bool:
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def validar_filas_upsert(filas: List[Dict]) -> Dict[int, List[str]]:
+    """
+    Valida un lote completo para `upsert_planos`.
+    Devuelve `{indice: [mensajes]}` (vacío si todo es válido); solo se
+    renderizan los mensajes de las primeras filas con error.
+    """
+    errores: Dict[int, List[str]] = {}
+    for i, fila in enumerate(filas):
+        if not isinstance(fila, dict) or not _es_id(fila.get("subido_por")) or not all(
+                isinstance(fila.get(c) or "", str)
+                for c in (*CAMPOS_UPSERT, "referencia_externa")):
+            errores[i] = ["Formato de fila inválido."]
+    if errores:
+        return errores
+
+    codigos = validar_planos_lote(filas)
+    for i, mensajes in errores_lote(codigos, limite=MAX_ERRORES_REPORTADOS):
+        errores[i] = mensajes
+
+    existentes = resolver_usuarios(f["subido_por"] for f in filas)
+
+    vistas = set()
+    for i, fila in enumerate(filas):
+        if len(errores) >= MAX_ERRORES_REPORTADOS:
+            break
+        ref = _limpiar(fila.get("referencia_externa"))
+        if not ref:
+            errores.setdefault(i, []).append(
+                "El campo referencia_externa es obligatorio.")
+        elif ref in vistas:
+            errores.setdefault(i, []).append(
+                "La referencia_externa está repetida en el lote.")
+        vistas.add(ref)
+        for campo, maximo in LARGOS_MAXIMOS.items():
+            if len(_limpiar(fila.get(campo) or "")) > maximo:
+                errores.setdefault(i, []).append(
+                    f"El campo {campo} admite como máximo {maximo} caracteres.")
+        if fila["subido_por"] not in existentes:
+            errores.setdefault(i, []).append(
+                "El usuario indicado en subido_por no existe.")
+    return errores
+
+
+def _bloquear_upserts() -> None:
+    """
+    Serializa los upserts hasta el fin de la transacción. `select_for_update`
+    no bloquea referencias que aún no existen: sin esto, dos lotes con la
+    misma referencia nueva la contarían los dos como creada. En SQLite no
+    hace falta: hay un solo escritor y, si otro confirmó entre la lectura y
+    la escritura, la transacción falla con "database is locked" en vez de
+    contar mal.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CLAVE_BLOQUEO_UPSERT])
+
+
+def upsert_planos(filas: List[Dict], tamano_lote: int = TAMANO_LOTE) -> Dict[str, int]:
+    """
+    Inserta o actualiza planos usando `referencia_externa` como clave.
+    Las filas se asumen validadas con `validar_filas_upsert`.
+
+    Por cada lote se leen las filas existentes en una sola consulta; las
+    que no cambian se omiten, de modo que reenviar el mismo lote no
+    escribe nada. El resto va en un único `INSERT ... ON CONFLICT DO UPDATE`.
+    Una referencia archivada que cambia vuelve antes a la tabla caliente
+    (`archivo.desarchivar`), con su id y su fecha.
+    """
+    resultado = {"recibidos": len(filas), "creados": 0,
+                 "actualizados": 0, "sin_cambios": 0}
+
+    for inicio in range(0, len(filas), tamano_lote):
+        lote = filas[inicio:inicio + tamano_lote]
+        por_ref = {_limpiar(f["referencia_externa"]): f for f in lote}
+
+        with transaction.atomic():
+            _bloquear_upserts()
+            # Dentro de la transacción y con las filas bloqueadas: así los
+            # contadores de creados y los resúmenes parten del estado real.
+            actuales = {
+                ref: tuple(resto) for ref, *resto in Plano.objects.select_for_update().filter(
+                    referencia_externa__in=list(por_ref)
+                ).values_list("referencia_externa", *CAMPOS_UPSERT, "subido_por_id")
+            }
+            # La referencia también puede estar en el archivo: si cambia, el
+            # plano vuelve a la tabla caliente y se actualiza ahí.
+            archivadas = {
+                ref: tuple(resto) for ref, *resto in PlanoArchivado.objects.filter(
+                    referencia_externa__in=[r for r in por_ref if r not in actuales]
+                ).values_list("referencia_externa", *CAMPOS_UPSERT, "subido_por_id")
+            }
+
+            pendientes, antes, despues, a_desarchivar = [], [], [], []
+            for ref, fila in por_ref.items():
+                valores = tuple(_limpiar(fila.get(c) or "") for c in CAMPOS_UPSERT)
+                valores += (fila["subido_por"],)
+                previo = actuales.get(ref) or archivadas.get(ref)
+                if previo == valores:
+                    resultado["sin_cambios"] += 1
+                    continue
+                resultado["actualizados" if previo else "creados"] += 1
+                if ref in archivadas:
+                    a_desarchivar.append(ref)
+                plano = Plano(
+                    referencia_externa=ref,
+                    subido_por_id=fila["subido_por"],
+                    **dict(zip(CAMPOS_UPSERT, valores)),
+                )
+                plano.huella = plano.calcular_huella()
+                pendientes.append(plano)
+                despues.append(resumenes.fila_de(plano))
+                if previo:
+                    _, descripcion, area, subarea, uid = previo
+                    antes.append((uid, descripcion, area, subarea))
+
+            if a_desarchivar:
+                archivo.desarchivar(a_desarchivar)
+            if pendientes:
+                Plano.objects.bulk_create(
+                    pendientes,
+                    update_conflicts=True,
+                    unique_fields=["referencia_externa"],
+                    update_fields=[*CAMPOS_UPSERT, "subido_por", "huella", "modificado"],
+                )
+                resumenes.mover(antes, despues)
+        duplicados.registrar(p.huella for p in pendientes)
+
+    return resultado
+
+
+FILTROS_MASIVOS = ("area", "subarea", "subido_por", "desde", "hasta", "ids")
+
+
+def _rango_fecha(campo: str, texto: str) -> Optional[Dict]:
+    """
+    Filtro sobre `fecha_subida` para `desde`/`hasta`. Una fecha sin hora
+    abarca el día completo (`hasta=2024-05-10` incluye todo el 10) y una
+    fecha-hora sin zona se toma en la zona de settings.TIME_ZONE.
+    """
+    try:
+        # parse_datetime también acepta "AAAA-MM-DD": la fecha sola va primero.
+        fecha = parse_date(texto)
+        momento = None if fecha else parse_datetime(texto)
+    except ValueError:
+        return None
+    if momento is not None:
+        if timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        return {"fecha_subida__gte" if campo == "desde" else "fecha_subida__lte": momento}
+    if fecha is None:
+        return None
+    if campo == "hasta":
+        fecha += timedelta(days=1)
+    inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    return {"fecha_subida__gte" if campo == "desde" else "fecha_subida__lt": inicio}
+
+
+def filtrar_planos(queryset: QuerySet, params) -> Tuple[QuerySet, Dict[str, str]]:
+    """
+    Aplica los filtros de las operaciones masivas:
+      - area, subarea: coincidencia exacta.
+      - subido_por: id de usuario.
+      - desde, hasta: rango sobre `fecha_subida` (fecha o fecha-hora ISO;
+        con fecha sola, `hasta` incluye ese día completo).
+      - ids: lista separada por comas.
+    Devuelve `(queryset, errores)`.
+    """
+    errores: Dict[str, str] = {}
+
+    for campo in ("area", "subarea"):
+        if params.get(campo):
+            queryset = queryset.filter(**{campo: params[campo]})
+
+    if params.get("subido_por"):
+        if str(params["subido_por"]).isdigit():
+            queryset = queryset.filter(subido_por_id=int(params["subido_por"]))
+        else:
+            errores["subido_por"] = "Debe ser un id numérico."
+
+    for campo in ("desde", "hasta"):
+        if params.get(campo):
+            filtro = _rango_fecha(campo, params[campo])
+            if filtro is None:
+                errores[campo] = "Fecha inválida (use AAAA-MM-DD o ISO 8601)."
+            else:
+                queryset = queryset.filter(**filtro)
+
+    if params.get("ids"):
+        partes = [p.strip() for p in str(params["ids"]).split(",") if p.strip()]
+        if all(p.isdigit() for p in partes):
+            queryset = queryset.filter(pk__in=[int(p) for p in partes])
+        else:
+            errores["ids"] = "Debe ser una lista de ids separada por comas."
+
+    return queryset, errores
+
+
+def actualizar_masivo(queryset: QuerySet, cambios: Dict,
+                      tamano_lote: int = TAMANO_LOTE) -> int:
+    """
+    Un único `UPDATE ... WHERE` en la base de datos. Si los cambios afectan
+    a los resúmenes (usuario, descripción, área o subárea) o a la huella de
+    duplicados (además, el título) se actualiza por lotes de ids para poder
+    mover los contadores y recalcular la huella de cada fila.
+    """
+    campos = {("subido_por_id" if c == "subido_por" else c) for c in cambios}
+    # UPDATE no aplica auto_now: sin `modificado` el feed de cambios no
+    # vería la fila. Se fija por lote y dentro de su transacción, ya con el
+    # bloqueo de escritura tomado (ver `cambios`).
+    if not campos & (set(resumenes.CAMPOS_RESUMEN) | set(CAMPOS_HUELLA)):
+        with transaction.atomic():
+            return queryset.update(**cambios, modificado=timezone.now())
+
+    nuevos = {c: (v.pk if c == "subido_por" else v) for c, v in cambios.items()}
+    total, ultimo = 0, 0
+    while True:
+        # Se avanza por pk: tras el UPDATE la fila puede dejar de cumplir el filtro.
+        ids = list(queryset.filter(pk__gt=ultimo).order_by("pk").values_list(
+            "pk", flat=True)[:tamano_lote])
+        if not ids:
+            return total
+        ultimo = ids[-1]
+        with transaction.atomic():
+            # El estado previo se relee bloqueado: otra escritura entre la
+            # elección de ids y el UPDATE descuadraría los resúmenes.
+            filas = list(queryset.select_for_update().filter(pk__in=ids)
+                         .values_list("pk", "titulo", *resumenes.CAMPOS_RESUMEN))
+            antes = [fila[2:] for fila in filas]
+            despues = [(
+                nuevos.get("subido_por", uid), nuevos.get("descripcion", descripcion),
+                nuevos.get("area", area), nuevos.get("subarea", subarea),
+            ) for uid, descripcion, area, subarea in antes]
+            con_huella = []
+            if campos & set(CAMPOS_HUELLA):
+                for (pk, titulo, *_), (_, descripcion, area, subarea) in zip(filas, despues):
+                    plano = Plano(pk=pk, titulo=nuevos.get("titulo", titulo),
+                                  descripcion=descripcion, area=area, subarea=subarea)
+                    plano.huella = plano.calcular_huella()
+                    con_huella.append(plano)
+            total += Plano.objects.filter(pk__in=[f[0] for f in filas]).update(
+                **cambios, modificado=timezone.now())
+            if con_huella:
+                Plano.objects.bulk_update(con_huella, ["huella"])
+            resumenes.mover(antes, despues)
+        duplicados.registrar(p.huella for p in con_huella)
+
+
+def eliminar_masivo(queryset: QuerySet, tamano_lote: int = TAMANO_LOTE,
+                    al_avanzar: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Elimina por lotes de ids para no mantener un bloqueo de escritura
+    largo sobre la tabla (SQLite bloquea la base completa).
+    `al_avanzar(total)` se llama tras cada lote.
+    """
+    total = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:tamano_lote])
+        if not ids:
+            return total
+        with transaction.atomic():
+            # Releídas y bloqueadas: una fila que otro borró o cambió entre
+            # tanto no se resta dos veces ni con valores viejos.
+            filas = list(queryset.select_for_update().filter(pk__in=ids)
+                         .values_list("pk", *resumenes.CAMPOS_RESUMEN))
+            _, detalles = Plano.objects.filter(pk__in=[f[0] for f in filas]).delete()
+            resumenes.restar(f[1:] for f in filas)
+            feed.registrar_bajas(f[0] for f in filas)
+        total += detalles.get(Plano._meta.label, 0)
+        if al_avanzar:
+            al_avanzar(total)
+
+
+def eliminar_todos() -> Tuple[int, Dict[str, int]]:
+    """
+    Vacía la tabla de planos, el archivo y los resúmenes en una sola
+    transacción. Devuelve lo mismo que `QuerySet.delete()`.
+    """
+    with transaction.atomic():
+        resultado = Plano.objects.all().delete()
+        PlanoArchivado.objects.all().delete()
+        resumenes.reiniciar()
+        feed.registrar_vaciado()
+    return resultado
@@ -1,8 +1,14 @@
 # 💡 Lógica de negocio para la app de Planos
 # Modelo actual (obligatorio): titulo, descripcion, subido_por, area, subarea
 
+import hashlib
+import re
+import sys
+from array import array
 from collections import Counter
-from typing import List, Dict, Tuple
+from enum import IntFlag
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 REGLAS = {
     "criticas": ("incendio", "colapso", "riesgo"),
@@ -29,7 +35,7 @@ def verificar_titulo_valido(titulo: str) -> bool:
     return len(titulo.strip()) >= 5
 
 
-def contar_planos_por_usuario(planos: List[Dict], id_usuario: int) -> int:
+def contar_planos_por_usuario(planos: "Planos", id_usuario: int) -> int:
     """
     2. Contar planos por usuario
     -----------------------------
@@ -40,10 +46,12 @@ def contar_planos_por_usuario(planos: List[Dict], id_usuario: int) -> int:
       planos = [{"subido_por": 1}, {"subido_por": 2}, {"subido_por": 1}]
       contar_planos_por_usuario(planos, 1) → 2
     """
+    if _son_registros(planos):
+        return sum(1 for r in planos if r.subido_por == id_usuario)
     return sum(1 for p in planos if p.get("subido_por") == id_usuario)
 
 
-def clasificar_planos(planos: List[Dict]) -> List[Dict]:
+def clasificar_planos(planos: "Planos") -> List[Dict]:
     """
     3. Clasificar planos por tipo
     -----------------------------
@@ -60,25 +68,109 @@ def clasificar_planos(planos: List[Dict]) -> List[Dict]:
       ])
       → [{"titulo": "T1", "tipo": "Eléctrico"}, {"titulo": "T2", "tipo": "Arquitectónico"}]
     """
+    if _son_registros(planos):
+        return [{"titulo": r.titulo, "tipo": _tipo_por_texto(r.descripcion_norm, r.area_norm)}
+                for r in planos]
+
     clasificados = []
     for p in planos:
         desc = (p.get("descripcion") or "").strip().lower()
         area_txt = (p.get("area") or "").strip().lower()
+        clasificados.append({"titulo": p.get("titulo"), "tipo": _tipo_por_texto(desc, area_txt)})
 
-        if ("eléctrico" in desc or "electrico" in desc or
-                "eléctrico" in area_txt or "electrico" in area_txt):
-            tipo = "Eléctrico"
-        elif ("arquitectónico" in desc or "arquitectonico" in desc or
-              "arquitectónico" in area_txt or "arquitectonico" in area_txt):
-            tipo = "Arquitectónico"
-        elif "estructural" in desc or "estructural" in area_txt:
-            tipo = "Estructural"
-        else:
-            tipo = "General"
+    return clasificados
 
-        clasificados.append({"titulo": p.get("titulo"), "tipo": tipo})
 
-    return clasificados
+class ErrorPlano(IntFlag):
+    """
+    Códigos compactos de error de validación (uno por bit).
+    El orden de los bits es el mismo orden en que `validar_plano_data`
+    reporta los mensajes, así el renderizado conserva la secuencia.
+    """
+    TITULO_CORTO = 1
+    TITULO_NUMERICO = 2
+    DESCRIPCION_CORTA = 4
+    CONTENIDO_PROHIBIDO = 8
+    AREA_VACIA = 16
+    AREA_CORTA = 32
+    SUBAREA_VACIA = 64
+    SUBAREA_CORTA = 128
+
+
+_MENSAJES_ERROR = (
+    (ErrorPlano.TITULO_CORTO, "El título debe tener al menos 3 caracteres."),
+    (ErrorPlano.TITULO_NUMERICO, "El título no puede ser solo números."),
+    (ErrorPlano.DESCRIPCION_CORTA,
+     "La descripción es demasiado corta (mínimo {min_desc} caracteres)."),
+    (ErrorPlano.CONTENIDO_PROHIBIDO, "El contenido incluye palabras no permitidas."),
+    (ErrorPlano.AREA_VACIA, "El campo área es obligatorio."),
+    (ErrorPlano.AREA_CORTA, "El campo área debe tener al menos 3 caracteres."),
+    (ErrorPlano.SUBAREA_VACIA, "El campo subárea es obligatorio."),
+    (ErrorPlano.SUBAREA_CORTA, "El campo subárea debe tener al menos 3 caracteres."),
+)
+
+# Un único matcher compilado para todas las palabras prohibidas.
+_PROHIBIDAS_RE = re.compile(
+    "|".join(re.escape(p) for p in REGLAS["prohibidas"]))
+
+
+def codigo_error_plano(data: Dict, min_desc: int = 10) -> int:
+    """
+    ✅ 4.1 Código de error de un plano (sin construir mensajes)
+    -----------------------------------------------------------
+    Aplica las mismas reglas que `validar_plano_data`, pero devuelve un
+    entero con los bits de `ErrorPlano` activos (0 = válido).
+
+    Ejemplo:
+      codigo_error_plano({"titulo": "12", "area": "Prod", "subarea": "L1"})
+      → ErrorPlano.TITULO_CORTO | ErrorPlano.TITULO_NUMERICO | ErrorPlano.SUBAREA_CORTA
+    """
+    codigo = 0
+
+    titulo = (data.get("titulo") or "").strip()
+    descripcion = (data.get("descripcion") or "").strip()
+    area = (data.get("area") or "").strip()
+    subarea = (data.get("subarea") or "").strip()
+
+    if len(titulo) < 3:
+        codigo |= ErrorPlano.TITULO_CORTO
+    if titulo.isdigit():
+        codigo |= ErrorPlano.TITULO_NUMERICO
+
+    if descripcion and len(descripcion) < min_desc:
+        codigo |= ErrorPlano.DESCRIPCION_CORTA
+
+    if (_PROHIBIDAS_RE.search(titulo.lower()) or
+            _PROHIBIDAS_RE.search(descripcion.lower())):
+        codigo |= ErrorPlano.CONTENIDO_PROHIBIDO
+
+    if not area:
+        codigo |= ErrorPlano.AREA_VACIA
+    elif len(area) < 3:
+        codigo |= ErrorPlano.AREA_CORTA
+
+    if not subarea:
+        codigo |= ErrorPlano.SUBAREA_VACIA
+    elif len(subarea) < 3:
+        codigo |= ErrorPlano.SUBAREA_CORTA
+
+    return int(codigo)
+
+
+@lru_cache(maxsize=512)
+def _mensajes_error(codigo: int, min_desc: int) -> Tuple[str, ...]:
+    return tuple(
+        msg.format(min_desc=min_desc) if bit is ErrorPlano.DESCRIPCION_CORTA else msg
+        for bit, msg in _MENSAJES_ERROR if codigo & bit
+    )
+
+
+def mensajes_error(codigo: int, min_desc: int = 10) -> List[str]:
+    """
+    Renderiza los mensajes legibles de un código de error.
+    Los textos son idénticos a los de `validar_plano_data`.
+    """
+    return list(_mensajes_error(int(codigo), min_desc))
 
 
 def validar_plano_data(data: Dict, min_desc: int = 10) -> Tuple[bool, List[str]]:
@@ -109,41 +201,44 @@ def validar_plano_data(data: Dict, min_desc: int = 10) -> Tuple[bool, List[str]]
            "El campo subárea es obligatorio."
          ])
     """
-    errores: List[str] = []
+    codigo = codigo_error_plano(data, min_desc)
+    if not codigo:
+        return (True, [])
+    return (False, mensajes_error(codigo, min_desc))
 
-    titulo = (data.get("titulo") or "").strip()
-    descripcion = (data.get("descripcion") or "").strip()
-    area = (data.get("area") or "").strip()
-    subarea = (data.get("subarea") or "").strip()
 
-    # Título
-    if len(titulo) < 3:
-        errores.append("El título debe tener al menos 3 caracteres.")
-    if titulo.isdigit():
-        errores.append("El título no puede ser solo números.")
-
-    # Descripción (si viene)
-    if descripcion and len(descripcion) < min_desc:
-        errores.append(
-            f"La descripción es demasiado corta (mínimo {min_desc} caracteres).")
-
-    # Contenido prohibido
-    tit_low, desc_low = titulo.lower(), descripcion.lower()
-    if any(p in tit_low or p in desc_low for p in REGLAS["prohibidas"]):
-        errores.append("El contenido incluye palabras no permitidas.")
+def validar_planos_lote(filas: Iterable[Dict], min_desc: int = 10) -> array:
+    """
+    ✅ 4.2 Validación por lotes
+    ---------------------------
+    Recorre una secuencia (o un generador) de filas y devuelve un
+    `array('B')` con un código `ErrorPlano` por fila. No se construye
+    ningún mensaje: para eso está `errores_lote`.
 
-    # Área y subárea (OBLIGATORIAS con tu modelo actual)
-    if not area:
-        errores.append("El campo área es obligatorio.")
-    elif len(area) < 3:
-        errores.append("El campo área debe tener al menos 3 caracteres.")
+    Ejemplo:
+      validar_planos_lote([
+        {"titulo": "Plano A", "area": "Producción", "subarea": "Laminado"},
+        {"titulo": "", "area": "", "subarea": ""},
+      ])
+      → array('B', [0, 81])
+    """
+    return array("B", (codigo_error_plano(f, min_desc) for f in filas))
 
-    if not subarea:
-        errores.append("El campo subárea es obligatorio.")
-    elif len(subarea) < 3:
-        errores.append("El campo subárea debe tener al menos 3 caracteres.")
 
-    return (len(errores) == 0, errores)
+def errores_lote(codigos: Iterable[int], min_desc: int = 10,
+                 limite: Optional[int] = None) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Genera `(indice, mensajes)` solo para las filas con error, renderizando
+    los mensajes de forma perezosa. `limite` corta tras N filas con error.
+    """
+    entregados = 0
+    for i, codigo in enumerate(codigos):
+        if not codigo:
+            continue
+        if limite is not None and entregados >= limite:
+            return
+        entregados += 1
+        yield i, mensajes_error(codigo, min_desc)
 
 
 def generar_codigo_plano(titulo: str, correlativo: int) -> str:
@@ -183,7 +278,45 @@ def prioridad_plano(descripcion: str) -> int:
     return 1
 
 
-def resumen_por_usuario(planos: List[Dict]) -> Dict[int, Dict[str, int]]:
+def tipo_por_descripcion(descripcion: Optional[str]) -> str:
+    """
+    Categoría usada por `resumen_por_usuario` (solo mira la descripción).
+
+    Ejemplo:
+      tipo_por_descripcion("Refuerzo ESTRUCTURAL") → "Estructural"
+    """
+    return _tipo_por_texto((descripcion or "").lower())
+
+
+def _tipo_por_texto(desc: str, area_txt: str = "") -> str:
+    """Reglas de `clasificar_planos` sobre textos ya en minúsculas."""
+    if ("eléctrico" in desc or "electrico" in desc or
+            "eléctrico" in area_txt or "electrico" in area_txt):
+        return "Eléctrico"
+    if ("arquitectónico" in desc or "arquitectonico" in desc or
+            "arquitectónico" in area_txt or "arquitectonico" in area_txt):
+        return "Arquitectónico"
+    if "estructural" in desc or "estructural" in area_txt:
+        return "Estructural"
+    return "General"
+
+
+def normalizar_area_subarea(area: Optional[str], subarea: Optional[str]) -> Tuple[str, str]:
+    """
+    Normaliza Área y Subárea como `resumen_por_usuario_por_area`.
+    Dado que son obligatorias en el modelo, deberían venir siempre llenas.
+    Aún así, normalizamos por si llega un string vacío por error.
+    """
+    return ((area or "").strip().title() or "Área",
+            (subarea or "").strip().title() or "Subárea")
+
+
+def clave_area_subarea(area: Optional[str], subarea: Optional[str]) -> str:
+    """Clave "Área · Subárea" de `resumen_por_usuario_por_area`."""
+    return " · ".join(normalizar_area_subarea(area, subarea))
+
+
+def resumen_por_usuario(planos: "Planos") -> Dict[int, Dict[str, int]]:
     """
     📊 7. Resumen de planos por usuario (por tipo)
     ----------------------------------------------
@@ -198,19 +331,13 @@ def resumen_por_usuario(planos: List[Dict]) -> Dict[int, Dict[str, int]]:
       ])
       → {1: {"Eléctrico": 1, "Arquitectónico": 1}, 2: {"Estructural": 1}}
     """
+    if _son_registros(planos):
+        return _agrupar((r.subido_por, _tipo_por_texto(r.descripcion_norm)) for r in planos)
+
     res: Dict[int, Counter] = {}
     for p in planos:
         uid = int(p.get("subido_por", 0))
-        desc = (p.get("descripcion") or "").lower()
-
-        if "eléctrico" in desc or "electrico" in desc:
-            cat = "Eléctrico"
-        elif "arquitectónico" in desc or "arquitectonico" in desc:
-            cat = "Arquitectónico"
-        elif "estructural" in desc:
-            cat = "Estructural"
-        else:
-            cat = "General"
+        cat = tipo_por_descripcion(p.get("descripcion"))
 
         res.setdefault(uid, Counter())
         res[uid][cat] += 1
@@ -218,7 +345,7 @@ def resumen_por_usuario(planos: List[Dict]) -> Dict[int, Dict[str, int]]:
     return {uid: dict(cnt) for uid, cnt in res.items()}
 
 
-def resumen_por_usuario_por_area(planos: List[Dict]) -> Dict[int, Dict[str, int]]:
+def resumen_por_usuario_por_area(planos: "Planos") -> Dict[int, Dict[str, int]]:
     """
     📊 7.1 Resumen por usuario agrupando por Área · Subárea
     -------------------------------------------------------
@@ -233,16 +360,13 @@ def resumen_por_usuario_por_area(planos: List[Dict]) -> Dict[int, Dict[str, int]
       → {1: {"Producción · Laminado En Frío": 1, "Producción · Corte": 1},
          2: {"Mantenimiento · General": 1}}
     """
+    if _son_registros(planos):
+        return _agrupar((r.subido_por, _clave_area(r.area, r.subarea)) for r in planos)
+
     res: Dict[int, Counter] = {}
     for p in planos:
         uid = int(p.get("subido_por", 0))
-        area = (p.get("area") or "").strip().title()
-        sub = (p.get("subarea") or "").strip().title()
-        # Dado que son obligatorias en el modelo, deberían venir siempre llenas.
-        # Aún así, normalizamos por si llega un string vacío por error.
-        area = area or "Área"
-        sub = sub or "Subárea"
-        clave = f"{area} · {sub}"
+        clave = clave_area_subarea(p.get("area"), p.get("subarea"))
 
         res.setdefault(uid, Counter())
         res[uid][clave] += 1
@@ -250,7 +374,7 @@ def resumen_por_usuario_por_area(planos: List[Dict]) -> Dict[int, Dict[str, int]
     return {uid: dict(cnt) for uid, cnt in res.items()}
 
 
-def detectar_duplicados(planos: List[Dict], considerar_area_subarea: bool = True) -> List[Tuple[int, int]]:
+def detectar_duplicados(planos: "Planos", considerar_area_subarea: bool = True) -> List[Tuple[int, int]]:
     """
     🔍 8. Detección de planos duplicados
     ------------------------------------
@@ -277,6 +401,16 @@ def detectar_duplicados(planos: List[Dict], considerar_area_subarea: bool = True
     vistos: Dict[Tuple[str, str, str, str], int] = {}
     duplicados: List[Tuple[int, int]] = []
 
+    if _son_registros(planos):
+        for i, r in enumerate(planos):
+            clave = ((r.titulo_norm, r.descripcion_norm, r.area_norm, r.subarea_norm)
+                     if considerar_area_subarea else
+                     (r.titulo_norm, r.descripcion_norm, "", ""))
+            anterior = vistos.setdefault(clave, i)
+            if anterior != i:
+                duplicados.append((anterior, i))
+        return duplicados
+
     for i, p in enumerate(planos):
         t = (p.get("titulo") or "").strip().lower()
         d = (p.get("descripcion") or "").strip().lower()
@@ -294,3 +428,95 @@ def detectar_duplicados(planos: List[Dict], considerar_area_subarea: bool = True
             vistos[clave] = i
 
     return duplicados
+
+
+def huella_duplicado(titulo: Optional[str], descripcion: Optional[str],
+                     area: Optional[str], subarea: Optional[str]) -> str:
+    """
+    🔍 8.1 Huella de duplicado
+    --------------------------
+    Resumen de 64 bits (16 caracteres hex) de la clave que compara
+    `detectar_duplicados` con área y subárea: dos planos duplicados tienen
+    la misma huella.
+
+    Ejemplo:
+      huella_duplicado("Plano A", "instalaciones", "Prod", "L1")
+      == huella_duplicado("plano a ", "Instalaciones ", "prod", "l1")  → True
+    """
+    clave = "\x1f".join((v or "").strip().lower() for v in (titulo, descripcion, area, subarea))
+    return hashlib.blake2b(clave.encode("utf-8"), digest_size=8).hexdigest()
+
+# ------------------------------------------------------------
+# 🧱 9. Registros compactos (PlanoRecord)
+# ------------------------------------------------------------
+# Las funciones de arriba aceptan también listas de `PlanoRecord`: los
+# textos se normalizan una sola vez al construir el registro y no en cada
+# función. Área y subárea se internan (pocos valores distintos), así todas
+# las filas comparten el mismo objeto str.
+
+# Orden de columnas de `PlanoRecord.desde_fila` (para `values_list`).
+COLUMNAS_REGISTRO = ("titulo", "descripcion", "subido_por_id", "area", "subarea")
+
+
+class PlanoRecord:
+    """
+    Fila de plano con los campos ya normalizados.
+      - titulo, area, subarea: sin espacios al borde (como los muestra el resumen).
+      - *_norm: además en minúsculas (clasificación y duplicados).
+      - descripcion_norm: la descripción solo se guarda normalizada.
+    """
+
+    __slots__ = ("titulo", "titulo_norm", "descripcion_norm", "subido_por",
+                 "area", "area_norm", "subarea", "subarea_norm")
+
+    def __init__(self, titulo: Optional[str], descripcion: Optional[str],
+                 subido_por: Optional[int], area: Optional[str], subarea: Optional[str]):
+        self.titulo = titulo
+        self.titulo_norm = (titulo or "").strip().lower()
+        self.descripcion_norm = (descripcion or "").strip().lower()
+        self.subido_por = int(subido_por or 0)
+        self.area = sys.intern((area or "").strip())
+        self.area_norm = sys.intern(self.area.lower())
+        self.subarea = sys.intern((subarea or "").strip())
+        self.subarea_norm = sys.intern(self.subarea.lower())
+
+    @classmethod
+    def desde_fila(cls, fila: Sequence) -> "PlanoRecord":
+        """Desde una tupla en el orden de `COLUMNAS_REGISTRO`."""
+        return cls(*fila)
+
+    @classmethod
+    def desde_dict(cls, p: Dict) -> "PlanoRecord":
+        return cls(p.get("titulo"), p.get("descripcion"), p.get("subido_por"),
+                   p.get("area"), p.get("subarea"))
+
+    def __repr__(self) -> str:
+        return f"PlanoRecord({self.titulo!r}, usuario={self.subido_por})"
+
+
+Planos = Union[List[Dict], List[PlanoRecord]]
+
+
+def registros(filas: Iterable[Sequence]) -> List[PlanoRecord]:
+    """
+    Lista de `PlanoRecord` desde tuplas de base de datos, p. ej.:
+      registros(Plano.objects.values_list(*COLUMNAS_REGISTRO).iterator())
+    """
+    return [PlanoRecord(*f) for f in filas]
+
+
+def _son_registros(planos) -> bool:
+    return (isinstance(planos, (list, tuple)) and bool(planos)
+            and isinstance(planos[0], PlanoRecord))
+
+
+@lru_cache(maxsize=4096)
+def _clave_area(area: str, subarea: str) -> str:
+    return f"{area.title() or 'Área'} · {subarea.title() or 'Subárea'}"
+
+
+def _agrupar(pares: Iterable[Tuple[int, str]]) -> Dict[int, Dict[str, int]]:
+    res: Dict[int, Dict[str, int]] = {}
+    for (uid, clave), n in Counter(pares).items():
+        res.setdefault(uid, {})[clave] = n
+    return res
@@ -0,0 +1,195 @@
+# 🪞 Réplicas de lectura para los planos
+# Las lecturas de PlanoViewSet (lista, detalle, resumen) y los trabajos de
+# solo lectura (exportar, reporte) pueden ir a alguna de las bases de
+# `settings.PLANOS_REPLICAS`; las escrituras y todo lo demás van a `default`.
+# Un router de Django no ve la petición: la vista deja la réplica elegida en
+# un ContextVar y `RouterReplicas` la devuelve en `db_for_read`.
+#
+# Leer lo propio: tras una escritura la respuesta deja la cookie
+# `planos_escritura` con el instante, y si el usuario está autenticado el
+# instante también se guarda en la caché de Django por usuario (los clientes
+# con token no suelen guardar cookies). Mientras dure
+# (`PLANOS_REPLICAS_VENTANA_S`) solo sirven las réplicas copiadas después de
+# ese instante; si ninguna lo es, se lee del primario. Con varios procesos,
+# la marca por usuario necesita una caché compartida en `CACHES` (la de
+# memoria local solo la ve el proceso que atendió la escritura); un cliente
+# anónimo sin cookies no tiene garantía.
+#
+# Una conexión SQLite abierta sigue leyendo el archivo viejo después de que
+# `refrescar` lo reemplaza: `leyendo_de` cierra la conexión de la réplica al
+# salir (en HTTP ya la cierra `CONN_MAX_AGE = 0` al terminar la petición).
+#
+# En local cada réplica es una copia SQLite del primario hecha con la API de
+# backup (`manage.py refrescar_replicas --cada 5`). El mtime del archivo es
+# el instante en que empezó la copia; una réplica con más de
+# `PLANOS_REPLICAS_MAX_RETRASO_S` de atraso deja de usarse.
+
+import os
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from . import metricas
+
+ACCIONES_LECTURA = ("list", "retrieve", "resumen")
+COOKIE = "planos_escritura"
+VENTANA_S = 60
+MAX_RETRASO_S = 30
+
+_alias: ContextVar[Optional[str]] = ContextVar("planos_replica", default=None)
+
+
+class RouterReplicas:
+    """Lee de la réplica activa en el contexto (si hay); escribe en `default`."""
+
+    def db_for_read(self, model, **hints):
+        return _alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # las réplicas son copias del primario
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # El esquema llega con cada copia.
+        return False if db in replicas() else None
+
+
+def replicas() -> List[str]:
+    return list(getattr(settings, "PLANOS_REPLICAS", []))
+
+
+def es_sqlite(alias: str) -> bool:
+    return connections.settings[alias]["ENGINE"] == "django.db.backends.sqlite3"
+
+
+def copiada_en(alias: str) -> Optional[float]:
+    """
+    Instante (epoch) de la copia SQLite: contiene todo lo confirmado antes.
+    0.0 si todavía no existe; None si la réplica no es un archivo SQLite.
+    """
+    if not es_sqlite(alias):
+        return None
+    try:
+        return os.stat(connections.settings[alias]["NAME"]).st_mtime
+    except OSError:
+        return 0.0
+
+
+def elegir(desde: Optional[float] = None) -> Optional[str]:
+    """
+    Una réplica al azar que ya tenga lo escrito hasta `desde` (epoch), o
+    None para leer del primario.
+    """
+    ahora = time.time()
+    max_retraso = getattr(settings, "PLANOS_REPLICAS_MAX_RETRASO_S", MAX_RETRASO_S)
+    candidatas = []
+    for alias in replicas():
+        copia = copiada_en(alias)
+        if copia is None:
+            # Réplica real: su atraso no se conoce aquí; tras escribir, primario.
+            if desde is None:
+                candidatas.append(alias)
+        elif ahora - copia <= max_retraso and (desde is None or copia >= desde):
+            candidatas.append(alias)
+    return random.choice(candidatas) if candidatas else None
+
+
+@contextmanager
+def leyendo_de(alias: Optional[str]) -> Iterator[None]:
+    """Las lecturas del bloque van a `alias` (None: primario)."""
+    token = _alias.set(alias)
+    try:
+        yield
+    finally:
+        _alias.reset(token)
+        if alias in connections.settings:
+            connections[alias].close()  # la próxima lectura abre la copia vigente
+
+
+# ------------------------------------------------------------
+# Peticiones HTTP
+# ------------------------------------------------------------
+
+def para_peticion(request, accion: Optional[str]) -> Optional[str]:
+    """Réplica para esta petición de PlanoViewSet (None: primario)."""
+    if accion not in ACCIONES_LECTURA or not replicas():
+        return None
+    try:
+        desde = float(request.COOKIES.get(COOKIE, ""))
+    except ValueError:
+        desde = None
+    if request.user.is_authenticated:
+        del_usuario = cache.get(_clave_usuario(request.user.pk))
+        if del_usuario is not None:
+            desde = max(desde or 0.0, del_usuario)
+    alias = elegir(desde)
+    if alias is None and desde is not None:
+        metricas.incrementar("replicas.leer_lo_propio")
+    metricas.incrementar(f"replicas.lecturas.{alias or 'default'}")
+    return alias
+
+
+def activar(alias: Optional[str]):
+    return _alias.set(alias)
+
+
+def desactivar(token) -> None:
+    _alias.reset(token)
+
+
+def _clave_usuario(usuario_id: int) -> str:
+    return f"{COOKIE}:{usuario_id}"
+
+
+def marcar_escritura(response, usuario=None) -> None:
+    """Durante la ventana, las lecturas de este cliente no verán datos más viejos."""
+    if not replicas():
+        return
+    instante = round(time.time(), 3)
+    ventana = getattr(settings, "PLANOS_REPLICAS_VENTANA_S", VENTANA_S)
+    response.set_cookie(COOKIE, f"{instante:.3f}", max_age=ventana,
+                        httponly=True, samesite="Lax")
+    if usuario is not None and usuario.is_authenticated:
+        cache.set(_clave_usuario(usuario.pk), instante, ventana)
+
+
+# ------------------------------------------------------------
+# Copias SQLite (réplicas locales)
+# ------------------------------------------------------------
+
+def refrescar(alias: str) -> float:
+    """
+    Copia el primario sobre la réplica `alias` con la API de backup de SQLite
+    y devuelve los segundos que tardó. Se copia a un archivo temporal y se
+    reemplaza de una vez: las lecturas en curso terminan sobre la copia vieja.
+    La copia se hace en un solo paso: los escritores esperan lo que dure.
+    """
+    if not (es_sqlite(alias) and es_sqlite("default")):
+        raise ValueError(f"{alias}: solo se pueden refrescar réplicas SQLite de un primario SQLite.")
+    destino = Path(connections.settings[alias]["NAME"])
+    temporal = destino.with_name(destino.name + ".tmp")
+    temporal.unlink(missing_ok=True)
+
+    origen = connections["default"]
+    origen.ensure_connection()
+    inicio = time.time()
+    copia = sqlite3.connect(temporal)
+    try:
+        origen.connection.backup(copia)
+    finally:
+        copia.close()
+    os.utime(temporal, (inicio, inicio))
+    connections[alias].close()
+    os.replace(temporal, destino)
+    metricas.incrementar(f"replicas.copias.{alias}")
+    return time.time() - inicio
@@ -0,0 +1,209 @@
+# 📊 Resúmenes desnormalizados por usuario (Área · Subárea y tipo)
+# Cada ruta de escritura de planos llama a `sumar`, `restar` o `mover`
+# dentro de su misma transacción; los contadores se actualizan con F()
+# para que escrituras concurrentes no pierdan incrementos.
+# Los planos archivados siguen contando: al archivar solo se suma a
+# `ResumenUsuarioTipo.archivados` (ver `archivar`).
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, QuerySet
+
+from ..models import Plano, PlanoArchivado, ResumenUsuarioArea, ResumenUsuarioTipo
+from .planos_logic import (
+    COLUMNAS_REGISTRO,
+    PlanoRecord,
+    normalizar_area_subarea,
+    resumen_por_usuario,
+    resumen_por_usuario_por_area,
+    tipo_por_descripcion,
+)
+
+# Columnas que afectan a los resúmenes, en el orden de `Fila`.
+CAMPOS_RESUMEN = ("subido_por_id", "descripcion", "area", "subarea")
+LOTE_LECTURA = 2000
+
+Fila = Tuple[int, str, str, str]  # (uid, descripcion, area, subarea)
+
+
+def fila_de(plano: Plano) -> Fila:
+    return (plano.subido_por_id, plano.descripcion, plano.area, plano.subarea)
+
+
+def _deltas(filas: Iterable[Fila], signo: int) -> Tuple[Counter, Counter]:
+    por_area: Counter = Counter()
+    por_tipo: Counter = Counter()
+    for uid, descripcion, area, subarea in filas:
+        por_area[(uid, *normalizar_area_subarea(area, subarea))] += signo
+        por_tipo[(uid, tipo_por_descripcion(descripcion))] += signo
+    return por_area, por_tipo
+
+
+def _aplicar(modelo, campos, deltas: Counter, columna: str = "total") -> None:
+    for clave, delta in deltas.items():
+        if not delta:
+            continue
+        filtro = dict(zip(campos, clave))
+        if modelo.objects.filter(**filtro).update(**{columna: F(columna) + delta}):
+            continue
+        try:
+            with transaction.atomic():
+                modelo.objects.create(**{columna: delta}, **filtro)
+        except IntegrityError:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT.
+            modelo.objects.filter(**filtro).update(**{columna: F(columna) + delta})
+
+
+def aplicar(por_area: Counter, por_tipo: Counter) -> None:
+    _aplicar(ResumenUsuarioArea, ("usuario_id", "area", "subarea"), por_area)
+    _aplicar(ResumenUsuarioTipo, ("usuario_id", "tipo"), por_tipo)
+
+
+def sumar(filas: Iterable[Fila]) -> None:
+    aplicar(*_deltas(filas, +1))
+
+
+def restar(filas: Iterable[Fila]) -> None:
+    aplicar(*_deltas(filas, -1))
+
+
+def mover(antes: Iterable[Fila], despues: Iterable[Fila]) -> None:
+    """Resta las filas anteriores y suma las nuevas con un solo pase de F()."""
+    area_a, tipo_a = _deltas(antes, -1)
+    area_d, tipo_d = _deltas(despues, +1)
+    area_a.update(area_d)
+    tipo_a.update(tipo_d)
+    aplicar(area_a, tipo_a)
+
+
+def archivar(filas: Iterable[Fila]) -> None:
+    """Filas que pasan a la tabla de archivo: `total` no cambia."""
+    _, por_tipo = _deltas(filas, +1)
+    _aplicar(ResumenUsuarioTipo, ("usuario_id", "tipo"), por_tipo, columna="archivados")
+
+
+def desarchivar(filas: Iterable[Fila]) -> None:
+    """Filas que vuelven del archivo a la tabla caliente."""
+    _, por_tipo = _deltas(filas, -1)
+    _aplicar(ResumenUsuarioTipo, ("usuario_id", "tipo"), por_tipo, columna="archivados")
+
+
+def reiniciar() -> None:
+    """Para cuando se eliminan todos los planos a la vez."""
+    ResumenUsuarioArea.objects.all().delete()
+    ResumenUsuarioTipo.objects.all().delete()
+
+
+# ------------------------------------------------------------
+# Lectura: O(grupos)
+# ------------------------------------------------------------
+
+def leer(usuario_id: Optional[int] = None) -> Tuple[Dict[int, Dict[str, int]], Dict[int, Dict[str, int]]]:
+    """
+    Devuelve `(por_tipo, por_area)` con la misma forma que
+    `resumen_por_usuario` y `resumen_por_usuario_por_area`.
+    """
+    areas = ResumenUsuarioArea.objects.filter(total__gt=0)
+    tipos = ResumenUsuarioTipo.objects.filter(total__gt=0)
+    if usuario_id is not None:
+        areas = areas.filter(usuario_id=usuario_id)
+        tipos = tipos.filter(usuario_id=usuario_id)
+
+    por_tipo: Dict[int, Dict[str, int]] = {}
+    for uid, tipo, total in tipos.values_list("usuario_id", "tipo", "total"):
+        por_tipo.setdefault(uid, {})[tipo] = total
+    por_area: Dict[int, Dict[str, int]] = {}
+    for uid, area, subarea, total in areas.values_list("usuario_id", "area", "subarea", "total"):
+        por_area.setdefault(uid, {})[f"{area} · {subarea}"] = total
+    return por_tipo, por_area
+
+
+# ------------------------------------------------------------
+# Cálculo completo con planos_logic (reconstrucción y verificación)
+# ------------------------------------------------------------
+
+def calcular_con_planos_logic(queryset: QuerySet,
+                              reportar: Optional[Callable[[int], None]] = None):
+    """
+    Recorre `queryset` por lotes aplicando `resumen_por_usuario` y
+    `resumen_por_usuario_por_area`, y acumula los parciales.
+    Devuelve `(por_tipo, por_area, filas_leidas)`.
+    """
+    total = (queryset.count() or 1) if reportar else 1
+    por_tipo: Dict[int, Counter] = {}
+    por_area: Dict[int, Counter] = {}
+    lote, leidas = [], 0
+
+    def acumular():
+        for destino, parcial in ((por_tipo, resumen_por_usuario(lote)),
+                                 (por_area, resumen_por_usuario_por_area(lote))):
+            for uid, conteo in parcial.items():
+                destino.setdefault(uid, Counter()).update(conteo)
+        lote.clear()
+
+    filas = queryset.values_list(*COLUMNAS_REGISTRO).iterator(chunk_size=LOTE_LECTURA)
+    for fila in filas:
+        lote.append(PlanoRecord(*fila))
+        leidas += 1
+        if len(lote) >= LOTE_LECTURA:
+            acumular()
+            if reportar:
+                reportar(100 * leidas / total)
+    acumular()
+
+    return ({uid: dict(c) for uid, c in por_tipo.items()},
+            {uid: dict(c) for uid, c in por_area.items()},
+            leidas)
+
+
+@transaction.atomic
+def reconstruir() -> int:
+    """Recalcula las tablas desde cero. Devuelve la cantidad de planos leídos."""
+    reiniciar()
+    por_area: Counter = Counter()
+    por_tipo: Counter = Counter()
+    archivados: Counter = Counter()
+    leidas = 0
+    for modelo in (Plano, PlanoArchivado):
+        filas = modelo.objects.values_list(*CAMPOS_RESUMEN).iterator(chunk_size=LOTE_LECTURA)
+        for uid, descripcion, area, subarea in filas:
+            tipo = (uid, tipo_por_descripcion(descripcion))
+            por_area[(uid, *normalizar_area_subarea(area, subarea))] += 1
+            por_tipo[tipo] += 1
+            if modelo is PlanoArchivado:
+                archivados[tipo] += 1
+            leidas += 1
+
+    ResumenUsuarioArea.objects.bulk_create(
+        [ResumenUsuarioArea(usuario_id=uid, area=a, subarea=s, total=n)
+         for (uid, a, s), n in por_area.items()], batch_size=LOTE_LECTURA)
+    ResumenUsuarioTipo.objects.bulk_create(
+        [ResumenUsuarioTipo(usuario_id=uid, tipo=t, total=n, archivados=archivados[(uid, t)])
+         for (uid, t), n in por_tipo.items()], batch_size=LOTE_LECTURA)
+    return leidas
+
+
+def diferencias() -> Dict[str, Dict]:
+    """
+    Compara las tablas con lo que calcula `planos_logic` sobre la tabla
+    completa (planos y archivados). Devuelve `{}` si coinciden.
+    """
+    todos = Plano.objects.all().union(PlanoArchivado.objects.all(), all=True)
+    esperado_tipo, esperado_area, _ = calcular_con_planos_logic(todos)
+    esperado_archivo, _, _ = calcular_con_planos_logic(PlanoArchivado.objects.all())
+    actual_tipo, actual_area = leer()
+    actual_archivo: Dict[int, Dict[str, int]] = {}
+    for uid, tipo, n in ResumenUsuarioTipo.objects.filter(archivados__gt=0).values_list(
+            "usuario_id", "tipo", "archivados"):
+        actual_archivo.setdefault(uid, {})[tipo] = n
+    difs = {}
+    for nombre, esperado, actual in (("por_tipo", esperado_tipo, actual_tipo),
+                                     ("por_area", esperado_area, actual_area),
+                                     ("archivados", esperado_archivo, actual_archivo)):
+        for uid in set(esperado) | set(actual):
+            if esperado.get(uid, {}) != actual.get(uid, {}):
+                difs.setdefault(nombre, {})[uid] = {
+                    "esperado": esperado.get(uid, {}), "actual": actual.get(uid, {})}
+    return difs
@@ -0,0 +1,366 @@
+# 🗂️ Snapshot columnar de planos para análisis fuera de línea
+# `escribir` vuelca la tabla Plano a un archivo binario por columnas; los
+# reportes lo abren con `Snapshot` (mmap) en lugar de consultar la base en
+# producción. Como el archivo se mapea en solo lectura, varios procesos que
+# lo abren comparten las mismas páginas de la caché del sistema operativo.
+#
+# Formato (little-endian):
+#   MAGICO (8 bytes) · largo de la cabecera (u32) · cabecera JSON
+#   · secciones alineadas a 8 bytes, descritas en la cabecera:
+#     - enteros ("q"):     id, subido_por, fecha_subida (µs desde epoch UTC)
+#     - diccionario:       area, subarea → códigos ("H" o "I") + valores
+#     - texto:             titulo, descripcion → offsets ("Q", n+1) + UTF-8
+#
+# El lector solo usa la biblioteca estándar (sin Django); NumPy es opcional.
+# En una máquina big-endian las columnas numéricas se copian reordenadas al
+# leerlas, en lugar de usarse directamente sobre el mmap.
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .planos_logic import COLUMNAS_REGISTRO, PlanoRecord, clave_area_subarea
+
+MAGICO = b"PLNSNAP1"
+ALINEACION = 8
+LOTE_LECTURA = 5000
+
+COLUMNAS_ENTERAS = ("id", "subido_por", "fecha_subida")
+COLUMNAS_DICCIONARIO = ("area", "subarea")
+COLUMNAS_TEXTO = ("titulo", "descripcion")
+
+_EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICRO = timedelta(microseconds=1)
+
+
+def micros_de(fecha: Optional[datetime]) -> int:
+    if fecha is None:
+        return 0
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return (fecha - _EPOCA) // _MICRO
+
+
+def fecha_de(micros: int) -> datetime:
+    """Inversa de la columna `fecha_subida`."""
+    return _EPOCA + micros * _MICRO
+
+
+def _nativo(columna: array) -> array:
+    if sys.byteorder != "little":
+        columna = array(columna.typecode, columna)
+        columna.byteswap()
+    return columna
+
+
+# ------------------------------------------------------------
+# Escritura
+# ------------------------------------------------------------
+
+class _Texto:
+    """Columna de texto en construcción: offsets en memoria, bytes a disco."""
+
+    def __init__(self, carpeta: str):
+        self.offsets = array("Q", [0])
+        self.datos = tempfile.TemporaryFile(dir=carpeta)
+
+    def agregar(self, valor: Optional[str]) -> None:
+        crudo = (valor or "").encode("utf-8")
+        self.datos.write(crudo)
+        self.offsets.append(self.offsets[-1] + len(crudo))
+
+
+def escribir(ruta, queryset=None) -> int:
+    """
+    Vuelca `queryset` (por defecto todos los planos, por id) en `ruta`.
+    Se escribe a un temporal y se renombra: los lectores que ya tienen el
+    archivo abierto siguen viendo la versión anterior.
+    Devuelve la cantidad de filas.
+    """
+    if queryset is None:
+        from ..models import Plano  # el lector no necesita Django
+        queryset = Plano.objects.order_by("id")
+
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    carpeta = str(ruta.parent)
+
+    enteros = {c: array("q") for c in COLUMNAS_ENTERAS}
+    codigos: Dict[str, List[int]] = {c: [] for c in COLUMNAS_DICCIONARIO}
+    valores: Dict[str, Dict[str, int]] = {c: {} for c in COLUMNAS_DICCIONARIO}
+    textos = {c: _Texto(carpeta) for c in COLUMNAS_TEXTO}
+
+    columnas = ("id", "subido_por_id", "fecha_subida", *COLUMNAS_DICCIONARIO, *COLUMNAS_TEXTO)
+    filas = 0
+    for pk, uid, fecha, area, subarea, titulo, descripcion in (
+            queryset.values_list(*columnas).iterator(chunk_size=LOTE_LECTURA)):
+        enteros["id"].append(pk)
+        enteros["subido_por"].append(uid)
+        enteros["fecha_subida"].append(micros_de(fecha))
+        for nombre, valor in (("area", area), ("subarea", subarea)):
+            vistos = valores[nombre]
+            codigos[nombre].append(vistos.setdefault(valor or "", len(vistos)))
+        textos["titulo"].agregar(titulo)
+        textos["descripcion"].agregar(descripcion)
+        filas += 1
+
+    fd, temporal = tempfile.mkstemp(dir=carpeta, prefix=ruta.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as salida:
+            _volcar(salida, filas, enteros, codigos, valores, textos)
+            salida.flush()
+            os.fsync(salida.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    finally:
+        for texto in textos.values():
+            texto.datos.close()
+    return filas
+
+
+def _volcar(salida, filas, enteros, codigos, valores, textos) -> None:
+    # Cada sección: (descriptor en la cabecera, contenido). Los offsets se
+    # completan cuando se conoce el largo de la cabecera.
+    secciones: List[Tuple[Dict, object]] = []
+    cabecera = {"filas": filas, "columnas": {}}
+
+    def seccion(contenido, largo: int) -> Dict[str, int]:
+        descriptor = {"offset": 0, "largo": largo}
+        secciones.append((descriptor, contenido))
+        return descriptor
+
+    for nombre, columna in enteros.items():
+        cabecera["columnas"][nombre] = {
+            "tipo": "entero", "datos": seccion(_nativo(columna), len(columna) * 8)}
+    for nombre in COLUMNAS_DICCIONARIO:
+        tipo = "H" if len(valores[nombre]) <= 0xFFFF else "I"
+        cods = _nativo(array(tipo, codigos[nombre]))
+        texto = "\x00".join(valores[nombre]).encode("utf-8")
+        cabecera["columnas"][nombre] = {
+            "tipo": "diccionario", "codigo": tipo, "valores": len(valores[nombre]),
+            "codigos": seccion(cods, len(cods) * cods.itemsize),
+            "diccionario": seccion(texto, len(texto))}
+    for nombre, texto in textos.items():
+        cabecera["columnas"][nombre] = {
+            "tipo": "texto",
+            "offsets": seccion(_nativo(texto.offsets), len(texto.offsets) * 8),
+            "datos": seccion(texto.datos, texto.offsets[-1])}
+
+    # Con offsets provisionales de 16 dígitos la cabecera mide lo máximo
+    # posible; la definitiva se rellena con espacios hasta ese largo.
+    for descriptor, _ in secciones:
+        descriptor["offset"] = 10 ** 15
+    inicio = _alinear(len(MAGICO) + 4 + len(_json(cabecera)))
+    posicion = inicio
+    for descriptor, _ in secciones:
+        descriptor["offset"] = posicion
+        posicion = _alinear(posicion + descriptor["largo"])
+    crudo = _json(cabecera).ljust(inicio - len(MAGICO) - 4)
+
+    salida.write(MAGICO + struct.pack("<I", len(crudo)) + crudo)
+    for descriptor, contenido in secciones:
+        salida.seek(descriptor["offset"])
+        if isinstance(contenido, array):
+            contenido.tofile(salida)
+        elif isinstance(contenido, bytes):
+            salida.write(contenido)
+        else:
+            contenido.seek(0)
+            while bloque := contenido.read(1 << 20):
+                salida.write(bloque)
+    salida.truncate(posicion)
+
+
+def _json(cabecera) -> bytes:
+    return json.dumps(cabecera, separators=(",", ":")).encode("utf-8")
+
+
+def _alinear(n: int) -> int:
+    return (n + ALINEACION - 1) // ALINEACION * ALINEACION
+
+
+# ------------------------------------------------------------
+# Lectura (mmap, sin copias)
+# ------------------------------------------------------------
+
+class ColumnaTexto(Sequence):
+    """Textos de una columna; cada valor se decodifica al pedirlo."""
+
+    def __init__(self, offsets: memoryview, datos: memoryview):
+        self.offsets = offsets
+        self.datos = datos
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return str(self.datos[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        datos, offsets = self.datos, self.offsets
+        for inicio, fin in zip(offsets, offsets[1:]):
+            yield str(datos[inicio:fin], "utf-8")
+
+    def bytes(self, i: int) -> memoryview:
+        """Vista sin copia de los bytes UTF-8 del valor `i`."""
+        return self.datos[self.offsets[i]:self.offsets[i + 1]]
+
+
+class ColumnaDiccionario(Sequence):
+    """Columna codificada: `codigos[i]` indexa `valores` (cada str existe una vez)."""
+
+    def __init__(self, codigos: memoryview, valores: Tuple[str, ...]):
+        self.codigos = codigos
+        self.valores = valores
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.valores[c] for c in self.codigos[i]]
+        return self.valores[self.codigos[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.valores.__getitem__, self.codigos)
+
+
+class Snapshot:
+    """
+    Lector de un archivo escrito con `escribir`:
+
+      with Snapshot(ruta) as snap:
+          snap.columna("subido_por")      # memoryview de int64, sin copia
+          snap.columna("area")            # ColumnaDiccionario
+          snap.numpy("fecha_subida")      # ndarray sobre el mmap (requiere NumPy)
+          resumen_por_usuario(snap.registros())
+    """
+
+    def __init__(self, ruta):
+        self._cache: Dict[str, object] = {}
+        self._archivo = open(ruta, "rb")
+        try:
+            self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._archivo.close()
+            raise ValueError(f"Snapshot vacío o inválido: {ruta}")
+        self._vista = memoryview(self._mapa)
+        if bytes(self._vista[:len(MAGICO)]) != MAGICO:
+            self.cerrar()
+            raise ValueError(f"No es un snapshot de planos: {ruta}")
+        largo, = struct.unpack_from("<I", self._mapa, len(MAGICO))
+        inicio = len(MAGICO) + 4
+        cabecera = json.loads(bytes(self._vista[inicio:inicio + largo]))
+        self.filas: int = cabecera["filas"]
+        self._columnas: Dict[str, Dict] = cabecera["columnas"]
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def __len__(self) -> int:
+        return self.filas
+
+    @property
+    def nombres(self) -> Tuple[str, ...]:
+        return tuple(self._columnas)
+
+    def cerrar(self) -> None:
+        self._cache.clear()
+        self._vista.release()
+        self._archivo.close()
+        try:
+            self._mapa.close()
+        except BufferError:
+            # Aún hay columnas (o arrays de NumPy) en uso: el mapa se libera
+            # cuando se suelte la última.
+            pass
+
+    def _seccion(self, d: Dict, formato: str = "B") -> memoryview:
+        vista = self._vista[d["offset"]:d["offset"] + d["largo"]]
+        if formato == "B":
+            return vista
+        if sys.byteorder != "little":
+            # En big-endian la columna se copia reordenada (ya no comparte el mmap).
+            copia = array(formato)
+            copia.frombytes(vista)
+            copia.byteswap()
+            return memoryview(copia).toreadonly()
+        return vista.cast(formato)
+
+    def columna(self, nombre: str):
+        if nombre not in self._cache:
+            if nombre not in self._columnas:
+                raise KeyError(f"Columna desconocida: {nombre}. Opciones: {', '.join(self._columnas)}")
+            d = self._columnas[nombre]
+            if d["tipo"] == "entero":
+                col = self._seccion(d["datos"], "q")
+            elif d["tipo"] == "diccionario":
+                texto = str(self._seccion(d["diccionario"]), "utf-8")
+                valores = tuple(texto.split("\x00")) if d["valores"] else ()
+                col = ColumnaDiccionario(self._seccion(d["codigos"], d["codigo"]),
+                                         tuple(sys.intern(v) for v in valores))
+            else:
+                col = ColumnaTexto(self._seccion(d["offsets"], "Q"), self._seccion(d["datos"]))
+            self._cache[nombre] = col
+        return self._cache[nombre]
+
+    def numpy(self, nombre: str):
+        """
+        Columna entera (o códigos de diccionario) como `ndarray` de solo
+        lectura sobre el mmap. NumPy no es dependencia del proyecto.
+        """
+        try:
+            import numpy
+        except ImportError as exc:
+            raise ImportError("Snapshot.numpy requiere NumPy (pip install numpy).") from exc
+        col = self.columna(nombre)
+        if isinstance(col, ColumnaDiccionario):
+            col = col.codigos
+        elif isinstance(col, ColumnaTexto):
+            raise TypeError(f"{nombre} es de texto: use columna().")
+        return numpy.frombuffer(col, dtype=numpy.dtype(col.format))
+
+    def registros(self) -> List[PlanoRecord]:
+        """Filas como `PlanoRecord`, para las funciones de `planos_logic`."""
+        cols = (self.columna(c.removesuffix("_id")) for c in COLUMNAS_REGISTRO)
+        return [PlanoRecord(*fila) for fila in zip(*cols)]
+
+    def iterar(self) -> Iterator[Dict]:
+        """Filas como dicts, con las mismas claves que `planos_logic` espera."""
+        nombres = ("id", "titulo", "descripcion", "subido_por", "area", "subarea")
+        for fila in zip(*(self.columna(n) for n in nombres)):
+            yield dict(zip(nombres, fila))
+
+    def resumen_por_usuario_por_area(self) -> Dict[int, Dict[str, int]]:
+        """
+        Igual que `planos_logic.resumen_por_usuario_por_area`, pero contando
+        códigos de diccionario: no se decodifica ningún texto por fila.
+        """
+        area, subarea = self.columna("area"), self.columna("subarea")
+        conteo = Counter(zip(self.columna("subido_por"), area.codigos, subarea.codigos))
+        res: Dict[int, Dict[str, int]] = {}
+        claves: Dict[Tuple[int, int], str] = {}
+        for (uid, a, s), n in conteo.items():
+            clave = claves.get((a, s))
+            if clave is None:
+                clave = claves[(a, s)] = clave_area_subarea(area.valores[a], subarea.valores[s])
+            destino = res.setdefault(uid, {})
+            destino[clave] = destino.get(clave, 0) + n
+        return res
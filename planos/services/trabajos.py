@@ -0,0 +1,291 @@
+# ⚙️ Cola de trabajos en base de datos (sin broker externo)
+# Las operaciones largas se encolan como filas `Trabajo` y las ejecuta
+# `python manage.py procesar_trabajos`. La petición HTTP solo encola y
+# devuelve 202; el cliente consulta el estado y luego el resultado.
+
+import csv
+import os
+import socket
+import threading
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import Plano, Trabajo
+from . import busqueda, conteo, operaciones_masivas, replicas, resumenes
+
+MAX_INTENTOS = 5
+LOTE_LECTURA = 2000
+# Cada cuánto renueva `latido` el hilo de latido de `ejecutar`, haya o no
+# progreso. Un trabajo sin latido durante `liberar_abandonados(minutos)` se
+# da por abandonado (su trabajador murió).
+LATIDO_S = 60
+
+# tipo de trabajo → función(trabajo, reportar) que devuelve el resultado (JSON)
+TAREAS: Dict[str, Callable] = {}
+
+# objetivos del trabajo "relleno" → función(reportar)
+RELLENOS: Dict[str, Callable] = {}
+
+
+def tarea(nombre: str):
+    """Registra una función como tipo de trabajo."""
+    def registrar(funcion):
+        TAREAS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def nombre_trabajador() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def encolar(tipo: str, parametros: Optional[dict] = None) -> Trabajo:
+    if tipo not in TAREAS:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+    return Trabajo.objects.create(tipo=tipo, parametros=parametros or {})
+
+
+def reclamar(trabajador: str) -> Optional[Trabajo]:
+    """
+    Toma el trabajo pendiente más antiguo. El UPDATE condicional por
+    `estado` garantiza que, si dos trabajadores compiten, solo uno gana.
+    """
+    ahora = timezone.now()
+    candidatos = Trabajo.objects.filter(
+        estado=Trabajo.PENDIENTE, disponible_desde__lte=ahora
+    ).order_by("disponible_desde", "id").values_list("id", flat=True)[:10]
+
+    for pk in candidatos:
+        tomado = Trabajo.objects.filter(pk=pk, estado=Trabajo.PENDIENTE).update(
+            estado=Trabajo.EN_CURSO, trabajador=trabajador, iniciado=ahora, latido=ahora,
+            intentos=F("intentos") + 1,
+        )
+        if tomado:
+            return Trabajo.objects.get(pk=pk)
+    return None
+
+
+def liberar_abandonados(minutos: int = 30) -> int:
+    """
+    Devuelve a la cola los trabajos de trabajadores que murieron a medias:
+    los que no renovaron su `latido` en `minutos` (no importa cuánto lleven
+    en curso). Los que ya usaron sus `MAX_INTENTOS` quedan fallidos: un
+    trabajo que tumba a su trabajador no vuelve a la cola para siempre.
+    Devuelve cuántos volvieron a la cola.
+    """
+    ahora = timezone.now()
+    limite = ahora - timedelta(minutes=minutos)
+    abandonados = Trabajo.objects.filter(
+        Q(latido__lt=limite) | Q(latido__isnull=True, iniciado__lt=limite),
+        estado=Trabajo.EN_CURSO,
+    )
+    abandonados.filter(intentos__gte=MAX_INTENTOS).update(
+        estado=Trabajo.FALLIDO, terminado=ahora,
+        error=f"Abandonado por su trabajador {MAX_INTENTOS} veces.")
+    return abandonados.update(estado=Trabajo.PENDIENTE, trabajador="")
+
+
+class _Latido:
+    """
+    Hilo que renueva `latido` cada `LATIDO_S` mientras corre la tarea, para
+    que una tarea que no llama a `reportar` no parezca abandonada.
+    """
+
+    def __init__(self, trabajo: Trabajo):
+        self.trabajo = trabajo
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True,
+                                      name=f"latido-{trabajo.pk}")
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+
+    def _bucle(self) -> None:
+        try:
+            while not self._detener.wait(LATIDO_S):
+                try:
+                    Trabajo.objects.filter(pk=self.trabajo.pk, estado=Trabajo.EN_CURSO).update(
+                        latido=timezone.now())
+                except OperationalError:
+                    pass  # se reintenta en el próximo latido
+        finally:
+            connections.close_all()  # las de este hilo
+
+
+def ejecutar(trabajo: Trabajo) -> Trabajo:
+    """
+    Ejecuta un trabajo ya reclamado. Un "database is locked" no bloquea
+    al trabajador con `sleep`: el trabajo vuelve a la cola con un
+    `disponible_desde` diferido (backoff exponencial).
+    """
+    def reportar(progreso: int):
+        progreso = max(0, min(100, int(progreso)))
+        ahora = timezone.now()
+        vencido = trabajo.latido is None or ahora - trabajo.latido >= timedelta(seconds=LATIDO_S)
+        if progreso != trabajo.progreso or vencido:
+            trabajo.progreso = progreso
+            trabajo.latido = ahora
+            try:
+                Trabajo.objects.filter(pk=trabajo.pk).update(progreso=progreso, latido=ahora)
+            except OperationalError:
+                # El progreso es informativo: con SQLite, escribir mientras se
+                # lee la tabla puede chocar con otro escritor. No se reintenta.
+                pass
+
+    try:
+        with _Latido(trabajo):
+            resultado = TAREAS[trabajo.tipo](trabajo, reportar)
+    except OperationalError as e:
+        if "database is locked" in str(e).lower() and trabajo.intentos < MAX_INTENTOS:
+            espera = timedelta(seconds=0.5 * (2 ** trabajo.intentos))
+            trabajo.estado = Trabajo.PENDIENTE
+            trabajo.disponible_desde = timezone.now() + espera
+            trabajo.error = str(e)
+        else:
+            trabajo.estado = Trabajo.FALLIDO
+            trabajo.error = f"Error de operación: {e}"
+            trabajo.terminado = timezone.now()
+    except Exception as e:
+        trabajo.estado = Trabajo.FALLIDO
+        trabajo.error = f"{type(e).__name__}: {e}"
+        trabajo.terminado = timezone.now()
+    else:
+        trabajo.estado = Trabajo.COMPLETADO
+        trabajo.resultado = resultado
+        trabajo.progreso = 100
+        trabajo.error = ""
+        trabajo.terminado = timezone.now()
+
+    trabajo.save(update_fields=["estado", "resultado", "progreso", "error",
+                                "disponible_desde", "terminado"])
+    return trabajo
+
+
+def procesar_uno(trabajador: Optional[str] = None) -> Optional[Trabajo]:
+    trabajo = reclamar(trabajador or nombre_trabajador())
+    return ejecutar(trabajo) if trabajo else None
+
+
+def ruta_exportacion(trabajo: Trabajo) -> Path:
+    carpeta = Path(settings.PLANOS_EXPORTACIONES_DIR)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    return carpeta / f"planos_{trabajo.pk}.csv"
+
+
+def _replica_para(trabajo: Trabajo):
+    """Las tareas de solo lectura leen de una réplica copiada después de encolarse."""
+    return replicas.leyendo_de(replicas.elegir(desde=trabajo.creado.timestamp()))
+
+
+def _planos_filtrados(parametros: dict):
+    queryset, errores = operaciones_masivas.filtrar_planos(
+        Plano.objects.all(), parametros.get("filtros") or {})
+    if errores:
+        raise ValueError(f"Filtros inválidos: {errores}")
+    return queryset
+
+
+# ------------------------------------------------------------
+# Tipos de trabajo
+# ------------------------------------------------------------
+
+@tarea("limpieza")
+def tarea_limpieza(trabajo: Trabajo, reportar) -> dict:
+    """
+    Elimina los planos que cumplan `filtros`, por lotes. Sin filtros hace lo
+    mismo que la limpieza síncrona: vacía también el archivo y los
+    resúmenes y deja la lápida de vaciado para el feed de cambios.
+    """
+    if not trabajo.parametros.get("filtros"):
+        _, detalles = operaciones_masivas.eliminar_todos()
+        return {"eliminados": detalles.get(Plano._meta.label, 0)}
+    queryset = _planos_filtrados(trabajo.parametros)
+    total = queryset.count() or 1
+    eliminados = operaciones_masivas.eliminar_masivo(
+        queryset, al_avanzar=lambda n: reportar(100 * n / total))
+    return {"eliminados": eliminados}
+
+
+CAMPOS_EXPORTACION = ("id", "titulo", "descripcion", "fecha_subida",
+                      "subido_por_id", "area", "subarea")
+
+
+@tarea("exportar")
+def tarea_exportar(trabajo: Trabajo, reportar) -> dict:
+    """Escribe un CSV con los planos, leyendo la tabla por lotes."""
+    queryset = _planos_filtrados(trabajo.parametros).order_by("id")
+    ruta = ruta_exportacion(trabajo)
+    filas = 0
+    with _replica_para(trabajo), open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        total = queryset.count() or 1
+        escritor = csv.writer(archivo)
+        escritor.writerow(CAMPOS_EXPORTACION)
+        for fila in queryset.values_list(*CAMPOS_EXPORTACION).iterator(chunk_size=LOTE_LECTURA):
+            escritor.writerow(fila)
+            filas += 1
+            if filas % LOTE_LECTURA == 0:
+                reportar(100 * filas / total)
+    return {"archivo": ruta.name, "filas": filas}
+
+
+@tarea("reporte")
+def tarea_reporte(trabajo: Trabajo, reportar) -> dict:
+    """
+    Resúmenes de `planos_logic` sobre toda la tabla, calculados por lotes
+    y acumulados, sin cargar todas las filas en memoria.
+    """
+    with _replica_para(trabajo):
+        por_tipo, por_area, leidas = resumenes.calcular_con_planos_logic(
+            _planos_filtrados(trabajo.parametros), reportar)
+
+    # Las claves JSON son texto: los ids de usuario se serializan como str.
+    return {
+        "planos": leidas,
+        "por_tipo": {str(uid): c for uid, c in por_tipo.items()},
+        "por_area": {str(uid): c for uid, c in por_area.items()},
+    }
+
+
+@tarea("relleno")
+def tarea_relleno(trabajo: Trabajo, reportar) -> dict:
+    """Recalcula datos derivados; `objetivo` indica cuáles (ver RELLENOS)."""
+    objetivo = trabajo.parametros.get("objetivo")
+    if objetivo not in RELLENOS:
+        raise ValueError(
+            f"Objetivo desconocido: {objetivo!r}. Opciones: {', '.join(RELLENOS)}")
+    return {"objetivo": objetivo, **(RELLENOS[objetivo](reportar) or {})}
+
+
+def _rellenar_busqueda(reportar) -> dict:
+    busqueda.reconstruir_indice()
+    return {}
+
+
+RELLENOS["busqueda"] = _rellenar_busqueda
+
+
+def _rellenar_resumenes(reportar) -> dict:
+    return {"planos": resumenes.reconstruir()}
+
+
+RELLENOS["resumenes"] = _rellenar_resumenes
+
+
+def _rellenar_estadisticas(reportar) -> dict:
+    # sqlite_stat1 / reltuples: base de los conteos estimados (ver conteo.py)
+    conteo.analizar(connection)
+    return {}
+
+
+RELLENOS["estadisticas"] = _rellenar_estadisticas
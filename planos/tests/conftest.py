@@ -0,0 +1,20 @@
+import pytest
+
+from planos.services import duplicados
+from usuarios.cache import cache_usuarios
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache_usuarios():
+    # Cada test revierte su transacción y los ids de usuario se reutilizan.
+    cache_usuarios.limpiar()
+    yield
+    cache_usuarios.limpiar()
+
+
+@pytest.fixture(autouse=True)
+def reiniciar_duplicados():
+    # El filtro de Bloom es del proceso y los ids también se reutilizan.
+    duplicados.reiniciar()
+    yield
+    duplicados.reiniciar()
@@ -0,0 +1,165 @@
+import hashlib
+import io
+
+import pytest
+from django.core.management import call_command
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.models import Adjunto, Plano, SubidaAdjunto
+from planos.services import adjuntos
+
+# ============================================================
+# Tests de los adjuntos de planos
+#   - Subida por partes, reanudable (PATCH con Upload-Offset)
+#   - Direccionado por contenido (SHA-256, un archivo por contenido)
+#   - Descarga con Range / If-Range
+#   - purgar_adjuntos
+# ============================================================
+
+CONTENIDO = bytes(range(256)) * 8000  # ~2 MB: más de un BLOQUE
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def carpeta(settings, tmp_path):
+    settings.PLANOS_ADJUNTOS_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.fixture()
+def plano(db, django_user_model):
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    return Plano.objects.create(titulo="Plano con archivo", descripcion="tablero eléctrico",
+                                subido_por=user, area="MECANICA", subarea="General")
+
+
+def iniciar(client, plano, nombre="vigas.pdf", tamano=len(CONTENIDO)):
+    r = client.post(reverse("plano-adjuntos", args=[plano.pk]),
+                    {"nombre": nombre, "tamano": tamano}, format="json")
+    assert r.status_code == 201, r.content
+    return r["Location"]
+
+
+def enviar(client, url, desde, datos):
+    return client.patch(url, datos, content_type="application/octet-stream",
+                        HTTP_UPLOAD_OFFSET=str(desde))
+
+
+def subir(client, plano, **kwargs):
+    r = enviar(client, iniciar(client, plano, **kwargs), 0, CONTENIDO)
+    assert r.status_code == 201, r.content
+    return r.json()
+
+
+def test_1_subida_por_partes_y_reanudable(client, plano, carpeta):
+    url = iniciar(client, plano)
+    assert SubidaAdjunto.objects.get().tipo_contenido == "application/pdf"
+
+    r = enviar(client, url, 0, CONTENIDO[:1_500_000])
+    assert r.status_code == 200 and r["Upload-Offset"] == "1500000"
+
+    # Un offset que no coincide con lo recibido: 409 con el offset correcto.
+    r = enviar(client, url, 1000, CONTENIDO[1000:])
+    assert r.status_code == 409 and r.json()["recibido"] == 1_500_000
+
+    # Otro worker (sin el hash en memoria) recalcula lo ya recibido.
+    adjuntos._hashes.clear()
+    assert client.head(url)["Upload-Offset"] == "1500000"
+    r = enviar(client, url, 1_500_000, CONTENIDO[1_500_000:])
+    assert r.status_code == 201
+    sha = hashlib.sha256(CONTENIDO).hexdigest()
+    assert r.json()["sha256"] == sha and r.json()["tamano"] == len(CONTENIDO)
+    assert adjuntos.ruta_contenido(sha).read_bytes() == CONTENIDO
+    assert not SubidaAdjunto.objects.exists()
+    assert not list((carpeta / "subidas").iterdir())
+
+
+def test_2_contenido_repetido_se_guarda_una_vez(client, plano, carpeta):
+    a = subir(client, plano)
+    b = subir(client, plano, nombre="copia.dwg")
+    assert a["sha256"] == b["sha256"] and a["id"] != b["id"]
+    assert len(list(carpeta.glob("??/*"))) == 1
+
+    r = client.get(reverse("plano-adjuntos", args=[plano.pk])).json()
+    assert [x["nombre"] for x in r] == ["vigas.pdf", "copia.dwg"]
+
+
+def test_3_descarga_con_range(client, plano):
+    adjunto = subir(client, plano)
+    url = reverse("adjunto-descarga", args=[adjunto["id"]])
+
+    r = client.get(url)
+    assert r.status_code == 200 and r["Accept-Ranges"] == "bytes"
+    assert b"".join(r.streaming_content) == CONTENIDO
+    assert "vigas.pdf" in r["Content-Disposition"]
+
+    r = client.get(url, HTTP_RANGE="bytes=100-1099")
+    assert r.status_code == 206 and r["Content-Length"] == "1000"
+    assert r["Content-Range"] == f"bytes 100-1099/{len(CONTENIDO)}"
+    assert b"".join(r.streaming_content) == CONTENIDO[100:1100]
+
+    r = client.get(url, HTTP_RANGE="bytes=-10")
+    assert b"".join(r.streaming_content) == CONTENIDO[-10:]
+    r = client.get(url, HTTP_RANGE="bytes=2000000-")
+    assert b"".join(r.streaming_content) == CONTENIDO[2_000_000:]
+
+    assert client.get(url, HTTP_RANGE=f"bytes={len(CONTENIDO)}-").status_code == 416
+    # If-Range con otra versión: el archivo completo.
+    assert client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"otro"').status_code == 200
+
+
+def test_4_validaciones(client, plano, settings):
+    settings.PLANOS_ADJUNTOS_MAX_BYTES = 1000
+    r = client.post(reverse("plano-adjuntos", args=[plano.pk]),
+                    {"nombre": "../../etc/grande.pdf", "tamano": 5000}, format="json")
+    assert r.status_code == 400 and "tamano" in r.json()
+
+    url = iniciar(client, plano, nombre="../../etc/plano.pdf", tamano=10)
+    assert SubidaAdjunto.objects.get().nombre == "plano.pdf"
+    assert enviar(client, url, 0, b"x" * 11).status_code == 400
+    assert client.patch(url, b"x", content_type="application/octet-stream").status_code == 400
+    assert client.post(reverse("plano-adjuntos", args=[999]),
+                       {"nombre": "a.pdf", "tamano": 1}, format="json").status_code == 404
+
+
+def test_5_purgar(client, plano, carpeta):
+    adjunto = subir(client, plano)
+    iniciar(client, plano)
+    call_command("purgar_adjuntos", "--horas", "0", stdout=io.StringIO())
+    assert not SubidaAdjunto.objects.exists()
+    assert Adjunto.objects.count() == 1  # su plano existe y usa el contenido
+    assert len(list(carpeta.glob("??/*"))) == 1
+
+    client.delete(reverse("plano-detail", args=[plano.pk]))
+    assert adjuntos.purgar(0) == {"subidas": 0, "adjuntos": 1, "contenidos": 1}
+    assert client.get(reverse("adjunto-detail", args=[adjunto["id"]])).status_code == 404
+
+
+def test_6_un_escritor_por_subida(client, plano):
+    url = iniciar(client, plano)
+    subida = SubidaAdjunto.objects.get()
+    visto = SubidaAdjunto.objects.get()  # leído por otra petición antes de avanzar
+    assert enviar(client, url, 0, CONTENIDO[:1000]).status_code == 200
+    ruta = adjuntos.ruta_parcial(subida)
+
+    # Otro PATCH con el cerrojo tomado: 409 sin truncar ni escribir.
+    with open(ruta, "r+b") as archivo:
+        assert adjuntos._tomar(subida, archivo)
+        r = enviar(client, url, 1000, b"x" * 500)
+        adjuntos._soltar(subida)
+    assert r.status_code == 409 and r.json()["recibido"] == 1000
+    assert ruta.read_bytes() == CONTENIDO[:1000]
+
+    # Con el offset viejo de su lectura: se relee `recibido` ya con el cerrojo.
+    with pytest.raises(adjuntos.DesfaseSubida):
+        adjuntos.recibir(visto, 0, io.BytesIO(b"y" * 1000), 1000)
+    assert ruta.read_bytes() == CONTENIDO[:1000]
+
+    r = enviar(client, url, 1000, CONTENIDO[1000:])
+    assert r.status_code == 201
+    assert r.json()["sha256"] == hashlib.sha256(CONTENIDO).hexdigest()
@@ -0,0 +1,115 @@
+import pytest
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from planos.admin import _opciones_filtro
+from planos.models import Plano
+from planos.services import conteo, resumenes
+
+# ============================================================
+# Tests del admin de Plano (conteos baratos y acciones por lotes)
+# ============================================================
+
+pytestmark = pytest.mark.django_db
+
+CHANGELIST = reverse("admin:planos_plano_changelist")
+
+
+@pytest.fixture()
+def planos(admin_user):
+    _opciones_filtro.limpiar()
+    for i in range(12):
+        area = "ELECTRICIDAD" if i % 2 else "MECANICA"
+        Plano.objects.create(titulo=f"Plano {i}", descripcion="tablero eléctrico principal",
+                             subido_por=admin_user, area=area, subarea=f"Zona-{i % 3}")
+    resumenes.reconstruir()
+    return Plano.objects.order_by("pk")
+
+
+def conteos_completos(ctx):
+    """COUNT(*) sobre planos_plano sin tope (LIMIT)."""
+    return [q["sql"] for q in ctx.captured_queries
+            if "COUNT(" in q["sql"] and '"planos_plano"' in q["sql"] and "LIMIT" not in q["sql"]]
+
+
+def test_1_lista_sin_count_sobre_la_tabla(admin_client, planos):
+    with CaptureQueriesContext(connection) as ctx:
+        r = admin_client.get(CHANGELIST)
+    assert r.status_code == 200
+    assert r.context["cl"].result_count == 12
+    assert conteos_completos(ctx) == []
+
+    with CaptureQueriesContext(connection) as ctx:
+        r = admin_client.get(CHANGELIST, {"area": "MECANICA", "subarea": "Zona-0"})
+    assert r.context["cl"].result_count == 2
+    assert conteos_completos(ctx) == []
+
+
+def test_2_conteo_con_tope(planos):
+    assert conteo.contar(Plano.objects.all()) == (12, True)
+    # Por encima del tope: estimación por muestreo, nunca por debajo del tope.
+    assert conteo.contar(Plano.objects.filter(area="MECANICA"), limite=4) == (6, False)
+
+
+def test_3_busqueda_y_filtros(admin_client, planos):
+    r = admin_client.get(CHANGELIST, {"q": "electrico"})
+    assert r.context["cl"].result_count == 12
+    r = admin_client.get(CHANGELIST)
+    assert "?area=ELECTRICIDAD" in r.content.decode()
+
+
+def test_4_eliminar_por_lotes(admin_client, planos):
+    datos = {"action": "eliminar_por_lotes", "select_across": "1", "index": "0",
+             ACTION_CHECKBOX_NAME: [planos[0].pk]}
+    r = admin_client.post(CHANGELIST + "?area=MECANICA", datos)
+    assert r.status_code == 200
+    assert "<strong>6</strong>" in r.content.decode()
+    assert Plano.objects.count() == 12
+
+    r = admin_client.post(CHANGELIST + "?area=MECANICA", {**datos, "post": "yes"})
+    assert r.status_code == 302
+    assert set(Plano.objects.values_list("area", flat=True)) == {"ELECTRICIDAD"}
+    assert resumenes.diferencias() == {}
+    assert "delete_selected" not in admin_client.get(CHANGELIST).content.decode()
+
+
+def test_5_reasignar_y_editar_mantienen_resumenes(admin_client, planos, django_user_model):
+    otro = django_user_model.objects.create_user(username="otro")
+    Plano.objects.filter(pk__in=[p.pk for p in planos[:3]]).update(subido_por=otro)
+    resumenes.reconstruir()
+
+    admin_client.post(CHANGELIST, {"action": "reasignar_a_mi", "index": "0",
+                                   ACTION_CHECKBOX_NAME: [p.pk for p in planos[:3]]})
+    assert not Plano.objects.filter(subido_por=otro).exists()
+    assert resumenes.diferencias() == {}
+
+    plano = planos[0]
+    r = admin_client.post(reverse("admin:planos_plano_change", args=[plano.pk]), {
+        "titulo": plano.titulo, "descripcion": "refuerzo estructural",
+        "subido_por": plano.subido_por_id, "area": "Nueva", "subarea": "Zona-9",
+        "referencia_externa": ""})
+    assert r.status_code == 302
+    assert resumenes.diferencias() == {}
+
+    admin_client.post(reverse("admin:planos_plano_delete", args=[plano.pk]), {"post": "yes"})
+    assert not Plano.objects.filter(pk=plano.pk).exists()
+    assert resumenes.diferencias() == {}
+
+
+def test_6_reasignar_exige_permiso_de_cambio(client, planos, django_user_model):
+    from django.contrib.auth.models import Permission
+
+    lector = django_user_model.objects.create_user(username="lector", password="secret123",
+                                                   is_staff=True)
+    lector.user_permissions.add(Permission.objects.get(codename="view_plano"))
+    client.force_login(lector)
+
+    r = client.get(CHANGELIST)
+    assert r.status_code == 200
+    assert "reasignar_a_mi" not in r.content.decode()
+
+    client.post(CHANGELIST, {"action": "reasignar_a_mi", "index": "0",
+                             ACTION_CHECKBOX_NAME: [p.pk for p in planos[:3]]})
+    assert not Plano.objects.filter(subido_por=lector).exists()
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.middleware import Compuerta, ControlAdmisionMiddleware, clase_de
+from planos.services import metricas
+
+# ============================================================
+# Tests del control de admisión (503 + Retry-After) y de
+# GET /api/metricas/
+# ============================================================
+
+
+@pytest.fixture(autouse=True)
+def contadores_limpios():
+    metricas.reiniciar()
+
+
+def middleware_bloqueante(settings, **clase):
+    """Middleware cuya vista se queda en curso hasta que se libera `soltar`."""
+    settings.PLANOS_ADMISION = {"escritura": clase}
+    dentro, soltar = threading.Event(), threading.Event()
+
+    def vista(request):
+        dentro.set()
+        soltar.wait(5)
+        return HttpResponse("ok")
+
+    return ControlAdmisionMiddleware(vista), dentro, soltar
+
+
+def en_hilo(mw, request, respuestas):
+    hilo = threading.Thread(target=lambda: respuestas.append(mw(request)))
+    hilo.start()
+    return hilo
+
+
+def test_1_clasificacion():
+    rf = RequestFactory()
+    assert clase_de(rf.get("/api/planos/")) == "lectura"
+    assert clase_de(rf.post("/api/planos/")) == "escritura"
+    assert clase_de(rf.delete("/api/planos/3/")) == "escritura"
+    assert clase_de(rf.patch("/api/planos/bulk/?area=X")) == "masivo"
+    assert clase_de(rf.post("/api/planos/upsert/")) == "masivo"
+    assert clase_de(rf.delete("/api/planos/limpiar-pruebas/")) == "masivo"
+    assert clase_de(rf.patch("/api/subidas/0b1c/")) == "transferencia"
+    assert clase_de(rf.get("/api/adjuntos/3/descarga/")) == "transferencia"
+
+
+def test_2_cola_llena_rechaza_al_instante(settings):
+    mw, dentro, soltar = middleware_bloqueante(settings, concurrencia=1, cola=0, espera_ms=1000)
+    respuestas = []
+    hilo = en_hilo(mw, RequestFactory().post("/api/planos/"), respuestas)
+    assert dentro.wait(5)
+
+    r = mw(RequestFactory().post("/api/planos/"))
+    assert r.status_code == 503
+    assert r["Retry-After"] == "1"
+
+    soltar.set()
+    hilo.join()
+    assert respuestas[0].status_code == 200
+    datos = metricas.instantanea()
+    assert datos["admision.escritura.rechazadas_cola_llena"] == 1
+    assert datos["admision.escritura.admitidas"] == 1
+    assert datos["admision.escritura.en_curso"] == 0
+
+
+def test_3_vence_el_plazo_en_la_cola(settings):
+    mw, dentro, soltar = middleware_bloqueante(settings, concurrencia=1, cola=1, espera_ms=50)
+    respuestas = []
+    hilo = en_hilo(mw, RequestFactory().post("/api/planos/"), respuestas)
+    assert dentro.wait(5)
+
+    r = mw(RequestFactory().post("/api/planos/"))
+    assert r.status_code == 503
+    assert metricas.instantanea()["admision.escritura.rechazadas_plazo"] == 1
+
+    soltar.set()
+    hilo.join()
+    # Las lecturas no pasan por la compuerta de escritura.
+    assert mw(RequestFactory().get("/api/planos/")).status_code == 200
+
+
+def test_4_en_cola_entra_al_liberarse_un_cupo():
+    c = Compuerta(concurrencia=1, cola=1, espera_ms=2000)
+    assert c.entrar() == ""
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.append(c.entrar()))
+    hilo.start()
+    while not c.en_cola:
+        pass
+    c.salir()
+    hilo.join()
+    assert resultado == [""]
+    assert (c.en_curso, c.en_cola) == (1, 0)
+
+
+def test_5_metricas_solo_staff(db, django_user_model):
+    client = APIClient()
+    assert client.get(reverse("metricas")).status_code in (401, 403)
+
+    client.get(reverse("plano-list"))
+    staff = django_user_model.objects.create_user(username="ops", password="x", is_staff=True)
+    client.force_authenticate(staff)
+    datos = client.get(reverse("metricas")).json()
+    assert datos["admision.lectura.admitidas"] >= 1
+    assert datos["admision.lectura.en_curso"] == 0
@@ -74,6 +74,24 @@ def test_1b_crear_plano_400_faltan_campos(client, url_list, payload_ok):
     r = client.post(url_list, bad, format="json")
     assert r.status_code == 400
 
+@pytest.mark.django_db
+def test_1c_crear_plano_400_reglas_de_negocio(client, url_list, payload_ok):
+    bad = payload_ok | {"titulo": "12345", "descripcion": "plano de spam"}
+    r = client.post(url_list, bad, format="json")
+    assert r.status_code == 400
+    body = r.json()
+    assert body["titulo"] == ["El título no puede ser solo números."]
+    assert body["non_field_errors"] == [
+        "El contenido incluye palabras no permitidas."]
+
+
+@pytest.mark.django_db
+def test_1d_patch_valida_con_datos_existentes(client, url_list, payload_ok):
+    rid = client.post(url_list, payload_ok, format="json").json()["id"]
+    r = client.patch(url_detail(rid), {"descripcion": "corta"}, format="json")
+    assert r.status_code == 400
+    assert "descripcion" in r.json()
+
 # ------------------------------------------------------------
 # 2) Listar
 # ------------------------------------------------------------
@@ -172,3 +190,172 @@ def test_6b_limpiar_pruebas(client, url_list, url_limpiar_pruebas, payload_ok):
     r2 = client.get(url_list)
     assert r2.status_code == 200
     assert r2.json() == []
+
+# ------------------------------------------------------------
+# 7) Ingesta idempotente: upsert por referencia_externa
+# ------------------------------------------------------------
+
+
+@pytest.fixture()
+def url_upsert():
+    # @action(url_path='upsert') -> "plano-upsert"
+    return reverse("plano-upsert")
+
+
+@pytest.mark.django_db
+def test_7_upsert_reenvio_es_idempotente(client, url_list, url_upsert, payload_ok):
+    lote = [payload_ok | {"referencia_externa": f"ERP-{i}"} for i in range(3)]
+    r = client.post(url_upsert, lote, format="json")
+    assert r.status_code == 200
+    assert r.json() == {"recibidos": 3, "creados": 3,
+                        "actualizados": 0, "sin_cambios": 0}
+
+    r = client.post(url_upsert, {"planos": lote}, format="json")
+    assert r.json()["sin_cambios"] == 3
+    assert len(client.get(url_list).json()) == 3
+
+
+@pytest.mark.django_db
+def test_7b_upsert_actualiza_por_referencia(client, url_list, url_upsert, payload_ok):
+    fila = payload_ok | {"referencia_externa": "ERP-1"}
+    client.post(url_upsert, [fila], format="json")
+    r = client.post(url_upsert, [fila | {"area": "Mantenimiento"}], format="json")
+    assert r.json()["actualizados"] == 1
+    planos = client.get(url_list).json()
+    assert [p["area"] for p in planos] == ["Mantenimiento"]
+
+
+@pytest.mark.django_db
+def test_7c_upsert_lote_invalido_no_escribe(client, url_list, url_upsert, payload_ok):
+    lote = [
+        payload_ok | {"referencia_externa": "ERP-1"},
+        payload_ok | {"referencia_externa": "ERP-1", "titulo": "12"},
+        payload_ok | {"referencia_externa": "ERP-2", "subido_por": 999999},
+    ]
+    r = client.post(url_upsert, lote, format="json")
+    assert r.status_code == 400
+    errores = r.json()["errores"]
+    assert set(errores) == {"1", "2"}
+    assert "El título no puede ser solo números." in errores["1"]
+    assert client.get(url_list).json() == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("subido_por", [[1], {"id": 1}, "1", True, None])
+def test_7d_upsert_subido_por_no_entero(client, url_list, url_upsert, payload_ok, subido_por):
+    r = client.post(url_upsert, [payload_ok | {"referencia_externa": "ERP-1",
+                                               "subido_por": subido_por}], format="json")
+    assert r.status_code == 400
+    assert r.json()["errores"] == {"0": ["Formato de fila inválido."]}
+    assert client.get(url_list).json() == []
+
+
+@pytest.mark.django_db
+def test_7e_upsert_respeta_largos_maximos(client, url_list, url_upsert, payload_ok):
+    lote = [payload_ok | {"referencia_externa": "ERP-1", "titulo": "T" * 300},
+            payload_ok | {"referencia_externa": "R" * 500},
+            payload_ok | {"referencia_externa": "ERP-3", "titulo": "T" * 100}]
+    r = client.post(url_upsert, lote, format="json")
+    assert r.status_code == 400
+    assert r.json()["errores"] == {
+        "0": ["El campo titulo admite como máximo 100 caracteres."],
+        "1": ["El campo referencia_externa admite como máximo 100 caracteres."]}
+    assert client.get(url_list).json() == []
+
+# ------------------------------------------------------------
+# 8) Operaciones masivas por filtro: PATCH / DELETE /bulk/
+# ------------------------------------------------------------
+
+
+@pytest.fixture()
+def url_bulk():
+    # @action(url_path='bulk') -> "plano-bulk"
+    return reverse("plano-bulk")
+
+
+@pytest.fixture()
+def planos_zona(client, url_list, payload_ok):
+    for i, subarea in enumerate(["Zona-1", "Zona-1", "Zona-2"]):
+        client.post(url_list, payload_ok | {"titulo": f"Plano {i}", "subarea": subarea},
+                    format="json")
+
+
+@pytest.mark.django_db
+def test_8_bulk_patch_por_subarea(client, url_list, url_bulk, planos_zona):
+    r = client.patch(f"{url_bulk}?subarea=Zona-1", {"area": "Mantenimiento"}, format="json")
+    assert r.status_code == 200
+    assert r.json() == {"afectados": 2, "dry_run": False}
+    areas = sorted(p["area"] for p in client.get(url_list).json())
+    assert areas == ["Mantenimiento", "Mantenimiento", "Producción"]
+
+
+@pytest.mark.django_db
+def test_8b_bulk_patch_valida_solo_campos_enviados(client, url_bulk, planos_zona):
+    r = client.patch(f"{url_bulk}?subarea=Zona-1", {"area": "AB"}, format="json")
+    assert r.status_code == 400
+    assert r.json()["area"] == ["El campo área debe tener al menos 3 caracteres."]
+
+
+@pytest.mark.django_db
+def test_8c_bulk_delete_dry_run_y_borrado(client, url_list, url_bulk, user, planos_zona):
+    url = f"{url_bulk}?subido_por={user.id}&subarea=Zona-1"
+    r = client.delete(url + "&dry_run=true")
+    assert r.json() == {"afectados": 2, "dry_run": True}
+    assert len(client.get(url_list).json()) == 3
+
+    r = client.delete(url)
+    assert r.json() == {"afectados": 2, "dry_run": False}
+    assert [p["subarea"] for p in client.get(url_list).json()] == ["Zona-2"]
+
+
+@pytest.mark.django_db
+def test_8d_bulk_sin_filtro_o_filtro_invalido_400(client, url_bulk, planos_zona):
+    assert client.delete(url_bulk).status_code == 400
+    r = client.delete(f"{url_bulk}?desde=ayer")
+    assert r.status_code == 400
+    assert "desde" in r.json()
+
+
+@pytest.mark.django_db
+def test_8e_bulk_hasta_incluye_el_dia_completo(client, url_bulk, planos_zona):
+    from datetime import datetime, timezone as tz
+    from planos.models import Plano
+    Plano.objects.update(fecha_subida=datetime(2024, 5, 10, 18, 30, tzinfo=tz.utc))
+    assert client.delete(f"{url_bulk}?hasta=2024-05-09&dry_run=true").json()["afectados"] == 0
+    assert client.delete(f"{url_bulk}?hasta=2024-05-10&dry_run=true").json()["afectados"] == 3
+    assert client.delete(f"{url_bulk}?desde=2024-05-10&hasta=2024-05-10&dry_run=true"
+                         ).json()["afectados"] == 3
+    # Fecha-hora sin zona: se toma en TIME_ZONE (UTC).
+    assert client.delete(f"{url_bulk}?hasta=2024-05-10T18:00:00&dry_run=true"
+                         ).json()["afectados"] == 0
+
+# ------------------------------------------------------------
+# 9) Búsqueda de texto completo: GET /api/planos/?q=
+# ------------------------------------------------------------
+
+
+@pytest.mark.django_db
+def test_9_busqueda_sin_tildes_y_por_relevancia(client, url_list, payload_ok):
+    client.post(url_list, payload_ok | {"titulo": "Plano General",
+                                        "descripcion": "Acometida eléctrica del patio"}, format="json")
+    client.post(url_list, payload_ok | {"titulo": "Plano Eléctrico",
+                                        "descripcion": "Tablero eléctrico principal"}, format="json")
+    client.post(url_list, payload_ok | {"titulo": "Plano Estructural",
+                                        "descripcion": "Refuerzo de vigas y columnas"}, format="json")
+
+    r = client.get(url_list, {"q": "ELECTRICO"})
+    assert r.status_code == 200
+    assert [p["titulo"] for p in r.json()] == ["Plano Eléctrico"]
+
+    r = client.get(url_list, {"q": "electric"})
+    assert [p["titulo"] for p in r.json()] == ["Plano Eléctrico", "Plano General"]
+
+
+@pytest.mark.django_db
+def test_9b_busqueda_refleja_cambios_y_borrados(client, url_list, payload_ok):
+    rid = client.post(url_list, payload_ok, format="json").json()["id"]
+    client.patch(url_detail(rid), {"titulo": "Plano Hidráulico"}, format="json")
+    assert [p["id"] for p in client.get(url_list, {"q": "hidraulico"}).json()] == [rid]
+    client.delete(url_detail(rid))
+    assert client.get(url_list, {"q": "hidraulico"}).json() == []
+    assert client.get(url_list, {"q": '"*'}).json() == []
@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.models import Plano, PlanoArchivado
+from planos.services import archivo, conteo, resumenes
+
+# ============================================================
+# Tests del archivo de planos antiguos (PlanoArchivado)
+#   - archivar por lotes y reanudar
+#   - los resúmenes siguen contando a los archivados
+#   - ?incluir_archivados=true en la lista y el detalle
+# ============================================================
+
+LISTA = reverse("plano-list")
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def planos(db, django_user_model, client):
+    """10 planos creados por la API; los 7 primeros con fecha de hace un año."""
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    ids = [client.post(LISTA, {"titulo": f"Plano {i}", "descripcion": f"tablero eléctrico {i}",
+                               "subido_por": user.pk, "area": "MECANICA", "subarea": "General"},
+                       format="json").json()["id"] for i in range(10)]
+    Plano.objects.filter(pk__in=ids[:7]).update(fecha_subida=timezone.now() - timedelta(days=365))
+    return ids
+
+
+def test_1_archivar_por_lotes_mantiene_resumenes(planos):
+    resumen = resumenes.leer()
+    avances = []
+    assert archivo.archivar(timezone.now() - timedelta(days=30), tamano_lote=3,
+                            al_avanzar=avances.append) == 7
+    assert avances == [3, 6, 7]
+    assert sorted(PlanoArchivado.objects.values_list("pk", flat=True)) == planos[:7]
+    assert sorted(Plano.objects.values_list("pk", flat=True)) == planos[7:]
+
+    assert resumenes.leer() == resumen
+    assert resumenes.diferencias() == {}
+    assert conteo.total_planos() == 3
+    assert conteo.total_planos(incluir_archivados=True) == 10
+
+    # Reanudar no duplica nada.
+    assert archivo.archivar(timezone.now() - timedelta(days=30)) == 0
+    resumenes.reconstruir()
+    assert resumenes.diferencias() == {}
+    assert conteo.total_planos() == 3
+
+
+def test_2_lista_y_detalle_con_archivados(planos, client):
+    call_command("archivar_planos", "--dias", "30", stdout=None)
+
+    r = client.get(LISTA, {"limit": 50}).json()
+    assert r["count"] == 3 and {p["id"] for p in r["results"]} == set(planos[7:])
+
+    r = client.get(LISTA, {"limit": 4, "incluir_archivados": "true"}).json()
+    assert r["count"] == 10 and not r["count_estimado"] and len(r["results"]) == 4
+    r = client.get(LISTA, {"incluir_archivados": "true"}).json()
+    assert sorted(p["id"] for p in r) == planos
+
+    detalle = reverse("plano-detail", args=[planos[0]])
+    assert client.get(detalle).status_code == 404
+    r = client.get(detalle, {"incluir_archivados": "true"})
+    assert r.status_code == 200 and r.json()["titulo"] == "Plano 0"
+    # Los archivados no se editan.
+    assert client.patch(detalle + "?incluir_archivados=true", {"titulo": "Otro título"},
+                        format="json").status_code == 404
+
+    assert client.get(LISTA, {"q": "tablero", "incluir_archivados": "1"}).status_code == 400
+
+
+def test_3_comando_dry_run_y_vaciado(planos, client):
+    call_command("archivar_planos", "--antes-de", (timezone.now() - timedelta(days=30)).date().isoformat(),
+                 "--dry-run", stdout=None)
+    assert PlanoArchivado.objects.count() == 0
+
+    call_command("archivar_planos", "--dias", "30", "--lote", "2", stdout=None)
+    assert PlanoArchivado.objects.count() == 7
+
+    client.delete(reverse("plano-eliminar-todos"))
+    assert PlanoArchivado.objects.count() == 0
+    assert resumenes.leer() == ({}, {})
+
+
+def test_4_upsert_y_archivo_comparten_referencias(db, client, django_user_model):
+    user = django_user_model.objects.create_user(username="integrador")
+    fila = {"referencia_externa": "R-1", "titulo": "Externo", "subido_por": user.pk,
+            "descripcion": "tablero eléctrico", "area": "CIVIL", "subarea": "Norte"}
+    upsert = reverse("plano-upsert")
+    client.post(upsert, [fila], format="json")
+    original = Plano.objects.get(referencia_externa="R-1")
+    Plano.objects.filter(pk=original.pk).update(fecha_subida=timezone.now() - timedelta(days=365))
+    corte = timezone.now() - timedelta(days=30)
+    assert archivo.archivar(corte) == 1
+
+    # Reenviar lo mismo no toca el archivo; un cambio lo devuelve a la tabla caliente.
+    assert client.post(upsert, [fila], format="json").json()["sin_cambios"] == 1
+    assert PlanoArchivado.objects.filter(referencia_externa="R-1").exists()
+    r = client.post(upsert, [{**fila, "descripcion": "refuerzo estructural"}], format="json")
+    assert r.json()["actualizados"] == 1 and r.json()["creados"] == 0
+    plano = Plano.objects.get(referencia_externa="R-1")
+    assert plano.pk == original.pk and plano.descripcion == "refuerzo estructural"
+    assert not PlanoArchivado.objects.exists()
+    assert resumenes.diferencias() == {}
+
+    # Se vuelve a archivar sin chocar con la referencia.
+    assert archivo.archivar(corte) == 1
+    assert resumenes.diferencias() == {}
+
+    # Un alta suelta no puede tomar la referencia de un archivado.
+    r = client.post(LISTA, {**fila, "titulo": "Otro"}, format="json")
+    assert r.status_code == 400 and "referencia_externa" in r.json()
+
+
+def test_5_archivar_reemplaza_referencia_repetida(planos):
+    # Estado previo a la regla: la misma referencia en el archivo y en la tabla caliente.
+    Plano.objects.filter(pk=planos[0]).update(referencia_externa="R-9")
+    archivo.archivar(timezone.now() - timedelta(days=30), tamano_lote=1)
+    viejo = PlanoArchivado.objects.get(referencia_externa="R-9")
+    Plano.objects.filter(pk=planos[8]).update(referencia_externa="R-9",
+                                             fecha_subida=timezone.now() - timedelta(days=365))
+
+    assert archivo.archivar(timezone.now() - timedelta(days=30)) == 1
+    nuevo = PlanoArchivado.objects.get(referencia_externa="R-9")
+    assert nuevo.pk == planos[8] and not PlanoArchivado.objects.filter(pk=viejo.pk).exists()
+    assert resumenes.diferencias() == {}
@@ -0,0 +1,77 @@
+import pytest
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from usuarios.authentication import TokenCacheadoAuthentication, cache_tokens
+
+# ============================================================
+# Tests de autenticación por token con caché en memoria
+#   - POST/DELETE /api/token/
+#   - TokenCacheadoAuthentication (caché con TTL y revocación)
+# ============================================================
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia():
+    cache_tokens.limpiar()
+    yield
+    cache_tokens.limpiar()
+
+
+@pytest.fixture()
+def user(db, django_user_model):
+    return django_user_model.objects.create_user(username="tester", password="secret123")
+
+
+@pytest.fixture()
+def token(user):
+    return Token.objects.create(user=user)
+
+
+def autenticar(key):
+    request = APIRequestFactory().get("/api/planos/", HTTP_AUTHORIZATION=f"Token {key}")
+    return TokenCacheadoAuthentication().authenticate(request)
+
+
+def test_1_obtener_token_y_usarlo(user):
+    client = APIClient()
+    r = client.post(reverse("token"), {"username": "tester", "password": "secret123"}, format="json")
+    assert r.status_code == 200
+    client.credentials(HTTP_AUTHORIZATION=f"Token {r.json()['token']}")
+    assert client.get(reverse("plano-list")).status_code == 200
+
+    client.credentials(HTTP_AUTHORIZATION="Token invalido")
+    assert client.get(reverse("plano-list")).status_code == 401
+
+
+def test_2_segunda_peticion_sin_consultas(token, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert autenticar(token.key)[0] == token.user
+    with django_assert_num_queries(0):
+        assert autenticar(token.key)[0] == token.user
+
+
+def test_3_revocacion_al_borrar_token(token):
+    autenticar(token.key)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    assert client.delete(reverse("token")).status_code == 204
+    with pytest.raises(AuthenticationFailed):
+        autenticar(token.key)
+
+
+def test_4_revocacion_al_desactivar_usuario(user, token):
+    autenticar(token.key)
+    user.is_active = False
+    user.save()
+    with pytest.raises(AuthenticationFailed):
+        autenticar(token.key)
+
+
+def test_5_ttl_vencido_vuelve_a_consultar(token, monkeypatch, django_assert_num_queries):
+    monkeypatch.setattr(cache_tokens, "ttl", -1)
+    autenticar(token.key)
+    with django_assert_num_queries(1):
+        autenticar(token.key)
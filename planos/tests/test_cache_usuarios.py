@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from usuarios.cache import cache_usuarios, resolver_usuarios
+
+# ============================================================
+# Tests de la caché de validación de subido_por
+# ============================================================
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="autor", password="secret123")
+
+
+def payload(user_id, i=0):
+    return {"titulo": f"Plano caché {i}", "descripcion": "tablero eléctrico principal",
+            "subido_por": user_id, "area": "Producción", "subarea": "Laminado"}
+
+
+def consultas_a_usuarios(ctx):
+    return [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"]]
+
+
+def test_1_segunda_escritura_no_consulta_auth_user(client, user):
+    assert client.post(reverse("plano-list"), payload(user.id, 1), format="json").status_code == 201
+
+    with CaptureQueriesContext(connection) as ctx:
+        r = client.post(reverse("plano-list"), payload(user.id, 2), format="json")
+    assert r.status_code == 201
+    assert r.json()["subido_por"] == user.id
+    assert consultas_a_usuarios(ctx) == []
+
+    url = reverse("plano-detail", args=[r.json()["id"]])
+    with CaptureQueriesContext(connection) as ctx:
+        assert client.put(url, payload(user.id, 3), format="json").status_code == 200
+    assert consultas_a_usuarios(ctx) == []
+
+
+def test_2_usuario_inexistente_sigue_siendo_400(client):
+    r = client.post(reverse("plano-list"), payload(999_999), format="json")
+    assert r.status_code == 400
+    assert "subido_por" in r.json()
+
+
+def test_3_eliminar_o_desactivar_invalida_la_cache(client, user, django_user_model):
+    assert client.post(reverse("plano-list"), payload(user.id), format="json").status_code == 201
+    assert cache_usuarios.obtener(user.id)
+
+    user.is_active = False
+    user.save()
+    assert cache_usuarios.obtener(user.id) is None
+
+    resolver_usuarios([user.id])
+    uid = user.id
+    user.delete()
+    assert cache_usuarios.obtener(uid) is None
+    assert client.post(reverse("plano-list"), payload(uid), format="json").status_code == 400
+
+
+def test_4_resolver_lote_con_un_solo_in(django_user_model):
+    ids = [django_user_model.objects.create_user(username=f"u{i}").id for i in range(5)]
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert resolver_usuarios(ids + [999_999]) == set(ids)
+    assert len(ctx.captured_queries) == 1
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert resolver_usuarios(ids[:3]) == set(ids[:3])
+    assert len(ctx.captured_queries) == 0
@@ -0,0 +1,167 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.models import Plano
+
+# ============================================================
+# Tests del feed de cambios
+#   - GET /api/planos/cambios/?desde=<cursor>&limite=<n>
+# ============================================================
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("plano-cambios")
+
+
+@pytest.fixture(autouse=True)
+def sin_margen(settings):
+    settings.PLANOS_CAMBIOS_MARGEN_MS = 0
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="tester", password="secret123")
+
+
+@pytest.fixture()
+def planos(user):
+    return [Plano.objects.create(titulo=f"Plano {i}", descripcion="patio general de planta",
+                                 subido_por=user, area="MECANICA", subarea="General")
+            for i in range(3)]
+
+
+def sincronizar(client, cursor=None, limite=500):
+    """Recorre el feed hasta `hay_mas == false`; devuelve (entradas, cursor)."""
+    entradas = []
+    while True:
+        params = {"limite": limite, **({"desde": cursor} if cursor else {})}
+        datos = client.get(URL, params).json()
+        entradas += datos["cambios"]
+        cursor = datos["cursor"]
+        if not datos["hay_mas"]:
+            return entradas, cursor
+
+
+def test_1_sincronizacion_inicial_paginada(client, planos):
+    primera = client.get(URL, {"limite": 2}).json()
+    assert [c["plano"]["id"] for c in primera["cambios"]] == [p.pk for p in planos[:2]]
+    assert primera["hay_mas"] is True
+
+    resto, cursor = sincronizar(client, primera["cursor"], limite=2)
+    assert [c["plano"]["titulo"] for c in resto] == ["Plano 2"]
+
+    vacio = client.get(URL, {"desde": cursor}).json()
+    assert vacio == {"cambios": [], "cursor": cursor, "hay_mas": False}
+
+
+def test_2_cambios_y_bajas(client, planos):
+    _, cursor = sincronizar(client)
+    client.patch(reverse("plano-detail", args=[planos[1].pk]), {"titulo": "Editado"}, format="json")
+    client.delete(reverse("plano-detail", args=[planos[0].pk]))
+
+    entradas, cursor = sincronizar(client, cursor)
+    assert entradas == [
+        {"tipo": "upsert", "plano": entradas[0]["plano"]},
+        {"tipo": "baja", "id": planos[0].pk},
+    ]
+    assert entradas[0]["plano"]["titulo"] == "Editado"
+
+
+def test_3_operaciones_masivas(client, planos, user):
+    _, cursor = sincronizar(client)
+    client.patch(reverse("plano-bulk") + "?area=MECANICA", {"subarea": "Zona-1"}, format="json")
+    entradas, cursor = sincronizar(client, cursor)
+    assert {c["plano"]["id"] for c in entradas} == {p.pk for p in planos}
+
+    client.post(reverse("plano-upsert"), [{"referencia_externa": "R-1", "titulo": "Externo",
+                                           "descripcion": "cargado por integración",
+                                           "subido_por": user.pk, "area": "CIVIL",
+                                           "subarea": "Norte"}], format="json")
+    client.delete(reverse("plano-bulk") + f"?ids={planos[2].pk}")
+    entradas, cursor = sincronizar(client, cursor)
+    assert [c["tipo"] for c in entradas] == ["upsert", "baja"]
+
+    client.delete(reverse("plano-eliminar-todos"))
+    entradas, _ = sincronizar(client, cursor)
+    assert entradas == [{"tipo": "vaciado"}]
+
+
+def test_4_usuario_eliminado(client, planos, user):
+    _, cursor = sincronizar(client)
+    user.delete()
+    entradas, _ = sincronizar(client, cursor)
+    assert sorted(c["id"] for c in entradas) == sorted(p.pk for p in planos)
+
+
+def test_5_margen_de_confirmacion(client, planos, settings):
+    settings.PLANOS_CAMBIOS_MARGEN_MS = 60_000
+    assert client.get(URL).json()["cambios"] == []
+
+
+def test_6_parametros_invalidos(client, planos):
+    assert client.get(URL, {"desde": "abc"}).status_code == 400
+    assert client.get(URL, {"desde": "1.7.1"}).status_code == 400
+    assert client.get(URL, {"limite": "0"}).status_code == 400
+
+
+def test_7_consultas_acotadas(client, user):
+    Plano.objects.bulk_create([Plano(titulo=f"P{i}", descripcion="x" * 12, subido_por=user,
+                                     area="CIVIL", subarea="Sur") for i in range(50)])
+    with CaptureQueriesContext(connection) as ctx:
+        datos = client.get(URL, {"limite": 20}).json()
+    assert len(datos["cambios"]) == 20
+    # Una consulta por altas y otra por bajas, sin importar el tamaño de la tabla.
+    assert len(ctx.captured_queries) == 2
+
+
+def test_8_modificado_por_lote(planos, monkeypatch):
+    from django.utils import timezone
+
+    from planos.services import operaciones_masivas
+
+    # Cada lote toma su propio instante dentro de su transacción: uno que
+    # confirma tarde no queda con el instante del primero.
+    inicio, llamadas = timezone.now(), []
+
+    def ahora():
+        llamadas.append(None)
+        return inicio + timedelta(seconds=len(llamadas))
+
+    monkeypatch.setattr(operaciones_masivas.timezone, "now", ahora)
+    operaciones_masivas.actualizar_masivo(Plano.objects.all(), {"subarea": "Zona-2"},
+                                          tamano_lote=1)
+    monkeypatch.undo()
+    instantes = list(Plano.objects.order_by("pk").values_list("modificado", flat=True))
+    assert instantes == [inicio + timedelta(seconds=i) for i in (1, 2, 3)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_9_instante_con_el_bloqueo_tomado(user, monkeypatch):
+    # En SQLite la transacción toma el bloqueo de escritura al empezar
+    # (BEGIN IMMEDIATE) y `modificado` se fija dentro: su orden es el de los
+    # COMMIT aunque la escritura haya esperado el bloqueo.
+    if connection.vendor == "sqlite":
+        assert connection.transaction_mode == "IMMEDIATE"
+    campo = Plano._meta.get_field("modificado")
+    original, en_transaccion = campo.pre_save, []
+
+    def pre_save(instancia, add):
+        en_transaccion.append(connection.in_atomic_block)
+        return original(instancia, add)
+
+    monkeypatch.setattr(campo, "pre_save", pre_save)
+    plano = Plano.objects.create(titulo="Plano A", descripcion="patio general de planta",
+                                 subido_por=user, area="MECANICA", subarea="General")
+    plano.titulo = "Plano B"
+    plano.save(update_fields=["titulo"])
+    assert en_transaccion == [True, True]
@@ -0,0 +1,104 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.middleware import CompresionMiddleware, elegir_codificacion
+from planos.models import Plano
+from planos.services import metricas, trabajos
+
+# ============================================================
+# Tests de la compresión gzip / brotli de /api/
+# ============================================================
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def muchos_planos(db, django_user_model):
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    Plano.objects.bulk_create([
+        Plano(titulo=f"Plano {i}", descripcion="tablero eléctrico de la nave",
+              subido_por=user, area="Producción", subarea="Laminado")
+        for i in range(50)])
+    return user
+
+
+def test_1_negociacion():
+    assert elegir_codificacion("gzip, deflate, br", True) == "br"
+    assert elegir_codificacion("gzip, deflate, br", False) == "gzip"
+    assert elegir_codificacion("br;q=0, gzip;q=0.5", True) == "gzip"
+    assert elegir_codificacion("*", True) == "br"
+    assert elegir_codificacion("identity", True) == ""
+    assert elegir_codificacion("", True) == ""
+
+
+@pytest.mark.parametrize("codificacion, descomprimir", [
+    ("gzip", gzip.decompress), ("br", brotli.decompress)])
+def test_2_lista_comprimida(client, muchos_planos, codificacion, descomprimir):
+    metricas.reiniciar()
+    sin = client.get(reverse("plano-list"))
+    con = client.get(reverse("plano-list"), HTTP_ACCEPT_ENCODING=codificacion)
+
+    assert "Content-Encoding" not in sin
+    assert con["Content-Encoding"] == codificacion
+    assert "Accept-Encoding" in con["Vary"]
+    assert int(con["Content-Length"]) == len(con.content) < len(sin.content) / 4
+    assert json.loads(descomprimir(con.content)) == sin.json()
+    assert metricas.instantanea()[f"compresion.{codificacion}.bytes_originales"] == len(sin.content)
+
+
+def test_3_respuesta_pequena_sin_comprimir(client, db):
+    r = client.get(reverse("plano-list"), HTTP_ACCEPT_ENCODING="gzip")
+    assert r.content == b"[]"
+    assert "Content-Encoding" not in r
+
+
+def test_4_exportacion_en_streaming(client, muchos_planos, settings, tmp_path):
+    settings.PLANOS_EXPORTACIONES_DIR = tmp_path
+    trabajo = trabajos.encolar("exportar")
+    call_command("procesar_trabajos", "--una-vez", "--hilos", "1", stdout=None)
+    url = reverse("trabajo-resultado", args=[trabajo.pk])
+
+    r = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert r.streaming
+    assert r["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in r
+    csv = gzip.decompress(b"".join(r.streaming_content))
+    assert csv == trabajos.ruta_exportacion(trabajo).read_bytes()
+
+
+def test_5_no_toca_206_ni_respuestas_ya_codificadas():
+    cuerpo = b"x" * 5000
+    peticion = RequestFactory().get("/api/planos/", HTTP_ACCEPT_ENCODING="gzip")
+
+    def vista(**cabeceras):
+        def get_response(request):
+            r = HttpResponse(cuerpo, content_type="text/plain", status=cabeceras.pop("status", 200))
+            for k, v in cabeceras.items():
+                r[k] = v
+            return r
+        return CompresionMiddleware(get_response)
+
+    assert "Content-Encoding" not in vista(status=206)(peticion)
+    assert vista(**{"Content-Encoding": "br"})(peticion).content == cuerpo
+    assert "Content-Encoding" not in vista()(RequestFactory().get("/admin/", HTTP_ACCEPT_ENCODING="gzip"))
+    assert vista()(peticion)["Content-Encoding"] == "gzip"
+
+
+def test_6_streaming_por_bloques():
+    bloques = [b"area,subarea\\n" * 200 for _ in range(20)]
+    mw = CompresionMiddleware(lambda request: StreamingHttpResponse(iter(bloques), content_type="text/csv"))
+    r = mw(RequestFactory().get("/api/x/", HTTP_ACCEPT_ENCODING="gzip"))
+    salida = list(r.streaming_content)
+    assert len(salida) > 1
+    assert gzip.decompress(b"".join(salida)) == b"".join(bloques)
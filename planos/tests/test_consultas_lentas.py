@@ -0,0 +1,98 @@
+import logging
+
+import pytest
+from django.db import connection
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.services import consultas_lentas
+
+# ============================================================
+# Tests del registro de consultas lentas
+#   - huella del SQL
+#   - vista y sitio de llamada en cada entrada
+#   - estadísticas en GET /api/metricas/consultas-lentas/ (solo staff)
+# ============================================================
+
+URL = reverse("consultas-lentas")
+
+
+@pytest.fixture(autouse=True)
+def estadisticas_limpias():
+    consultas_lentas.reiniciar()
+    yield
+    consultas_lentas.reiniciar()
+
+
+@pytest.fixture()
+def usuario(db, django_user_model):
+    return django_user_model.objects.create_user(username="tester", password="secret123")
+
+
+def test_1_huella():
+    a = consultas_lentas.huella('SELECT "id" FROM "planos_plano" WHERE "id" IN (%s, %s, %s) LIMIT 21')
+    b = consultas_lentas.huella('SELECT "id"\n  FROM "planos_plano" WHERE "id" IN (7, 8) LIMIT 50')
+    assert a == b == 'SELECT "id" FROM "planos_plano" WHERE "id" IN (...) LIMIT ?'
+    assert consultas_lentas.huella("SELECT * FROM t WHERE area = 'MECANICA'") == \
+        "SELECT * FROM t WHERE area = ?"
+    # Los números dentro de identificadores no se tocan.
+    assert consultas_lentas.huella('SELECT U0."id" FROM "t1"') == 'SELECT U0."id" FROM "t1"'
+
+
+def test_2_entrada_con_vista_y_sitio(usuario, settings, caplog):
+    settings.PLANOS_CONSULTAS_LENTAS_MS = 0  # toda consulta cuenta como lenta
+    client = APIClient()
+    with caplog.at_level(logging.WARNING, logger="planos.consultas_lentas"):
+        r = client.post(reverse("plano-list"), {
+            "titulo": "Plano 1", "descripcion": "tablero eléctrico", "subido_por": usuario.pk,
+            "area": "MECANICA", "subarea": "General"}, format="json")
+        assert r.status_code == 201
+        client.get(reverse("plano-list"), {"limit": 10})
+
+    registros = [r for r in caplog.records if r.name == "planos.consultas_lentas"]
+    assert {r.vista for r in registros} >= {"POST plano-list", "GET plano-list"}
+    insercion = next(r for r in registros if r.huella.startswith('INSERT INTO "planos_plano"'))
+    assert insercion.vista == "POST plano-list"
+    assert insercion.sitio.startswith("planos/") and ".py:" in insercion.sitio
+
+    huellas = {f["huella"]: f for f in consultas_lentas.resumen()}
+    fila = huellas[insercion.huella]
+    assert fila["veces"] == 1 and fila["vistas"] == {"POST plano-list": 1}
+    assert fila["max_ms"] == fila["total_ms"] == fila["promedio_ms"]
+
+
+def test_3_bajo_el_umbral_no_registra(usuario, settings):
+    settings.PLANOS_CONSULTAS_LENTAS_MS = 10_000
+    APIClient().get(reverse("plano-list"))
+    assert consultas_lentas.resumen() == []
+
+    # Fuera de una petición la vista es "-" y el sitio es este test.
+    settings.PLANOS_CONSULTAS_LENTAS_MS = 0
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    (fila,) = consultas_lentas.resumen()
+    assert fila["vistas"] == {"-": 1}
+    assert list(fila["sitios"])[0].startswith("planos/tests/test_consultas_lentas.py:")
+
+
+def test_4_endpoint_solo_staff(usuario, settings, django_user_model):
+    client = APIClient()
+    assert client.get(URL).status_code in (401, 403)
+    client.force_authenticate(usuario)
+    assert client.get(URL).status_code == 403
+
+    staff = django_user_model.objects.create_user(username="staff", is_staff=True)
+    client.force_authenticate(staff)
+    settings.PLANOS_CONSULTAS_LENTAS_MS = 0
+    client.get(reverse("plano-list"))
+    settings.PLANOS_CONSULTAS_LENTAS_MS = 10_000
+
+    datos = client.get(URL).json()
+    assert datos["umbral_ms"] == 10_000
+    assert datos["huellas"] and {"huella", "veces", "total_ms", "max_ms", "promedio_ms",
+                                 "vistas", "sitios"} <= set(datos["huellas"][0])
+    totales = [f["total_ms"] for f in datos["huellas"]]
+    assert totales == sorted(totales, reverse=True)
+
+    assert client.delete(URL).status_code == 204
+    assert client.get(URL).json()["huellas"] == []
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.models import Plano, Trabajo
+from planos.services import conteo, resumenes, trabajos
+
+# ============================================================
+# Tests de los conteos en listas paginadas
+#   - GET /api/planos/?limit=&offset=&count=exact|estimate|none
+# ============================================================
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def planos(django_user_model):
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    for i in range(12):
+        Plano.objects.create(titulo=f"Plano {i}", descripcion="patio general",
+                             subido_por=user, area="MECANICA" if i % 2 else "CIVIL",
+                             subarea="General")
+    resumenes.reconstruir()
+    return user
+
+
+def test_1_sin_limit_la_lista_no_cambia(client, planos):
+    r = client.get(reverse("plano-list"))
+    assert r.status_code == 200
+    assert isinstance(r.json(), list) and len(r.json()) == 12
+
+
+@pytest.mark.parametrize("estrategia, total, estimado", [
+    ("exact", 12, False), ("estimate", 12, False), ("none", None, False)])
+def test_2_estrategias(client, planos, estrategia, total, estimado):
+    r = client.get(reverse("plano-list"), {"limit": 5, "count": estrategia})
+    datos = r.json()
+    assert r.status_code == 200
+    assert (datos["count"], datos["count_estimado"]) == (total, estimado)
+    assert len(datos["results"]) == 5
+    assert "offset=5" in datos["next"]
+
+
+def test_3_ultima_pagina_sin_next(client, planos):
+    datos = client.get(reverse("plano-list"), {"limit": 5, "offset": 10, "count": "none"}).json()
+    assert len(datos["results"]) == 2
+    assert datos["next"] is None and "offset=5" in datos["previous"]
+
+
+def test_4_count_invalido(client, planos):
+    r = client.get(reverse("plano-list"), {"limit": 5, "count": "aprox"})
+    assert r.status_code == 400
+    assert "count" in r.json()
+
+
+def test_5_filtrado_sobre_el_tope_se_estima(planos):
+    assert conteo.contar(Plano.objects.filter(area="MECANICA"), limite=100) == (6, True)
+    assert conteo.contar(Plano.objects.filter(area="MECANICA"), limite=3) == (6, False)
+    assert conteo.contar(Plano.objects.filter(area="MECANICA"), "exact", limite=3) == (6, True)
+
+
+def test_6_tabla_sin_resumen_usa_sqlite_stat1(planos):
+    Trabajo.objects.bulk_create([Trabajo(tipo="reporte") for _ in range(30)])
+    qs = Trabajo.objects.order_by("-id")
+    assert conteo.contar(qs) == (30, True)  # sin estadísticas: COUNT(*)
+
+    trabajos._rellenar_estadisticas(None)
+    Trabajo.objects.bulk_create([Trabajo(tipo="reporte") for _ in range(5)])
+    # El total sale de sqlite_stat1 (tomado en el ANALYZE) y se marca como estimado.
+    assert conteo.contar(qs) == (30, False)
+    assert conteo.contar(qs, "exact") == (35, True)
+
+
+def test_7_estimado_en_la_respuesta(client, planos, settings):
+    Trabajo.objects.bulk_create([Trabajo(tipo="reporte") for _ in range(3)])
+    conteo.analizar(connection)
+    datos = client.get(reverse("trabajo-list"), {"limit": 2}).json()
+    assert (datos["count"], datos["count_estimado"]) == (3, True)
+
+    settings.PLANOS_CONTEO_POR_DEFECTO = "exact"
+    datos = client.get(reverse("trabajo-list"), {"limit": 2}).json()
+    assert (datos["count"], datos["count_estimado"]) == (3, False)
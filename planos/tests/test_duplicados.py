@@ -0,0 +1,138 @@
+import pytest
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.models import Plano
+from planos.services import duplicados, metricas
+from planos.services.planos_logic import huella_duplicado
+
+# ============================================================
+# Tests del pre-chequeo de duplicados (filtro de Bloom + índice de huella)
+# ============================================================
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def activo(settings):
+    settings.PLANOS_RECHAZAR_DUPLICADOS = True
+    settings.PLANOS_DUPLICADOS_REFRESCO_MS = 0
+    metricas.reiniciar()
+
+
+@pytest.fixture()
+def payload(db, django_user_model):
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    return {"titulo": "Plano Eléctrico – Tablero A",
+            "descripcion": "Diseño del tablero general con derivaciones",
+            "subido_por": user.id, "area": "Producción", "subarea": "Laminado"}
+
+
+def test_1_filtro_sin_falsos_negativos():
+    filtro = duplicados.FiltroBloom(capacidad=5000, tasa_fp=0.01)
+    presentes = [huella_duplicado(f"t{i}", "d", "a", "s") for i in range(5000)]
+    for h in presentes:
+        filtro.agregar(h)
+    assert all(h in filtro for h in presentes)
+
+    ausentes = [huella_duplicado(f"x{i}", "d", "a", "s") for i in range(20000)]
+    tasa = sum(h in filtro for h in ausentes) / len(ausentes)
+    assert tasa < 0.02
+    assert filtro.tasa_fp_estimada() == pytest.approx(0.01, rel=0.2)
+
+
+def test_2_huella_en_cada_ruta_de_escritura(client, payload):
+    r = client.post(reverse("plano-list"), payload, format="json")
+    plano = Plano.objects.get(pk=r.json()["id"])
+    assert plano.huella == plano.calcular_huella()
+    assert "huella" not in r.json()
+
+    client.patch(reverse("plano-bulk") + f"?ids={plano.pk}", {"titulo": "Otro título"}, format="json")
+    plano.refresh_from_db()
+    assert plano.huella == huella_duplicado("otro título", payload["descripcion"],
+                                           payload["area"], payload["subarea"])
+
+    client.post(reverse("plano-upsert"), [{**payload, "referencia_externa": "R-1"}], format="json")
+    nuevo = Plano.objects.get(referencia_externa="R-1")
+    assert nuevo.huella == nuevo.calcular_huella()
+
+
+def test_3_rechaza_duplicado_normalizado(client, payload, activo):
+    assert client.post(reverse("plano-list"), payload, format="json").status_code == 201
+    otro = {**payload, "titulo": "  plano eléctrico – TABLERO a ", "area": "producción"}
+    r = client.post(reverse("plano-list"), otro, format="json")
+    assert r.status_code == 400
+    assert "Ya existe un plano" in r.json()["non_field_errors"][0]
+
+    distinto = {**payload, "subarea": "Corte"}
+    assert client.post(reverse("plano-list"), distinto, format="json").status_code == 201
+    datos = metricas.instantanea()
+    assert datos["duplicados.descartados_sin_consulta"] == 2
+    assert datos["duplicados.encontrados"] == 1
+    assert datos["duplicados.bytes"] > 0 and "duplicados.tasa_fp_estimada" in datos
+
+
+def test_4_actualizar_sin_chocar_consigo_mismo(client, payload, activo):
+    a = client.post(reverse("plano-list"), payload, format="json").json()["id"]
+    b = client.post(reverse("plano-list"), {**payload, "subarea": "Corte"},
+                    format="json").json()["id"]
+    url = reverse("plano-detail", args=[a])
+    assert client.put(url, payload, format="json").status_code == 200
+    r = client.patch(reverse("plano-detail", args=[b]), {"subarea": "laminado"}, format="json")
+    assert r.status_code == 400
+
+
+def test_5_filas_de_otro_proceso(client, payload, activo):
+    assert client.post(reverse("plano-list"), payload, format="json").status_code == 201
+    # Alta sin pasar por este proceso (sin post_save): entra por `id > último`.
+    externo = Plano(titulo="Plano externo", descripcion="Cargado por otro worker",
+                    subido_por_id=payload["subido_por"], area="Mantenimiento", subarea="General")
+    externo.huella = externo.calcular_huella()
+    Plano.objects.bulk_create([externo])
+    r = client.post(reverse("plano-list"), {**payload, "titulo": "plano externo",
+                                            "descripcion": "cargado por otro worker",
+                                            "area": "Mantenimiento", "subarea": "General"},
+                    format="json")
+    assert r.status_code == 400
+
+
+def test_6_desactivado_no_consulta(client, payload):
+    client.post(reverse("plano-list"), payload, format="json")
+    assert client.post(reverse("plano-list"), payload, format="json").status_code == 201
+    assert duplicados._indice is None
+
+
+def test_7_cambios_de_otro_proceso(client, payload, activo):
+    from django.utils import timezone
+
+    a = client.post(reverse("plano-list"), payload, format="json").json()["id"]
+    b = client.post(reverse("plano-list"), {**payload, "subarea": "Corte"},
+                    format="json").json()["id"]
+    # Cambio sin pasar por este proceso (UPDATE directo): entra por `modificado`.
+    externo = Plano.objects.get(pk=b)
+    externo.titulo = "Plano cambiado afuera"
+    Plano.objects.filter(pk=b).update(titulo=externo.titulo, huella=externo.calcular_huella(),
+                                      modificado=timezone.now())
+    r = client.patch(reverse("plano-detail", args=[a]),
+                     {"titulo": "plano cambiado afuera", "subarea": "Corte"}, format="json")
+    assert r.status_code == 400
+    assert duplicados.indice().filtro.elementos == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_8_precalentar_y_busqueda_durante_la_construccion(client, payload, settings):
+    settings.PLANOS_RECHAZAR_DUPLICADOS = False
+    assert duplicados.precalentar() is None
+    assert client.post(reverse("plano-list"), payload, format="json").status_code == 201
+
+    settings.PLANOS_RECHAZAR_DUPLICADOS = True
+    duplicados.precalentar().join(5)
+    assert duplicados.indice().filtro.elementos == 1
+
+    # Sin filtro (construyéndose en otro hilo) se consulta el índice directamente.
+    indice = duplicados.IndiceDuplicados()
+    indice._construyendo = True
+    assert indice.buscar(payload) is not None and indice.filtro is None
@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+from django.db import IntegrityError, transaction
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.models import Plano
+from planos.services import escritor, resumenes
+from planos.services.escritor import EscritorAgrupado
+
+# ============================================================
+# Tests de la escritura agrupada (group commit)
+# El hilo escritor usa su propia conexión: se necesitan
+# transacciones reales (transaction=True).
+# ============================================================
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def datos_plano(user, i, **extra):
+    return {"titulo": f"Plano agrupado {i}", "descripcion": "tablero eléctrico principal",
+            "subido_por": user, "area": "Producción", "subarea": "Laminado", **extra}
+
+
+@pytest.fixture()
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="escritor", password="secret123")
+
+
+@pytest.fixture()
+def agrupado(settings):
+    settings.PLANOS_ESCRITURA_AGRUPADA = True
+    yield
+    escritor.detener()
+
+
+def test_1_post_agrupado_devuelve_la_fila_creada(agrupado, user):
+    client = APIClient()
+    payload = datos_plano(user, 1) | {"subido_por": user.id}
+    r = client.post(reverse("plano-list"), payload, format="json")
+    assert r.status_code == 201
+    assert Plano.objects.get(pk=r.json()["id"]).titulo == "Plano agrupado 1"
+    assert resumenes.leer(user.id)[0] == {user.id: {"Eléctrico": 1}}
+    assert escritor.escritor().filas == 1
+
+    # Los errores de validación siguen respondiendo en la misma petición.
+    r = client.post(reverse("plano-list"), payload | {"titulo": "ab"}, format="json")
+    assert r.status_code == 400
+    assert "titulo" in r.json()
+
+
+def test_2_peticiones_concurrentes_comparten_lote(user):
+    e = EscritorAgrupado(max_lote=100, max_espera_ms=200)
+    resultados, barrera = [], threading.Barrier(20)
+
+    def enviar(i):
+        barrera.wait()
+        resultados.append(e.guardar(datos_plano(user, i)))
+
+    hilos = [threading.Thread(target=enviar, args=(i,)) for i in range(20)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    e.detener()
+
+    assert sorted(p.titulo for p in resultados) == sorted(f"Plano agrupado {i}" for i in range(20))
+    assert all(p.pk for p in resultados)
+    assert Plano.objects.count() == 20
+    assert e.filas == 20 and e.lotes < 20
+    assert resumenes.diferencias() == {}
+
+
+def test_3_error_de_una_fila_no_afecta_al_resto_del_lote(user):
+    e = EscritorAgrupado(max_lote=10, max_espera_ms=200)
+    errores, barrera = [], threading.Barrier(3)
+
+    def enviar(i, ref):
+        barrera.wait()
+        try:
+            e.guardar(datos_plano(user, i, referencia_externa=ref))
+        except IntegrityError as exc:
+            errores.append(exc)
+
+    hilos = [threading.Thread(target=enviar, args=(i, ref))
+             for i, ref in enumerate(["REF-1", "REF-1", "REF-2"])]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    e.detener()
+
+    assert len(errores) == 1
+    assert sorted(Plano.objects.values_list("referencia_externa", flat=True)) == ["REF-1", "REF-2"]
+    assert resumenes.diferencias() == {}
+
+
+def test_4_dentro_de_una_transaccion_no_se_agrupa(settings):
+    settings.PLANOS_ESCRITURA_AGRUPADA = True
+    assert escritor.activo()
+    with transaction.atomic():
+        assert not escritor.activo()
+    settings.PLANOS_ESCRITURA_AGRUPADA = False
+    assert not escritor.activo()
+
+
+def test_5_timeout_retira_la_fila_de_la_cola(user, monkeypatch):
+    e = EscritorAgrupado(max_lote=1)
+    ocupado, soltar = threading.Event(), threading.Event()
+    sumar = resumenes.sumar
+
+    def sumar_lento(filas):
+        ocupado.set()
+        soltar.wait(5)
+        sumar(filas)
+
+    monkeypatch.setattr(escritor.resumenes, "sumar", sumar_lento)
+    primero = []
+    hilo = threading.Thread(target=lambda: primero.append(e.guardar(datos_plano(user, 1))))
+    hilo.start()
+    assert ocupado.wait(5)
+
+    # La segunda fila sigue en la cola al vencer el plazo: se cancela.
+    with pytest.raises(TimeoutError):
+        e.guardar(datos_plano(user, 2), timeout=0.05)
+    # La primera ya está en su lote: su cliente espera el resultado.
+    soltar.set()
+    hilo.join()
+    e.detener()
+
+    assert [p.titulo for p in primero] == ["Plano agrupado 1"]
+    assert list(Plano.objects.values_list("titulo", flat=True)) == ["Plano agrupado 1"]
+
+
+def test_6_timeout_con_la_fila_en_curso_espera_el_resultado(user, monkeypatch):
+    e = EscritorAgrupado(max_lote=1)
+    sumar = resumenes.sumar
+
+    def sumar_lento(filas):
+        time.sleep(0.3)
+        sumar(filas)
+
+    monkeypatch.setattr(escritor.resumenes, "sumar", sumar_lento)
+    plano = e.guardar(datos_plano(user, 1), timeout=0.05)
+    e.detener()
+    assert plano.pk and Plano.objects.count() == 1
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from planos.models import Plano
+from planos.services import cambios, eventos
+
+# ============================================================
+# Tests del canal SSE de cambios
+#   - GET /api/planos/eventos/?area=&subarea=  (Last-Event-ID / ?desde=)
+#   - Publicador único con historial acotado
+# ============================================================
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("plano-eventos")
+
+
+@pytest.fixture(autouse=True)
+def sin_margen(settings):
+    settings.PLANOS_CAMBIOS_MARGEN_MS = 0
+
+
+@pytest.fixture()
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="tester", password="secret123")
+
+
+@pytest.fixture()
+def crear(user):
+    def _crear(titulo, area="MECANICA"):
+        return Plano.objects.create(titulo=titulo, descripcion="patio general de planta",
+                                    subido_por=user, area=area, subarea="General")
+    return _crear
+
+
+def ids_de(bloque: bytes):
+    return [linea[4:] for linea in bloque.decode().splitlines() if linea.startswith("id: ")]
+
+
+def test_1_wsgi_responde_lo_pendiente_filtrado(crear):
+    inicio = cambios.codificar(cambios.ultimo())
+    mecanica = crear("Plano mecánico")
+    crear("Plano eléctrico", area="ELECTRICIDAD")
+    cambios.registrar_bajas([mecanica.pk])
+
+    r = Client().get(URL, {"area": "mecanica"}, HTTP_LAST_EVENT_ID=inicio)
+    assert r.status_code == 200
+    assert r["Content-Type"] == "text/event-stream"
+    cuerpo = r.content.decode()
+    assert cuerpo.startswith("retry: ")
+    assert "Plano mecánico" in cuerpo and "Plano eléctrico" not in cuerpo
+    assert "event: baja" in cuerpo  # las bajas llegan a todos los filtros
+
+    # Sin cursor no hay eventos: solo el `retry` y el id de "ahora" (test 7).
+    assert "event:" not in Client().get(URL).content.decode()
+
+
+def test_2_cursor_invalido_y_metodo(crear):
+    assert Client().get(URL, HTTP_LAST_EVENT_ID="basura").status_code == 400
+    assert Client().post(URL).status_code == 405
+
+
+def test_3_un_sondeo_para_todos_los_suscriptores(crear):
+    publicador = eventos.Publicador(hilo=False)
+    loop = asyncio.new_event_loop()
+    try:
+        suscripciones = [publicador.suscribir(loop, None) for _ in range(50)]
+        crear("Plano nuevo")
+        with CaptureQueriesContext(connection) as consultas:
+            assert publicador.sondear() == 1
+        # Feed (altas + bajas) y el usuario del serializador, no 50 lecturas.
+        assert len(consultas) <= 3
+        for s in suscripciones:
+            nuevos, _ = publicador.leer(s.secuencia)
+            assert [e.clave[2] for e in nuevos] == [Plano.objects.get().pk]
+        for s in suscripciones:
+            publicador.desuscribir(s)
+        assert publicador.suscriptores == 0
+    finally:
+        loop.close()
+
+
+def test_4_transmision_en_vivo_con_filtro_y_latido(crear, settings):
+    settings.PLANOS_EVENTOS_LATIDO_S = 0.05
+    publicador = eventos.Publicador(hilo=False)
+
+    async def escenario():
+        flujo = eventos.transmitir(None, eventos.Filtro.de("MECANICA", ""), publicador)
+        assert (await flujo.__anext__()).startswith(b"retry: ")
+        # Sin cursor: primero el id desde el que reconectar.
+        assert ids_de(await flujo.__anext__()) == [cambios.codificar(publicador.cursor)]
+        assert publicador.suscriptores == 1
+        assert await flujo.__anext__() == eventos.LATIDO  # sin cambios: latido
+
+        siguiente = asyncio.ensure_future(flujo.__anext__())
+        await sync_to_async(crear)("Plano en vivo")
+        await sync_to_async(crear)("Otra área", area="ELECTRICIDAD")
+        await sync_to_async(publicador.sondear)()
+        bloque = await asyncio.wait_for(siguiente, 5)
+        await flujo.aclose()
+        return bloque
+
+    bloque = async_to_sync(escenario)()
+    assert b"Plano en vivo" in bloque and "Otra área".encode() not in bloque
+    assert publicador.suscriptores == 0
+
+
+def test_5_reanudar_desde_la_base_cuando_el_historial_no_alcanza(crear):
+    inicio = cambios.ultimo()
+    publicador = eventos.Publicador(historial=2, hilo=False)
+    loop = asyncio.new_event_loop()
+    try:
+        publicador.desuscribir(publicador.suscribir(loop, None))
+    finally:
+        loop.close()
+    planos = [crear(f"Plano {i}") for i in range(3)]
+    publicador.sondear()
+    assert len(publicador.eventos) == 2
+    assert publicador.posicion(inicio) is None  # el primero ya salió del historial
+
+    async def escenario():
+        flujo = eventos.transmitir(inicio, eventos.Filtro(), publicador)
+        await flujo.__anext__()  # retry
+        atrasados = await asyncio.wait_for(flujo.__anext__(), 5)
+        siguiente = asyncio.ensure_future(flujo.__anext__())
+        await sync_to_async(crear)("Plano 3")
+        await sync_to_async(publicador.sondear)()
+        nuevos = await asyncio.wait_for(siguiente, 5)
+        await flujo.aclose()
+        return atrasados, nuevos
+
+    atrasados, nuevos = async_to_sync(escenario)()
+    claves = [cambios.decodificar(i)[2] for i in ids_de(atrasados)]
+    assert claves == [p.pk for p in planos]
+    assert len(ids_de(nuevos)) == 1 and b"Plano 3" in nuevos
+
+
+def test_6_envoltura_asgi_valida_y_deja_pasar_lo_demas():
+    from planos.asgi import con_canal_sse
+
+    llamadas = []
+
+    async def django_falso(scope, receive, send):
+        llamadas.append(scope["path"])
+
+    async def pedir(path, method="GET", headers=()):
+        enviados = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(mensaje):
+            enviados.append(mensaje)
+
+        scope = {"type": "http", "path": path, "method": method,
+                 "query_string": b"", "headers": list(headers)}
+        await con_canal_sse(django_falso)(scope, receive, send)
+        return enviados
+
+    assert async_to_sync(pedir)("/api/planos/") == [] and llamadas == ["/api/planos/"]
+    assert async_to_sync(pedir)(URL, "POST")[0]["status"] == 405
+    invalido = async_to_sync(pedir)(URL, headers=[(b"last-event-id", b"1.9.1")])
+    assert invalido[0]["status"] == 400 and b"desde" in invalido[1]["body"]
+
+
+def test_7_wsgi_sin_cursor_y_cola_filtrada(crear):
+    crear("Plano viejo")
+    r = Client().get(URL)
+    cuerpo = r.content.decode()
+    assert cuerpo.startswith("retry: ") and "event:" not in cuerpo
+    (inicio,) = ids_de(r.content)
+    assert inicio == cambios.codificar(cambios.ultimo())
+
+    # Al reconectar con ese id llega lo nuevo y no lo anterior.
+    crear("Plano nuevo")
+    r = Client().get(URL, HTTP_LAST_EVENT_ID=inicio)
+    assert "Plano nuevo" in r.content.decode() and "Plano viejo" not in r.content.decode()
+
+    # Si lo último leído no pasa el filtro, igual se avanza el id.
+    crear("Plano eléctrico", area="ELECTRICIDAD")
+    r = Client().get(URL, {"area": "mecanica"}, HTTP_LAST_EVENT_ID=ids_de(r.content)[-1])
+    assert "event:" not in r.content.decode()
+    assert ids_de(r.content) == [cambios.codificar(cambios.ultimo())]
+
+
+def test_8_filtro_normaliza_como_los_resumenes(crear):
+    inicio = cambios.codificar(cambios.ultimo())
+    crear("Plano con espacios", area=" Mecánica")
+    crear("Plano eléctrico", area="ELECTRICIDAD")
+
+    r = Client().get(URL, {"area": "Mecánica", "subarea": "general "}, HTTP_LAST_EVENT_ID=inicio)
+    cuerpo = r.content.decode()
+    assert "Plano con espacios" in cuerpo and "Plano eléctrico" not in cuerpo
+    assert eventos.Filtro.de("  ", None) == eventos.Filtro()
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# ============================================================
+# Tests de los perfiles livianos: backend_roles.settings_api y
+# PLANOS_APPS_MINIMAS=1. Se ejecutan en un subproceso porque
+# cambian INSTALLED_APPS y MIDDLEWARE.
+# ============================================================
+
+RAIZ = Path(__file__).resolve().parents[2]
+
+SCRIPT = """
+import sys
+import django
+from django.conf import settings
+settings.DATABASES["default"]["NAME"] = ":memory:"
+settings.ALLOWED_HOSTS = ["testserver"]
+django.setup()
+from django.core.management import call_command
+call_command("migrate", verbosity=0)
+
+from django.contrib.auth import get_user_model
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+user = get_user_model().objects.create_user(username="api", password="x")
+auth = {"HTTP_AUTHORIZATION": "Token " + Token.objects.create(user=user).key}
+c = Client()
+r = c.post("/api/planos/", {"titulo": "Plano API", "descripcion": "creado sin sesión",
+           "subido_por": user.pk, "area": "Producción", "subarea": "Laminado"},
+           content_type="application/json", **auth)
+assert r.status_code == 201, r.content
+assert not r.cookies, r.cookies
+assert c.get("/api/planos/", **auth).json()[0]["titulo"] == "Plano API"
+assert c.get("/admin/").status_code == 404
+
+# Un worker liviano no importa lo que no sirve. (Los módulos de
+# django.contrib.admin sí se cargan: DRF los importa desde rest_framework.schemas.)
+assert "django.contrib.admin" not in settings.INSTALLED_APPS
+for modulo in ("django_extensions", "brotli"):
+    assert modulo not in sys.modules, modulo
+print("ok")
+"""
+
+
+def ejecutar(**entorno):
+    return subprocess.run([sys.executable, "-c", SCRIPT], cwd=RAIZ,
+                          capture_output=True, text=True, env=os.environ | entorno)
+
+
+def test_perfil_api_sin_sesion_ni_admin():
+    r = ejecutar(DJANGO_SETTINGS_MODULE="backend_roles.settings_api")
+    assert r.returncode == 0, r.stderr
+    assert r.stdout.strip().endswith("ok")
+
+
+def test_apps_minimas_por_variable_de_entorno():
+    r = ejecutar(DJANGO_SETTINGS_MODULE="backend_roles.settings", PLANOS_APPS_MINIMAS="1")
+    assert r.returncode == 0, r.stderr
+    assert r.stdout.strip().endswith("ok")
@@ -0,0 +1,185 @@
+import os
+import re
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from planos.models import Plano
+from planos.services import cambios, resumenes
+from planos.services.snapshot import micros_de
+
+# ============================================================
+# Regresiones de planes de consulta de PlanoViewSet
+# Cada caso llama a una acción sobre una tabla sembrada, captura el SQL
+# que ejecuta y le pide el plan al motor (EXPLAIN QUERY PLAN en SQLite,
+# EXPLAIN con enable_seqscan=off en PostgreSQL). Se verifica:
+#   - que los casos con filtro no recorran planos_plano completa;
+#   - un presupuesto de consultas por caso;
+#   - que SQL y planes coincidan con planes/<motor>/<caso>.txt (si falta
+#     el archivo el caso falla: un caso nuevo no pasa sin su plan revisado).
+# Si un cambio de planes es intencional, o para crear los de un caso nuevo:
+#   PLANOS_ACTUALIZAR_PLANES=1 python -m pytest planos/tests/test_planes_consulta.py
+# y el diff de los .txt muestra qué cambió.
+# ============================================================
+
+FILAS = 3000
+TABLA = "planos_plano"
+CARPETA = Path(__file__).parent / "planes"
+ACTUALIZAR = os.environ.get("PLANOS_ACTUALIZAR_PLANES") == "1"
+
+SENTENCIAS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+# Recorrido completo de la tabla de planos (con o sin índice) según el motor.
+ESCANEO = {
+    # SQLite anterior a 3.36 escribe "SCAN TABLE planos_plano".
+    "sqlite": re.compile(rf"^\s*SCAN (TABLE )?{TABLA}\b", re.M),
+    "postgresql": re.compile(rf"Seq Scan on {TABLA}\b"),
+}
+
+
+class Caso:
+    def __init__(self, nombre, metodo, url, datos=None, presupuesto=1,
+                 con_filtro=True, estado=200):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.url = url  # función (ids sembrados, usuario) → URL
+        self.datos = datos
+        self.presupuesto = presupuesto
+        self.con_filtro = con_filtro
+        self.estado = estado
+
+
+def plano_nuevo(uid):
+    return {"titulo": "Plano nuevo", "descripcion": "tablero eléctrico secundario",
+            "subido_por": uid, "area": "MECANICA", "subarea": "Zona-9"}
+
+
+def cursor(pk):
+    plano = Plano.objects.get(pk=pk)
+    return cambios.codificar((micros_de(plano.modificado), cambios.UPSERT, pk))
+
+
+CASOS = [
+    Caso("lista_pagina", "get", lambda ids, uid: "/api/planos/?limit=50",
+         presupuesto=2, con_filtro=False),
+    Caso("lista_count_exact", "get",
+         lambda ids, uid: "/api/planos/?limit=50&offset=1000&count=exact",
+         presupuesto=2, con_filtro=False),
+    Caso("lista_busqueda", "get", lambda ids, uid: "/api/planos/?q=tablero&limit=50", presupuesto=2),
+    Caso("lista_con_archivados", "get",
+         lambda ids, uid: "/api/planos/?limit=50&incluir_archivados=true",
+         presupuesto=2, con_filtro=False),
+    Caso("detalle", "get", lambda ids, uid: f"/api/planos/{ids[10]}/"),
+    Caso("alta", "post", lambda ids, uid: "/api/planos/", plano_nuevo, presupuesto=6, estado=201),
+    Caso("cambio", "put", lambda ids, uid: f"/api/planos/{ids[10]}/", plano_nuevo, presupuesto=9),
+    Caso("cambio_parcial", "patch", lambda ids, uid: f"/api/planos/{ids[10]}/",
+         lambda uid: {"subarea": "Zona-8"}, presupuesto=5),
+    Caso("baja", "delete", lambda ids, uid: f"/api/planos/{ids[10]}/", presupuesto=5, estado=204),
+    Caso("resumen", "get", lambda ids, uid: f"/api/planos/resumen/?subido_por={uid}", presupuesto=2),
+    Caso("cambios", "get", lambda ids, uid: f"/api/planos/cambios/?limite=100&desde={cursor(ids[-200])}",
+         presupuesto=2),
+    Caso("upsert", "post", lambda ids, uid: "/api/planos/upsert/",
+         lambda uid: [dict(plano_nuevo(uid), referencia_externa=f"REF-{i}") for i in range(3)],
+         presupuesto=8),
+    Caso("bulk_dry_run", "patch",
+         lambda ids, uid: f"/api/planos/bulk/?subido_por={uid}&dry_run=true",
+         lambda uid: {"area": "HIDRAULICA"}, presupuesto=1),
+    Caso("bulk_cambio", "patch", lambda ids, uid: "/api/planos/bulk/?subarea=Zona-1",
+         lambda uid: {"titulo": "Renombrado en bloque"}, presupuesto=10),
+    Caso("bulk_baja", "delete", lambda ids, uid: "/api/planos/bulk/?area=MECANICA", presupuesto=23),
+    Caso("adjuntos", "get", lambda ids, uid: f"/api/planos/{ids[10]}/adjuntos/", presupuesto=2),
+    Caso("eliminar_todos", "delete", lambda ids, uid: "/api/planos/eliminar_todos/",
+         presupuesto=5, con_filtro=False),
+    Caso("limpiar_pruebas", "delete", lambda ids, uid: "/api/planos/limpiar-pruebas/",
+         presupuesto=6, con_filtro=False),
+]
+
+
+@pytest.fixture()
+def sembrados(db, django_user_model):
+    """FILAS planos repartidos entre dos usuarios, áreas y subáreas fijas."""
+    usuarios = [django_user_model.objects.create_user(username=f"u{i}") for i in range(2)]
+    areas = ["ELECTRICIDAD", "HIDRAULICA", "MECANICA"]
+    planos = []
+    for i in range(FILAS):
+        plano = Plano(titulo=f"Plano {i}", descripcion=f"tablero {i % 7} de la línea {i % 11}",
+                      subido_por=usuarios[i % 2], area=areas[i % 3], subarea=f"Zona-{i % 4}")
+        plano.huella = plano.calcular_huella()
+        planos.append(plano)
+    Plano.objects.bulk_create(planos, batch_size=1000)
+    resumenes.reconstruir()
+    return list(Plano.objects.order_by("pk").values_list("pk", flat=True)), usuarios[0].pk
+
+
+def capturar(funcion):
+    """Ejecuta `funcion` y devuelve las sentencias `(sql, params)` que emitió."""
+    sentencias = []
+
+    def registrar(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(SENTENCIAS):
+            sentencias.append((sql, params if not many else None))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(registrar):
+        resultado = funcion()
+    return resultado, sentencias
+
+
+def plan(sql, params):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN (COSTS OFF) " + sql, params)
+            return "\n".join(f"  {fila[0]}" for fila in cursor.fetchall())
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        niveles, lineas = {0: 0}, []
+        for id_, padre, _, detalle in cursor.fetchall():
+            niveles[id_] = niveles.get(padre, 0) + 1
+            lineas.append("  " * niveles[id_] + detalle)
+        return "\n".join(lineas)
+
+
+def normalizar(sql):
+    # Listas de parámetros y CASE de bulk_update con largo según el lote.
+    sql = re.sub(r"%s(, %s)+", "%s, ...", sql)
+    return re.sub(r"(WHEN \([^()]*\) THEN %s )+", "WHEN (...) THEN %s ... ", sql)
+
+
+def render(caso, sentencias):
+    partes = [f"# {caso.metodo.upper()} {caso.nombre}: {len(sentencias)} consulta(s)"]
+    for i, (sql, params) in enumerate(sentencias, 1):
+        detalle = plan(sql, params) if params is not None else "  (executemany: sin plan)"
+        partes.append(f"\n## {i}\n{normalizar(sql)}\n{detalle}")
+    return "\n".join(partes) + "\n"
+
+
+@pytest.mark.skipif(connection.vendor not in ESCANEO, reason="Motor sin reglas de planes")
+@pytest.mark.parametrize("caso", CASOS, ids=[c.nombre for c in CASOS])
+def test_planes_de_consulta(caso, sembrados):
+    ids, uid = sembrados
+    client = APIClient()
+    datos = caso.datos(uid) if caso.datos else None
+    url = caso.url(ids, uid)
+
+    respuesta, sentencias = capturar(
+        lambda: getattr(client, caso.metodo)(url, datos, format="json"))
+    assert respuesta.status_code == caso.estado, respuesta.content
+    texto = render(caso, sentencias)
+
+    if caso.con_filtro:
+        escaneos = [linea for linea in texto.splitlines()
+                    if ESCANEO[connection.vendor].search(linea)]
+        assert not escaneos, f"{caso.nombre} recorre {TABLA} completa:\n{texto}"
+    assert len(sentencias) <= caso.presupuesto, \
+        f"{caso.nombre}: {len(sentencias)} consultas (presupuesto {caso.presupuesto})\n{texto}"
+
+    archivo = CARPETA / connection.vendor / f"{caso.nombre}.txt"
+    if ACTUALIZAR:
+        archivo.parent.mkdir(parents=True, exist_ok=True)
+        archivo.write_text(texto, encoding="utf-8")
+    elif not archivo.exists():
+        pytest.fail(f"Falta {archivo.relative_to(CARPETA.parent)}; para crearlo, "
+                    f"PLANOS_ACTUALIZAR_PLANES=1.\n{texto}")
+    assert texto == archivo.read_text(encoding="utf-8"), \
+        f"Cambió el plan de {caso.nombre}; si es intencional, PLANOS_ACTUALIZAR_PLANES=1."
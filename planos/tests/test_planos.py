@@ -10,6 +10,14 @@ from planos.services.planos_logic import (
     resumen_por_usuario,
     resumen_por_usuario_por_area,
     detectar_duplicados,
+    ErrorPlano,
+    codigo_error_plano,
+    mensajes_error,
+    validar_planos_lote,
+    errores_lote,
+    PlanoRecord,
+    COLUMNAS_REGISTRO,
+    registros,
 )
 
 import pytest
@@ -180,6 +188,52 @@ def test_4c_validar_plano_data_min_desc_custom():
     assert any("mínimo 6" in e for e in errores)
 
 
+"""
+============================================================
+🧩 4.1 Pruebas para la validación por lotes: validar_planos_lote(filas)
+------------------------------------------------------------
+Objetivo:
+    Verificar que los códigos compactos equivalen a las reglas de
+    validar_plano_data y que los mensajes renderizados son idénticos.
+Casos a probar:
+    ✅ Códigos por fila (incluye generadores)
+    ✅ Mensajes idénticos a validar_plano_data
+    ✅ Renderizado perezoso solo de filas con error
+============================================================
+"""
+
+FILAS_LOTE = [
+    {"titulo": "Plano A", "descripcion": "detalle correcto",
+     "area": "Producción", "subarea": "Laminado"},
+    {"titulo": "12", "descripcion": "corta", "area": "", "subarea": ""},
+    {"titulo": "Plano spam", "descripcion": "", "area": "Pr", "subarea": "Corte"},
+    {"titulo": "Plano B", "descripcion": "detalle TÓXICO",
+     "area": "Producción", "subarea": "L1"},
+]
+
+
+def test_4_1a_validar_planos_lote_codigos():
+    codigos = validar_planos_lote(iter(FILAS_LOTE))
+    assert list(codigos) == [codigo_error_plano(f) for f in FILAS_LOTE]
+    assert codigos[0] == 0
+    assert codigos[2] == ErrorPlano.CONTENIDO_PROHIBIDO | ErrorPlano.AREA_CORTA
+
+
+@pytest.mark.parametrize("min_desc", [6, 10])
+def test_4_1b_mensajes_identicos(min_desc):
+    for fila in FILAS_LOTE:
+        ok, errores = validar_plano_data(fila, min_desc=min_desc)
+        assert mensajes_error(codigo_error_plano(fila, min_desc), min_desc) == errores
+        assert ok is (not errores)
+
+
+def test_4_1c_errores_lote_perezoso():
+    codigos = validar_planos_lote(FILAS_LOTE)
+    res = list(errores_lote(codigos))
+    assert [i for i, _ in res] == [1, 2, 3]
+    assert list(errores_lote(codigos, limite=1)) == res[:1]
+
+
 """
 ============================================================
 🧩 5. Pruebas para la función: generar_codigo_plano(titulo, correlativo)
@@ -332,3 +386,50 @@ def test_8c_detectar_duplicados_lista_pequena():
     assert detectar_duplicados([]) == []
     assert detectar_duplicados(
         [{"titulo": "A", "descripcion": "B", "area": "C", "subarea": "D"}]) == []
+
+
+"""
+============================================================
+🧩 9. Pruebas para PlanoRecord (registros compactos)
+------------------------------------------------------------
+Objetivo:
+    Las funciones de análisis dan el mismo resultado con una lista de
+    dicts que con una lista de PlanoRecord.
+Casos a probar:
+    ✅ Construcción desde tuplas en el orden de COLUMNAS_REGISTRO
+    ✅ Mismo resultado en todas las funciones
+    ✅ Sin __dict__ por fila
+============================================================
+"""
+
+PLANOS_MIXTOS = [
+    {"titulo": "Plano A", "descripcion": "plano ELÉCTRICO de tablero",
+     "subido_por": 1, "area": " producción ", "subarea": "laminado en frío"},
+    {"titulo": "plano a ", "descripcion": "plano eléctrico de tablero ",
+     "subido_por": 1, "area": "Producción", "subarea": "Laminado en frío"},
+    {"titulo": "Vigas", "descripcion": "refuerzo estructural",
+     "subido_por": 2, "area": "Arquitectónico", "subarea": "Oficinas"},
+    {"titulo": "Patio", "descripcion": "", "subido_por": 3, "area": "", "subarea": ""},
+]
+
+
+def test_9a_registros_desde_tuplas():
+    filas = [tuple(p.get(c.removesuffix("_id")) for c in COLUMNAS_REGISTRO)
+             for p in PLANOS_MIXTOS]
+    regs = registros(filas)
+    assert regs[1].titulo_norm == "plano a"
+    assert regs[0].area == "producción" and regs[0].area_norm is regs[1].area_norm
+    assert not hasattr(regs[0], "__dict__")
+
+
+@pytest.mark.parametrize("funcion", [
+    clasificar_planos,
+    resumen_por_usuario,
+    resumen_por_usuario_por_area,
+    detectar_duplicados,
+    lambda planos: detectar_duplicados(planos, considerar_area_subarea=False),
+    lambda planos: contar_planos_por_usuario(planos, 1),
+])
+def test_9b_mismo_resultado_que_dicts(funcion):
+    regs = [PlanoRecord.desde_dict(p) for p in PLANOS_MIXTOS]
+    assert funcion(regs) == funcion(PLANOS_MIXTOS)
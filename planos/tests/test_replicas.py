@@ -0,0 +1,155 @@
+import sqlite3
+import time
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connections
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planos.models import Plano
+from planos.services import metricas, replicas
+
+# ============================================================
+# Tests de las réplicas de lectura
+#   - Elección de réplica (atraso máximo, leer lo propio)
+#   - PlanoViewSet: lecturas a réplica, cookie tras escribir
+#   - refrescar_replicas (copia con la API de backup de SQLite)
+# ============================================================
+
+LISTA = reverse("plano-list")
+
+
+@pytest.fixture()
+def copias(settings, monkeypatch):
+    """Réplicas ficticias con el instante de copia que indique cada test."""
+    settings.PLANOS_REPLICAS = ["r1", "r2"]
+    instantes = {"r1": time.time(), "r2": time.time()}
+    monkeypatch.setattr(replicas, "copiada_en", lambda alias: instantes[alias])
+    return instantes
+
+
+def test_1_elegir_respeta_atraso_y_escritura(copias, settings):
+    settings.PLANOS_REPLICAS_MAX_RETRASO_S = 30
+    assert {replicas.elegir() for _ in range(50)} == {"r1", "r2"}
+
+    copias["r2"] = time.time() - 60  # se detuvo su refresco
+    assert {replicas.elegir() for _ in range(20)} == {"r1"}
+
+    escritura = time.time()
+    assert replicas.elegir(desde=escritura) is None  # ninguna copia la incluye aún
+    copias["r1"] = escritura + 1
+    assert replicas.elegir(desde=escritura) == "r1"
+
+
+def test_2_router_usa_la_replica_del_contexto():
+    router = replicas.RouterReplicas()
+    assert router.db_for_read(Plano) is None
+    with replicas.leyendo_de("r1"):
+        assert router.db_for_read(Plano) == "r1"
+        assert router.db_for_write(Plano) == "default"
+    assert router.db_for_read(Plano) is None
+
+
+@pytest.mark.django_db
+def test_3_viewset_lee_de_replica_salvo_tras_escribir(copias, monkeypatch, django_user_model):
+    # La "réplica" es la propia base de pruebas: aquí importa a dónde se enruta.
+    monkeypatch.setattr(replicas, "elegir", lambda desde=None: (
+        "default" if desde is None or min(copias.values()) >= desde else None))
+    usadas = []
+    original = replicas.activar
+    monkeypatch.setattr(replicas, "activar", lambda alias: usadas.append(alias) or original(alias))
+
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    client = APIClient()
+    assert client.get(LISTA).status_code == 200
+    assert usadas[-1] == "default"
+
+    r = client.post(LISTA, {"titulo": "Plano réplica", "descripcion": "patio general de planta",
+                            "subido_por": user.pk, "area": "MECANICA", "subarea": "General"},
+                    format="json")
+    assert r.status_code == 201
+    assert replicas.COOKIE in r.cookies
+    assert usadas[-1] is None  # las escrituras no leen de réplicas
+
+    antes = metricas.instantanea().get("replicas.leer_lo_propio", 0)
+    assert client.get(reverse("plano-detail", args=[r.json()["id"]])).status_code == 200
+    assert usadas[-1] is None  # ninguna copia tiene aún lo escrito
+    assert metricas.instantanea()["replicas.leer_lo_propio"] == antes + 1
+
+    for alias in copias:
+        copias[alias] = time.time() + 1
+    client.get(LISTA)
+    assert usadas[-1] == "default"
+    assert replicas._alias.get() is None  # el contexto no queda marcado
+
+
+@pytest.mark.django_db(transaction=True)
+def test_4_refrescar_copia_con_backup(tmp_path, settings, django_user_model):
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    Plano.objects.create(titulo="Plano copiado", descripcion="patio general de planta",
+                         subido_por=user, area="MECANICA", subarea="General")
+    destino = tmp_path / "replica.sqlite3"
+    connections.settings["replica_prueba"] = {**connections.settings["default"], "NAME": str(destino)}
+    try:
+        inicio = time.time()
+        replicas.refrescar("replica_prueba")
+        assert abs(replicas.copiada_en("replica_prueba") - inicio) < 1
+        with sqlite3.connect(destino) as copia:
+            assert copia.execute("SELECT titulo FROM planos_plano").fetchall() == [("Plano copiado",)]
+        assert not (tmp_path / "replica.sqlite3.tmp").exists()
+    finally:
+        del connections["replica_prueba"]
+        del connections.settings["replica_prueba"]
+
+
+def test_5_comando_sin_replicas(settings):
+    settings.PLANOS_REPLICAS = []
+    with pytest.raises(CommandError, match="PLANOS_REPLICAS"):
+        call_command("refrescar_replicas")
+    with pytest.raises(CommandError, match="sin configurar"):
+        call_command("refrescar_replicas", "no_existe")
+
+
+@pytest.mark.django_db
+def test_6_leer_lo_propio_sin_cookies(copias, monkeypatch, django_user_model):
+    from django.core.cache import cache
+
+    cache.clear()
+    monkeypatch.setattr(replicas, "elegir", lambda desde=None: (
+        "default" if desde is None or min(copias.values()) >= desde else None))
+    usadas = []
+    original = replicas.activar
+    monkeypatch.setattr(replicas, "activar", lambda alias: usadas.append(alias) or original(alias))
+
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    client = APIClient()
+    client.force_authenticate(user)  # como un cliente con token
+    r = client.post(LISTA, {"titulo": "Plano réplica", "descripcion": "patio general de planta",
+                            "subido_por": user.pk, "area": "MECANICA", "subarea": "General"},
+                    format="json")
+    assert r.status_code == 201
+    client.cookies.clear()  # el cliente no guarda cookies
+
+    client.get(LISTA)
+    assert usadas[-1] is None  # la marca por usuario lo manda al primario
+    APIClient().get(LISTA)
+    assert usadas[-1] == "default"  # otro cliente anónimo sigue en la réplica
+    cache.clear()
+
+
+def test_7_leyendo_de_cierra_la_conexion(monkeypatch):
+    # Una conexión abierta seguiría leyendo el archivo reemplazado por `refrescar`.
+    connections.settings["replica_prueba"] = dict(connections.settings["default"])
+    try:
+        cerradas = []
+        monkeypatch.setattr(connections["replica_prueba"], "close", lambda: cerradas.append(1))
+        with replicas.leyendo_de("replica_prueba"):
+            assert cerradas == []
+        assert cerradas == [1]
+        with replicas.leyendo_de(None):
+            pass
+        assert cerradas == [1]
+    finally:
+        del connections["replica_prueba"]
+        del connections.settings["replica_prueba"]
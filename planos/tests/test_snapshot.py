@@ -0,0 +1,115 @@
+import os
+
+import pytest
+from django.core.management import call_command
+
+from planos.models import Plano
+from planos.services import snapshot
+from planos.services.planos_logic import (
+    COLUMNAS_REGISTRO,
+    PlanoRecord,
+    detectar_duplicados,
+    resumen_por_usuario,
+    resumen_por_usuario_por_area,
+)
+
+# ============================================================
+# Tests del snapshot columnar (planos/services/snapshot.py)
+# ============================================================
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def planos(django_user_model):
+    u1 = django_user_model.objects.create_user(username="uno")
+    u2 = django_user_model.objects.create_user(username="dos")
+    for i, (desc, area, subarea, user) in enumerate([
+        ("tablero eléctrico principal", "Producción", "Laminado en frío", u1),
+        ("refuerzo estructural", " producción ", "laminado en frío", u1),
+        ("", "Mantenimiento", "", u2),
+        ("diseño arquitectónico ñandú", "Producción", "Corte", u2),
+    ]):
+        Plano.objects.create(titulo=f"Plano {i}", descripcion=desc, subido_por=user,
+                             area=area, subarea=subarea)
+    return Plano.objects.order_by("id")
+
+
+def test_1_columnas(planos, tmp_path):
+    ruta = tmp_path / "planos.snapshot"
+    assert snapshot.escribir(ruta) == 4
+
+    with snapshot.Snapshot(ruta) as snap:
+        assert len(snap) == 4
+        assert list(snap.columna("id")) == [p.pk for p in planos]
+        assert list(snap.columna("subido_por")) == [p.subido_por_id for p in planos]
+        assert snap.columna("descripcion")[3] == "diseño arquitectónico ñandú"
+        assert snap.columna("descripcion")[-2] == ""
+        area = snap.columna("area")
+        assert list(area) == [p.area for p in planos]
+        assert len(area.valores) == 3 and area.codigos.format == "H"
+        assert snapshot.fecha_de(snap.columna("fecha_subida")[0]) == planos[0].fecha_subida
+
+
+def test_2_mismos_resultados_que_la_base(planos, tmp_path):
+    ruta = tmp_path / "planos.snapshot"
+    snapshot.escribir(ruta)
+    desde_base = [PlanoRecord(*f) for f in planos.values_list(*COLUMNAS_REGISTRO)]
+
+    with snapshot.Snapshot(ruta) as snap:
+        regs = snap.registros()
+        for funcion in (resumen_por_usuario, resumen_por_usuario_por_area, detectar_duplicados):
+            assert funcion(regs) == funcion(desde_base)
+        assert snap.resumen_por_usuario_por_area() == resumen_por_usuario_por_area(desde_base)
+        assert [d["titulo"] for d in snap.iterar()] == [p.titulo for p in planos]
+
+
+def test_3_reemplazo_atomico(planos, tmp_path):
+    ruta = tmp_path / "planos.snapshot"
+    snapshot.escribir(ruta)
+    with snapshot.Snapshot(ruta) as viejo:
+        Plano.objects.filter(area="Mantenimiento").delete()
+        snapshot.escribir(ruta)
+        # El lector abierto sigue viendo su versión; uno nuevo ve la nueva.
+        assert len(viejo) == 4 and viejo.columna("titulo")[2] == "Plano 2"
+        with snapshot.Snapshot(ruta) as nuevo:
+            assert len(nuevo) == 3
+    assert [p for p in os.listdir(tmp_path) if p.endswith(".tmp")] == []
+
+
+def test_4_archivo_invalido(tmp_path):
+    ruta = tmp_path / "otro.bin"
+    ruta.write_bytes(b"no es un snapshot")
+    with pytest.raises(ValueError):
+        snapshot.Snapshot(ruta)
+
+
+def test_5_numpy(planos, tmp_path):
+    numpy = pytest.importorskip("numpy")
+    ruta = tmp_path / "planos.snapshot"
+    snapshot.escribir(ruta)
+    with snapshot.Snapshot(ruta) as snap:
+        ids = snap.numpy("id")
+        assert ids.dtype == numpy.int64 and not ids.flags.writeable
+        assert ids.tolist() == [p.pk for p in planos]
+        del ids
+
+
+def test_6_comando(planos, tmp_path, settings):
+    settings.PLANOS_EXPORTACIONES_DIR = tmp_path
+    call_command("snapshot_planos", stdout=open(os.devnull, "w"))
+    with snapshot.Snapshot(tmp_path / "planos.snapshot") as snap:
+        assert len(snap) == 4
+
+
+def test_7_big_endian(planos, tmp_path, monkeypatch):
+    # Simula una máquina big-endian: escritura y lectura reordenan los bytes
+    # y los valores deben volver iguales.
+    monkeypatch.setattr(snapshot.sys, "byteorder", "big")
+    ruta = tmp_path / "planos.snapshot"
+    snapshot.escribir(ruta)
+    with snapshot.Snapshot(ruta) as snap:
+        assert list(snap.columna("id")) == [p.pk for p in planos]
+        assert list(snap.columna("area")) == [p.area for p in planos]
+        assert snap.columna("descripcion")[3] == "diseño arquitectónico ñandú"
+        assert snapshot.fecha_de(snap.columna("fecha_subida")[0]) == planos[0].fecha_subida
@@ -0,0 +1,173 @@
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+
+from planos.models import Plano, Trabajo
+from planos.services import trabajos
+
+# ============================================================
+# Tests de la cola de trabajos en segundo plano
+#   - POST /api/trabajos/  (encolar)
+#   - GET  /api/trabajos/<id>/ y /resultado/
+#   - python manage.py procesar_trabajos
+# ============================================================
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def planos(db, django_user_model):
+    user = django_user_model.objects.create_user(username="tester", password="secret123")
+    for i, (desc, area) in enumerate([("tablero eléctrico", "Producción"),
+                                      ("refuerzo estructural", "Producción"),
+                                      ("patio general", "Mantenimiento")]):
+        Plano.objects.create(titulo=f"Plano {i}", descripcion=desc, subido_por=user,
+                             area=area, subarea="General")
+    return user
+
+
+@pytest.fixture(autouse=True)
+def exportaciones(settings, tmp_path):
+    settings.PLANOS_EXPORTACIONES_DIR = tmp_path
+
+
+def test_1_encolar_y_procesar_reporte(client, planos):
+    r = client.post(reverse("trabajo-list"), {"tipo": "reporte"}, format="json")
+    assert r.status_code == 202
+    url = r["Location"]
+    assert r.json()["estado"] == Trabajo.PENDIENTE
+
+    assert client.get(url + "resultado/").status_code == 409
+
+    call_command("procesar_trabajos", "--una-vez", "--hilos", "1", stdout=None)
+
+    estado = client.get(url).json()
+    assert estado["estado"] == Trabajo.COMPLETADO
+    assert estado["progreso"] == 100
+    res = client.get(url + "resultado/").json()
+    uid = str(planos.id)
+    assert res["planos"] == 3
+    assert res["por_tipo"][uid] == {"Eléctrico": 1, "Estructural": 1, "General": 1}
+    assert res["por_area"][uid]["Producción · General"] == 2
+
+
+def test_2_exportar_devuelve_csv(client, planos):
+    trabajo = trabajos.encolar("exportar", {"filtros": {"area": "Producción"}})
+    trabajos.procesar_uno()
+    r = client.get(reverse("trabajo-resultado", args=[trabajo.pk]))
+    assert r.status_code == 200
+    lineas = b"".join(r.streaming_content).decode().splitlines()
+    assert lineas[0].startswith("id,titulo")
+    assert len(lineas) == 3
+
+
+def test_3_limpieza_en_segundo_plano(client, planos):
+    r = client.delete(reverse("plano-limpiar-pruebas") + "?en_segundo_plano=true")
+    assert r.status_code == 202
+    assert Plano.objects.count() == 3
+    trabajo = trabajos.procesar_uno()
+    assert trabajo.resultado == {"eliminados": 3}
+    assert Plano.objects.count() == 0
+
+
+def test_4_reclamar_es_exclusivo(planos):
+    trabajo = trabajos.encolar("reporte")
+    assert trabajos.reclamar("a").pk == trabajo.pk
+    assert trabajos.reclamar("b") is None
+
+
+def test_5_bloqueo_reprograma_sin_dormir(planos, monkeypatch):
+    def bloqueada(trabajo, reportar):
+        raise OperationalError("database is locked")
+    monkeypatch.setitem(trabajos.TAREAS, "reporte", bloqueada)
+
+    trabajos.encolar("reporte")
+    trabajo = trabajos.procesar_uno()
+    assert trabajo.estado == Trabajo.PENDIENTE
+    assert trabajo.disponible_desde > trabajo.iniciado
+    assert trabajos.procesar_uno() is None  # aún no está disponible
+
+
+def test_6_tipo_desconocido_400(client, db):
+    r = client.post(reverse("trabajo-list"), {"tipo": "minar"}, format="json")
+    assert r.status_code == 400
+
+
+def test_7_liberar_abandonados_segun_latido(planos, monkeypatch):
+    from datetime import timedelta
+    from django.utils import timezone
+
+    largo, muerto = trabajos.encolar("reporte"), trabajos.encolar("reporte")
+    hace_una_hora = timezone.now() - timedelta(hours=1)
+    assert trabajos.reclamar("w1") and trabajos.reclamar("w1")
+    Trabajo.objects.update(iniciado=hace_una_hora, latido=hace_una_hora)
+
+    # Un trabajo largo y sano renueva el latido al reportar, aunque el
+    # progreso no cambie.
+    def tarea_larga(trabajo, reportar):
+        reportar(0)
+        assert trabajos.liberar_abandonados(minutos=30) == 1
+        return {}
+
+    monkeypatch.setitem(trabajos.TAREAS, "reporte", tarea_larga)
+    trabajos.ejecutar(Trabajo.objects.get(pk=largo.pk))
+
+    assert Trabajo.objects.get(pk=largo.pk).estado == Trabajo.COMPLETADO
+    muerto.refresh_from_db()
+    assert (muerto.estado, muerto.trabajador) == (Trabajo.PENDIENTE, "")
+
+
+def test_8_abandonado_sin_intentos_queda_fallido(planos):
+    from datetime import timedelta
+    from django.utils import timezone
+
+    trabajo = trabajos.encolar("reporte")
+    trabajos.reclamar("w1")
+    hace_una_hora = timezone.now() - timedelta(hours=1)
+    Trabajo.objects.update(latido=hace_una_hora, intentos=trabajos.MAX_INTENTOS)
+    assert trabajos.liberar_abandonados(minutos=30) == 0
+    trabajo.refresh_from_db()
+    assert trabajo.estado == Trabajo.FALLIDO and "Abandonado" in trabajo.error
+    assert trabajos.reclamar("w2") is None
+
+
+def test_9_limpieza_sin_filtros_vacia_todo(planos):
+    from datetime import timedelta
+    from django.utils import timezone
+    from planos.models import PlanoArchivado, PlanoEliminado
+    from planos.services import archivo, resumenes
+
+    resumenes.reconstruir()
+    hace_un_anio = timezone.now() - timedelta(days=365)
+    Plano.objects.filter(pk=Plano.objects.order_by("pk")[0].pk).update(fecha_subida=hace_un_anio)
+    assert archivo.archivar(timezone.now() - timedelta(days=30)) == 1
+
+    trabajos.encolar("limpieza")
+    assert trabajos.procesar_uno().resultado == {"eliminados": 2}
+    assert not Plano.objects.exists() and not PlanoArchivado.objects.exists()
+    assert resumenes.leer() == ({}, {})
+    assert PlanoEliminado.objects.filter(plano_id=None).exists()  # vaciado para el feed
+
+
+@pytest.mark.django_db(transaction=True)
+def test_10_latido_sin_reportar(planos, monkeypatch):
+    import time
+
+    monkeypatch.setattr(trabajos, "LATIDO_S", 0.05)
+    latidos = []
+
+    def tarea_muda(trabajo, reportar):
+        time.sleep(0.3)  # no llama a reportar
+        latidos.append(Trabajo.objects.get(pk=trabajo.pk).latido)
+        return {}
+
+    monkeypatch.setitem(trabajos.TAREAS, "reporte", tarea_muda)
+    trabajos.encolar("reporte")
+    trabajo = trabajos.procesar_uno()
+    assert trabajo.estado == Trabajo.COMPLETADO
+    assert latidos[0] > trabajo.iniciado
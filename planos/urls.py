@@ -1,7 +1,17 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import PlanoViewSet
+from .views import (AdjuntoViewSet, ConsultasLentasView, MetricasView, PlanoViewSet,
+                    SubidaAdjuntoViewSet, TrabajoViewSet, eventos_planos)
 
 router = DefaultRouter()
 router.register(r'planos', PlanoViewSet, basename='plano')
+router.register(r'trabajos', TrabajoViewSet, basename='trabajo')
+router.register(r'adjuntos', AdjuntoViewSet, basename='adjunto')
+router.register(r'subidas', SubidaAdjuntoViewSet, basename='subida')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('metricas/', MetricasView.as_view(), name='metricas'),
+    path('metricas/consultas-lentas/', ConsultasLentasView.as_view(), name='consultas-lentas'),
+    # Antes del router: si no, `eventos` se tomaría como el pk de un plano.
+    path('planos/eventos/', eventos_planos, name='plano-eventos'),
+] + router.urls
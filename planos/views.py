@@ -1,18 +1,264 @@
-from .models import Plano
-from .serializers import PlanoSerializer
-from rest_framework import viewsets, status
+from .models import Adjunto, Plano, PlanoArchivado, SubidaAdjunto, Trabajo
+from .paginacion import ConteoLimitOffsetPagination
+from .serializers import AdjuntoSerializer, PlanoSerializer, SubidaAdjuntoSerializer, TrabajoSerializer
+from .services import adjuntos, archivo, busqueda, escritor, metricas, operaciones_masivas, resumenes, trabajos
+from .services import cambios as feed
+from .services import consultas_lentas, eventos, replicas
+from rest_framework import mixins, permissions, viewsets, status
+from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
 
-from django.http import Http404
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_GET
 from django.db.models import ProtectedError
-from django.db import IntegrityError, OperationalError
+from django.db import IntegrityError, OperationalError, transaction
 import time
 
 
+def respuesta_trabajo_encolado(request, trabajo):
+    url = reverse("trabajo-detail", args=[trabajo.pk], request=request)
+    return Response(
+        TrabajoSerializer(trabajo).data | {"url": url},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": url}
+    )
+
+
+class BaseOcupada(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "La base de datos está ocupada. Intenta de nuevo."
+
+
 class PlanoViewSet(viewsets.ModelViewSet):
     queryset = Plano.objects.all()
     serializer_class = PlanoSerializer
+    pagination_class = ConteoLimitOffsetPagination
+
+    def get_queryset(self):
+        """
+        `GET /api/planos/?q=texto` → búsqueda de texto completo ordenada por relevancia.
+        `GET /api/planos/?incluir_archivados=true` → también los planos archivados.
+        """
+        queryset = super().get_queryset()
+        q = self.request.query_params.get("q")
+        if self.action == "list" and archivo.solicitado(self.request.query_params):
+            if q is not None:
+                raise ValidationError({archivo.PARAMETRO: "No se combina con ?q=: "
+                                       "los planos archivados no tienen índice de texto."})
+            return archivo.con_archivados(queryset)
+        if self.action == "list" and q is not None:
+            queryset = busqueda.buscar(queryset, q)
+        return queryset
+
+    def get_object(self):
+        """`GET /api/planos/<id>/?incluir_archivados=true` también busca en el archivo."""
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != "retrieve" or not archivo.solicitado(self.request.query_params):
+                raise
+        plano = get_object_or_404(PlanoArchivado.objects.all(), pk=self.kwargs[self.lookup_field])
+        self.check_object_permissions(self.request, plano)
+        return plano
+
+    # Lista, detalle y resumen se leen de una réplica (ver services/replicas.py).
+    # La autenticación ya pasó por el primario: un token recién creado vale.
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica = replicas.activar(replicas.para_peticion(request, self.action))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica", None)
+        if token is not None:
+            replicas.desactivar(token)
+            self._replica = None
+        if request.method not in permissions.SAFE_METHODS and response.status_code < 400:
+            replicas.marcar_escritura(response, request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    # Cada escritura actualiza los resúmenes en la misma transacción.
+    def perform_create(self, serializer):
+        if escritor.activo():
+            # Group commit: el hilo escritor confirma esta fila junto con otras.
+            try:
+                serializer.instance = escritor.escritor().guardar(serializer.validated_data)
+            except TimeoutError:
+                raise BaseOcupada()  # la fila se retiró de la cola: reintentar es seguro
+            return
+        with transaction.atomic():
+            plano = serializer.save()
+            resumenes.sumar([resumenes.fila_de(plano)])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            antes = resumenes.fila_de(serializer.instance)
+            plano = serializer.save()
+            resumenes.mover([antes], [resumenes.fila_de(plano)])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            fila = resumenes.fila_de(instance)
+            feed.registrar_bajas([instance.pk])
+            instance.delete()
+            resumenes.restar([fila])
+
+    @action(detail=True, methods=['get', 'post'])
+    def adjuntos(self, request, pk=None):
+        """
+        Archivos del plano (PDF, DWG...).
+        GET  /api/planos/<id>/adjuntos/  → lista (también de planos archivados)
+        POST /api/planos/<id>/adjuntos/  → inicia una subida {"nombre", "tamano"}
+             (201); los bytes se envían con PATCH /api/subidas/<id>/.
+        """
+        if request.method == "GET":
+            if not str(pk).isdigit() or not (Plano.objects.filter(pk=pk).exists()
+                    or PlanoArchivado.objects.filter(pk=pk).exists()):
+                raise Http404
+            lista = Adjunto.objects.filter(plano_id=pk).order_by("id")
+            return Response(AdjuntoSerializer(lista, many=True).data, status=status.HTTP_200_OK)
+
+        plano = self.get_object()
+        serializer = SubidaAdjuntoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subida = adjuntos.iniciar(plano.pk, **serializer.validated_data)
+        url = reverse("subida-detail", args=[subida.pk], request=request)
+        return Response(
+            SubidaAdjuntoSerializer(subida).data | {"url": url},
+            status=status.HTTP_201_CREATED,
+            headers={"Location": url, "Upload-Offset": "0"}
+        )
+
+    @action(detail=False, methods=['get'])
+    def cambios(self, request):
+        """
+        Feed incremental para clientes que mantienen una copia local.
+        URL: GET /api/planos/cambios/?desde=<cursor>&limite=<n>
+        Sin `desde` empieza por el principio (sincronización inicial).
+        Cada entrada es {"tipo": "upsert", "plano": {...}}, {"tipo": "baja", "id": N}
+        o {"tipo": "vaciado"} (se eliminaron todos: descartar la copia local).
+        Se repite con el `cursor` devuelto mientras `hay_mas` sea true.
+        """
+        limite = request.query_params.get("limite", str(feed.LIMITE))
+        if not limite.isdigit() or not 1 <= int(limite) <= feed.LIMITE_MAXIMO:
+            return Response({"limite": f"Debe ser un entero entre 1 y {feed.LIMITE_MAXIMO}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            cursor = feed.decodificar(request.query_params.get("desde"))
+        except feed.CursorInvalido as e:
+            return Response({"desde": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        entradas, cursor, hay_mas = feed.leer(cursor, int(limite))
+        datos = feed.como_dicts(entradas, lambda filas: self.get_serializer(filas, many=True).data)
+        return Response({"cambios": datos, "cursor": feed.codificar(cursor), "hay_mas": hay_mas},
+                        status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """
+        Conteos por usuario (por tipo y por Área · Subárea) leídos de las
+        tablas de resumen: no recorre la tabla de planos.
+        URL: GET /api/planos/resumen/?subido_por=<id>
+        """
+        usuario = request.query_params.get("subido_por")
+        if usuario is not None and not usuario.isdigit():
+            return Response({"subido_por": "Debe ser un id numérico."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        por_tipo, por_area = resumenes.leer(int(usuario) if usuario else None)
+        return Response({"por_tipo": por_tipo, "por_area": por_area},
+                        status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='upsert')
+    def upsert(self, request):
+        """
+        Ingesta idempotente por lotes usando `referencia_externa` como clave.
+        Reenviar el mismo lote no crea filas nuevas ni reescribe las existentes.
+        URL: POST /api/planos/upsert/
+        Cuerpo: lista de planos o {"planos": [...]}
+        """
+        filas = request.data
+        if isinstance(filas, dict):
+            filas = filas.get("planos")
+        if not isinstance(filas, list) or not filas:
+            return Response(
+                {"detail": "Se esperaba una lista no vacía de planos."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errores = operaciones_masivas.validar_filas_upsert(filas)
+        if errores:
+            return Response(
+                {"detail": "El lote contiene filas inválidas.", "errores": errores},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(operaciones_masivas.upsert_planos(filas),
+                        status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Actualización / eliminación masiva por filtro, ejecutada en la BD.
+        Filtros (query string): area, subarea, subido_por, desde, hasta, ids.
+        `?dry_run=true` solo devuelve cuántos planos se verían afectados.
+        URL: PATCH  /api/planos/bulk/?area=...   Cuerpo: campos a cambiar
+             DELETE /api/planos/bulk/?subido_por=...
+        """
+        params = request.query_params
+        if not any(params.get(f) for f in operaciones_masivas.FILTROS_MASIVOS):
+            return Response(
+                {"detail": "Indica al menos un filtro: "
+                 + ", ".join(operaciones_masivas.FILTROS_MASIVOS) + "."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset, errores = operaciones_masivas.filtrar_planos(
+            Plano.objects.all(), params)
+        if errores:
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+
+        cambios = None
+        if request.method == "PATCH":
+            serializer = self.get_serializer(data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            cambios = serializer.validated_data
+            if not cambios:
+                return Response(
+                    {"detail": "No se indicó ningún campo a actualizar."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if "referencia_externa" in cambios:
+                return Response(
+                    {"referencia_externa": ["Es única por plano; no se puede asignar en bloque."]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        if params.get("dry_run", "").lower() in ("1", "true", "si", "sí"):
+            return Response({"afectados": queryset.count(), "dry_run": True},
+                            status=status.HTTP_200_OK)
+
+        try:
+            if cambios is not None:
+                afectados = operaciones_masivas.actualizar_masivo(queryset, cambios)
+            else:
+                afectados = operaciones_masivas.eliminar_masivo(queryset)
+        except OperationalError as e:
+            if "database is locked" in str(e):
+                return Response(
+                    {"detail": "La base de datos está ocupada. Intenta de nuevo."},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            raise
+
+        return Response({"afectados": afectados, "dry_run": False},
+                        status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['delete'], url_path='limpiar-pruebas')
     def limpiar_pruebas(self, request):
@@ -20,7 +266,12 @@ class PlanoViewSet(viewsets.ModelViewSet):
         Endpoint optimizado para eliminar todos los planos de prueba.
         Usado por Locust al finalizar las pruebas de carga.
         URL: DELETE /api/planos/limpiar-pruebas/
+        Con `?en_segundo_plano=true` solo encola un trabajo "limpieza" (202).
         """
+        if request.query_params.get("en_segundo_plano", "").lower() in ("1", "true", "si", "sí"):
+            trabajo = trabajos.encolar("limpieza")
+            return respuesta_trabajo_encolado(request, trabajo)
+
         max_retries = 5
         total_eliminados = 0
 
@@ -39,8 +290,8 @@ class PlanoViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_200_OK
                     )
 
-                # Eliminar todos los planos
-                cantidad, detalles = Plano.objects.all().delete()
+                # Eliminar todos los planos (y sus resúmenes)
+                cantidad, detalles = operaciones_masivas.eliminar_todos()
                 total_eliminados = cantidad
 
                 return Response(
@@ -101,7 +352,7 @@ class PlanoViewSet(viewsets.ModelViewSet):
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                cantidad, _ = Plano.objects.all().delete()
+                cantidad, _ = operaciones_masivas.eliminar_todos()
                 return Response(
                     {"mensaje": f"Se eliminaron {cantidad} planos."},
                     status=status.HTTP_200_OK
@@ -165,3 +416,213 @@ class PlanoViewSet(viewsets.ModelViewSet):
             {"detail": "Error inesperado al eliminar."},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+class TrabajoViewSet(mixins.CreateModelMixin,
+                     mixins.RetrieveModelMixin,
+                     mixins.ListModelMixin,
+                     viewsets.GenericViewSet):
+    """
+    Cola de trabajos en segundo plano.
+    POST /api/trabajos/                  → encola {"tipo": ..., "parametros": {...}} (202)
+    GET  /api/trabajos/<id>/             → estado y progreso
+    GET  /api/trabajos/<id>/resultado/   → resultado (JSON o archivo CSV)
+    """
+    queryset = Trabajo.objects.order_by("-id")
+    serializer_class = TrabajoSerializer
+    pagination_class = ConteoLimitOffsetPagination
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        trabajo = serializer.save()
+        return respuesta_trabajo_encolado(request, trabajo)
+
+    @action(detail=True, methods=['get'])
+    def resultado(self, request, pk=None):
+        trabajo = self.get_object()
+        if trabajo.estado == Trabajo.FALLIDO:
+            return Response(
+                {"detail": "El trabajo falló.", "error": trabajo.error},
+                status=status.HTTP_409_CONFLICT
+            )
+        if trabajo.estado != Trabajo.COMPLETADO:
+            return Response(
+                {"detail": "El trabajo aún no termina.",
+                 "estado": trabajo.estado, "progreso": trabajo.progreso},
+                status=status.HTTP_409_CONFLICT
+            )
+        if trabajo.tipo == "exportar":
+            ruta = trabajos.ruta_exportacion(trabajo)
+            if not ruta.exists():
+                return Response(
+                    {"detail": "El archivo exportado ya no existe."},
+                    status=status.HTTP_410_GONE
+                )
+            return FileResponse(open(ruta, "rb"), as_attachment=True,
+                                filename=ruta.name, content_type="text/csv")
+        return Response(trabajo.resultado, status=status.HTTP_200_OK)
+
+
+class SubidaAdjuntoViewSet(mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Subida por partes de un adjunto (se inicia en POST /api/planos/<id>/adjuntos/).
+    PATCH  /api/subidas/<id>/  → agrega el cuerpo (application/octet-stream)
+           a partir del byte `Upload-Offset`; 200 mientras falte, 201 con el
+           adjunto al completar, 409 si el offset no coincide con lo recibido.
+    GET    /api/subidas/<id>/  → `recibido` (y `Upload-Offset`) para reanudar
+    DELETE /api/subidas/<id>/  → cancela y borra lo recibido
+    """
+    queryset = SubidaAdjunto.objects.all()
+    serializer_class = SubidaAdjuntoSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        subida = self.get_object()
+        return Response(self.get_serializer(subida).data, status=status.HTTP_200_OK,
+                        headers={"Upload-Offset": str(subida.recibido)})
+
+    def partial_update(self, request, *args, **kwargs):
+        subida = self.get_object()
+        desde = request.headers.get("Upload-Offset", "")
+        if not desde.isdigit():
+            return Response({"Upload-Offset": "Indica el byte donde empieza este bloque."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        largo = request.META.get("CONTENT_LENGTH") or ""
+        if not largo.isdigit():
+            return Response({"detail": "Falta Content-Length."},
+                            status=status.HTTP_411_LENGTH_REQUIRED)
+
+        # `request.stream` se lee por bloques: el cuerpo nunca se carga entero.
+        try:
+            adjunto = adjuntos.recibir(subida, int(desde), request.stream, int(largo))
+        except adjuntos.DesfaseSubida as e:
+            return Response({"detail": str(e), "recibido": e.recibido},
+                            status=status.HTTP_409_CONFLICT,
+                            headers={"Upload-Offset": str(e.recibido)})
+        except adjuntos.SubidaInvalida as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if adjunto is None:
+            return Response(self.get_serializer(subida).data, status=status.HTTP_200_OK,
+                            headers={"Upload-Offset": str(subida.recibido)})
+        url = reverse("adjunto-detail", args=[adjunto.pk], request=request)
+        return Response(AdjuntoSerializer(adjunto).data | {"url": url},
+                        status=status.HTTP_201_CREATED, headers={"Location": url})
+
+    def perform_destroy(self, instance):
+        adjuntos.cancelar(instance)
+
+
+class AdjuntoViewSet(mixins.RetrieveModelMixin,
+                     mixins.DestroyModelMixin,
+                     viewsets.GenericViewSet):
+    """
+    GET    /api/adjuntos/<id>/           → datos del adjunto
+    GET    /api/adjuntos/<id>/descarga/  → el archivo (admite Range / If-Range)
+    DELETE /api/adjuntos/<id>/           → quita el adjunto (el contenido se
+           borra con `purgar_adjuntos` si ningún otro lo usa)
+    """
+    queryset = Adjunto.objects.all()
+    serializer_class = AdjuntoSerializer
+
+    @action(detail=True, methods=['get'])
+    def descarga(self, request, pk=None):
+        adjunto = self.get_object()
+        etag = f'"{adjunto.sha256}"'
+        cabecera = request.headers.get("Range")
+        if request.headers.get("If-Range", etag) != etag:
+            cabecera = None  # el cliente tiene otra versión: va el archivo completo
+        try:
+            pedido = adjuntos.rango(cabecera, adjunto.tamano)
+        except adjuntos.RangoInvalido:
+            return HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                                headers={"Content-Range": f"bytes */{adjunto.tamano}"})
+        inicio, largo = pedido or (0, adjunto.tamano)
+
+        x_accel = getattr(settings, "PLANOS_ADJUNTOS_X_ACCEL", None)
+        if x_accel:
+            # nginx envía el archivo (con sendfile) y resuelve Range él mismo.
+            respuesta = HttpResponse(content_type=adjunto.tipo_contenido)
+            ruta = adjuntos.ruta_contenido(adjunto.sha256).relative_to(adjuntos.carpeta())
+            respuesta["X-Accel-Redirect"] = x_accel.rstrip("/") + "/" + ruta.as_posix()
+            respuesta["Content-Disposition"] = content_disposition_header(True, adjunto.nombre)
+        else:
+            try:
+                archivo = adjuntos.tramo(adjunto, inicio, largo)
+            except FileNotFoundError:
+                return Response({"detail": "El contenido del adjunto ya no existe."},
+                                status=status.HTTP_410_GONE)
+            respuesta = FileResponse(archivo, as_attachment=True, filename=adjunto.nombre,
+                                     content_type=adjunto.tipo_contenido,
+                                     status=status.HTTP_206_PARTIAL_CONTENT if pedido
+                                     else status.HTTP_200_OK)
+            respuesta.block_size = adjuntos.BLOQUE
+            respuesta["Content-Length"] = str(largo)
+            if pedido:
+                respuesta["Content-Range"] = f"bytes {inicio}-{inicio + largo - 1}/{adjunto.tamano}"
+        respuesta["Accept-Ranges"] = "bytes"
+        respuesta["ETag"] = etag
+        return respuesta
+
+
+class MetricasView(APIView):
+    """
+    Métricas del proceso (admisión, compresión, ...) para monitoreo.
+    URL: GET /api/metricas/   (solo staff)
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(metricas.instantanea(), status=status.HTTP_200_OK)
+
+
+class ConsultasLentasView(APIView):
+    """
+    Consultas lentas del proceso agrupadas por huella del SQL: veces, tiempo
+    total, máximo y promedio, y qué vistas y sitios de llamada las pidieron.
+    URL: GET /api/metricas/consultas-lentas/     (solo staff)
+         DELETE /api/metricas/consultas-lentas/  → empieza de cero
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "umbral_ms": consultas_lentas.umbral_ms(),
+            "huellas": consultas_lentas.resumen(),
+        }, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        consultas_lentas.reiniciar()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@require_GET
+async def eventos_planos(request):
+    """
+    Canal SSE con los cambios de planos, para tableros que hoy sondean la lista.
+    URL: GET /api/planos/eventos/?area=<area>&subarea=<subarea>
+    Eventos `upsert` (plano completo), `baja` (id) y `vaciado`, con el mismo
+    formato que /api/planos/cambios/. El `id` de cada evento es un cursor:
+    el navegador lo reenvía en Last-Event-ID al reconectar (o `?desde=`).
+    Necesita un servidor ASGI; bajo WSGI responde lo pendiente y termina,
+    y el cliente vuelve a conectar pasado `retry`. Sin cursor la respuesta
+    empieza con el id del último cambio, para reconectar desde ahí.
+    """
+    desde = request.headers.get("Last-Event-ID") or request.GET.get("desde")
+    try:
+        cursor = feed.decodificar(desde) if desde else None
+    except feed.CursorInvalido as e:
+        return JsonResponse({"desde": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    filtro = eventos.Filtro.de(request.GET.get("area"), request.GET.get("subarea"))
+
+    if isinstance(request, ASGIRequest):
+        respuesta = StreamingHttpResponse(eventos.transmitir(cursor, filtro),
+                                          content_type="text/event-stream")
+    else:
+        respuesta = HttpResponse(await sync_to_async(eventos.pendientes)(cursor, filtro),
+                                 content_type="text/event-stream")
+    respuesta["Cache-Control"] = "no-cache"
+    respuesta["X-Accel-Buffering"] = "no"  # que el proxy no acumule los eventos
+    return respuesta
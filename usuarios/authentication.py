@@ -0,0 +1,38 @@
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import CacheLRU
+
+
+class CacheTokens(CacheLRU):
+    """
+    Caché en memoria token → (usuario, token) con TTL y tamaño acotado.
+    La revocación es inmediata dentro del proceso (señales en usuarios.signals);
+    entre procesos distintos, un token revocado deja de valer al vencer el TTL.
+    """
+
+    def revocar_usuario(self, user_id):
+        with self._cerrojo:
+            for key in [k for k, (_, (user, _t)) in self._datos.items() if user.pk == user_id]:
+                del self._datos[key]
+
+
+cache_tokens = CacheTokens(
+    ttl=getattr(settings, "TOKEN_CACHE_TTL", 300),
+    maximo=getattr(settings, "TOKEN_CACHE_MAXIMO", 10_000),
+)
+
+
+class TokenCacheadoAuthentication(TokenAuthentication):
+    """
+    `Authorization: Token <key>` sin hash de contraseña por petición
+    (a diferencia de BasicAuthentication, que ejecuta PBKDF2 cada vez)
+    y sin consulta a la base mientras el token esté en caché.
+    """
+
+    def authenticate_credentials(self, key):
+        credenciales = cache_tokens.obtener(key)
+        if credenciales is None:
+            credenciales = super().authenticate_credentials(key)
+            cache_tokens.guardar(key, credenciales)
+        return credenciales
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+class CacheLRU:
+    """Diccionario en memoria con TTL por entrada y tamaño acotado (LRU)."""
+
+    def __init__(self, ttl: float = 300.0, maximo: int = 10_000):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._datos = OrderedDict()
+        self._cerrojo = threading.Lock()
+
+    def obtener(self, key):
+        with self._cerrojo:
+            entrada = self._datos.get(key)
+            if entrada is None:
+                return None
+            if entrada[0] < time.monotonic():
+                del self._datos[key]
+                return None
+            self._datos.move_to_end(key)
+            return entrada[1]
+
+    def guardar(self, key, valor):
+        with self._cerrojo:
+            self._datos[key] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(key)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def revocar(self, key):
+        with self._cerrojo:
+            self._datos.pop(key, None)
+
+    def limpiar(self):
+        with self._cerrojo:
+            self._datos.clear()
+
+
+# Ids de usuario que ya se comprobó que existen (validación de `subido_por`).
+# Se invalidan por señal al eliminar o desactivar al usuario; si eso ocurre
+# en otro proceso, la entrada vence con el TTL y, mientras tanto, la propia
+# clave foránea de la base rechaza la escritura.
+cache_usuarios = CacheLRU(
+    ttl=getattr(settings, "USUARIOS_CACHE_TTL", 300),
+    maximo=getattr(settings, "USUARIOS_CACHE_MAXIMO", 1_000),
+)
+
+
+def resolver_usuarios(ids) -> set:
+    """
+    Devuelve el subconjunto de `ids` que corresponde a usuarios existentes.
+    Los que no están en caché se consultan juntos en un solo `IN`.
+    """
+    ids = set(ids)
+    validos = {pk for pk in ids if cache_usuarios.obtener(pk)}
+    faltan = ids - validos
+    if faltan:
+        for pk in get_user_model().objects.filter(pk__in=faltan).values_list("pk", flat=True):
+            cache_usuarios.guardar(pk, True)
+            validos.add(pk)
+    return validos
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from .cache import cache_usuarios
+
+
+class UsuarioCacheadoField(serializers.PrimaryKeyRelatedField):
+    """
+    `PrimaryKeyRelatedField` de usuario que no consulta `auth_user` cuando
+    el id ya se validó antes (ver usuarios.cache.cache_usuarios).
+    Con un acierto devuelve una referencia `User(pk=...)` sin cargar: basta
+    para asignar la clave foránea.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", get_user_model().objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pk = _como_id(data)
+        if pk is not None and cache_usuarios.obtener(pk):
+            usuario = self.get_queryset().model(pk=pk)
+            usuario._state.adding = False
+            return usuario
+        usuario = super().to_internal_value(data)
+        cache_usuarios.guardar(usuario.pk, True)
+        return usuario
+
+
+def _como_id(data):
+    if isinstance(data, bool):
+        return None
+    if isinstance(data, int):
+        return data
+    if isinstance(data, str) and data.isdigit():
+        return int(data)
+    return None
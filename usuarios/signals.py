@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import cache_tokens
+from .cache import cache_usuarios
+
+
+@receiver(post_delete, sender=Token)
+def revocar_token(sender, instance, **kwargs):
+    cache_tokens.revocar(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def revocar_si_desactivado(sender, instance, **kwargs):
+    if not instance.is_active:
+        cache_tokens.revocar_usuario(instance.pk)
+        cache_usuarios.revocar(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def revocar_usuario_eliminado(sender, instance, **kwargs):
+    cache_tokens.revocar_usuario(instance.pk)
+    cache_usuarios.revocar(instance.pk)